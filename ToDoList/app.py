@@ -1,296 +1,745 @@
-from flask import Flask, render_template, request, jsonify, redirect, url_for
-import sqlite3
+from flask import Blueprint, Flask, Response, current_app, g, render_template, request, jsonify, redirect, url_for
+from markupsafe import Markup
 import os
-import google.generativeai as genai
-from datetime import datetime
+import threading
+from datetime import date, datetime
+import hashlib
 import json
-import re
+import time
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-app = Flask(__name__)
-app.secret_key = os.getenv('SECRET_KEY', 'your-secret-key-change-this')
-
-# Configure Gemini API
-GOOGLE_API_KEY = os.getenv('GOOGLE_API_KEY')
-if not GOOGLE_API_KEY:
-    raise ValueError("GOOGLE_API_KEY environment variable is not set")
-
-genai.configure(api_key=GOOGLE_API_KEY)
-model = genai.GenerativeModel('gemini-1.5-flash')
-
-# Database initialization
-def init_db():
-    conn = sqlite3.connect('todos.db')
-    c = conn.cursor()
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS todos (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            title TEXT NOT NULL,
-            description TEXT,
-            priority TEXT DEFAULT 'medium',
-            status TEXT DEFAULT 'pending',
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            due_date DATE,
-            completed_at TIMESTAMP
-        )
-    ''')
-    
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS chat_messages (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_message TEXT NOT NULL,
-            ai_response TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    conn.commit()
-    conn.close()
+# The data layer reads DATABASE_PATH and the DB_* tuning knobs at import time
+import chat_history
+import context
+import db
+import events
+import insights
+import intents
+import llm_cache
+import llm_executor
+import metrics
+import model_backends
+import model_client
+import pages
+import profiler
+import reminders
+import search
+import serialize
+import suggestions
+import tasks
+import transfer
+from db import init_db
+
+bp = Blueprint('todo', __name__)
+
+# Development mode: Flask debugger, template reloading, plain /static URLs
+# and no dashboard fragment caching
+DEBUG = os.getenv('FLASK_DEBUG', '0').lower() in ('1', 'true')
+
+# Fingerprinted, precompressed static files (built by create_app outside
+# debug mode) and the rendered stats/task-list parts of the dashboard
+static_assets = pages.AssetManifest()
+dashboard_fragments = pages.FragmentCache(0 if DEBUG else pages.DASHBOARD_CACHE_SIZE)
+
+# The model (Gemini by default, AI_BACKEND=fake for a local stub) is created
+# on the first AI request so startup and the CRUD routes never pay for
+# importing and configuring the SDK
+model = None
+model_lock = threading.Lock()
+
+def get_model():
+    global model
+    if model is None:
+        with model_lock:
+            if model is None:
+                model = model_backends.create_model()
+    return model
+
+# Cache for model responses that only depend on their prompt and the task set
+response_cache = llm_cache.ResponseCache()
+
+# Model calls run on a bounded worker pool, never directly on request
+# threads, behind deadlines, retries and a circuit breaker
+llm_pool = llm_executor.LLMExecutor()
+ai_client = model_client.ModelClient(llm_pool)
+
+def generate_text(prompt, max_output_tokens, request_timeout=None):
+    """Blocking Gemini call; run it through ``ai_client``"""
+    response = get_model().generate_content(
+        prompt,
+        generation_config={
+            'temperature': 0.7,
+            'max_output_tokens': max_output_tokens,
+        },
+        request_options={'timeout': request_timeout} if request_timeout else None
+    )
+    record_usage(response)
+    return response.text.strip() if response.text else ''
+
+def stream_text(prompt, max_output_tokens, request_timeout=None):
+    """Yield Gemini output piece by piece; run it through ``ai_client.stream``"""
+    stream = get_model().generate_content(
+        prompt,
+        stream=True,
+        generation_config={
+            'temperature': 0.7,
+            'max_output_tokens': max_output_tokens,
+        },
+        request_options={'timeout': request_timeout} if request_timeout else None
+    )
+    usage_chunk = None
+    for chunk in stream:
+        if getattr(chunk, 'usage_metadata', None):
+            usage_chunk = chunk
+        try:
+            text = chunk.text
+        except ValueError:
+            # Chunks without text parts (e.g. safety metadata)
+            continue
+        if text:
+            yield text
+    if usage_chunk is not None:
+        record_usage(usage_chunk)
+
+def record_usage(response):
+    """Count the prompt/completion tokens the backend reports"""
+    usage = getattr(response, 'usage_metadata', None)
+    if not usage:
+        return
+    metrics.LLM_TOKENS.inc('prompt', amount=getattr(usage, 'prompt_token_count', 0) or 0)
+    metrics.LLM_TOKENS.inc('completion', amount=getattr(usage, 'candidates_token_count', 0) or 0)
+
+def generate_insights(prompt):
+    return ai_client.call(generate_text, prompt, 500)
+
+# Productivity insights are recomputed off the request path
+insights_refresher = insights.InsightsRefresher(generate_insights)
+
+def generate_chat_summary(prompt):
+    return ai_client.call(generate_text, prompt, 400)
+
+chat_compactor = chat_history.ChatCompactor(generate_chat_summary)
+
+# Live updates: mutations publish task/stats events to /api/events streams
+event_broker = events.EventBroker()
+task_feed = events.TaskChangeFeed(event_broker)
+# Overdue/due-soon reminders, published to the same streams
+reminder_scheduler = reminders.ReminderScheduler(event_broker)
+
+# Change feed and reminder scheduler per tenant (None = shared database),
+# created when a tenant first subscribes
+live_channels = {None: (task_feed, reminder_scheduler)}
+live_channels_lock = threading.Lock()
+
+def live_channel(create=False):
+    """(feed, scheduler) of the current tenant; None if it never subscribed"""
+    tenant_id = db.current_tenant()
+    with live_channels_lock:
+        channel = live_channels.get(tenant_id)
+        if channel is None and create:
+            # Forget tenants without open streams before adding another
+            if len(live_channels) > event_broker.max_subscribers:
+                for idle in [t for t in live_channels if t is not None and not event_broker.has_subscribers(t)]:
+                    del live_channels[idle]
+            channel = (events.TaskChangeFeed(event_broker, tenant_id),
+                       reminders.ReminderScheduler(event_broker, tenant_id))
+            live_channels[tenant_id] = channel
+    return channel
+
+def publish_task_changes():
+    """Called after a mutation commits: live events and due-date reminders"""
+    channel = live_channel()
+    if channel:
+        feed, scheduler = channel
+        feed.publish_changes()
+        scheduler.wake()
+
+def tenant_stream(body):
+    """Iterate a streamed response body under the request's tenant; bodies
+    are read after the request context (and its tenant) is gone"""
+    tenant_id = db.current_tenant()
+    def run():
+        with db.tenant(tenant_id):
+            yield from body
+    return run()
+
+def busy_response(error, message='The AI assistant is busy right now. Please try again in a few seconds.'):
+    """429 for work rejected because its pool is saturated (model calls by
+    default)"""
+    response = jsonify({
+        'success': False,
+        'error': message
+    })
+    response.status_code = 429
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response
+
+# Request instrumentation: per-route latency, opt-in slow request profiling
+request_profiler = profiler.SlowRequestProfiler()
+
+@bp.before_app_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    request_profiler.begin()
+
+# Endpoints that do not touch tenant data
+TENANT_EXEMPT = ('static', 'todo.static_asset', 'todo.get_metrics')
+
+@bp.before_app_request
+def bind_tenant():
+    """With per-tenant databases, route this request to the caller's.
+
+    The tenant id comes from the X-Tenant-ID header, which the
+    authenticating proxy in front of the app must set (overwriting any
+    value sent by the client).
+    """
+    if db.router is None or request.endpoint in TENANT_EXEMPT:
+        return None
+    tenant_id = request.headers.get('X-Tenant-ID')
+    if not tenant_id:
+        return jsonify({'success': False, 'error': 'Missing X-Tenant-ID header'}), 400
+    try:
+        g.tenant_token = db.set_tenant(tenant_id)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    return None
+
+@bp.after_app_request
+def record_request_metrics(response):
+    started = g.get('request_started')
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        metrics.REQUEST_LATENCY.observe(time.perf_counter() - started, request.method, route, str(response.status_code))
+    return response
 
-def get_db_connection():
-    conn = sqlite3.connect('todos.db')
-    conn.row_factory = sqlite3.Row
-    return conn
+@bp.teardown_app_request
+def finish_request_profile(error=None):
+    started = g.get('request_started')
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        request_profiler.end(f'{request.method} {route}', time.perf_counter() - started)
 
-@app.route('/')
+@bp.teardown_app_request
+def unbind_tenant(error=None):
+    token = g.pop('tenant_token', None)
+    if token is not None:
+        db.reset_tenant(token)
+
+@metrics.collector
+def collect_component_metrics():
+    """Connection pool, model worker pool, model client, live update,
+    reminder and dashboard cache state"""
+    pool = db.pool.stats()
+    executor = llm_pool.stats()
+    client = ai_client.stats()
+    breaker = client['breaker']
+    live = event_broker.stats()
+    fragments = dashboard_fragments.stats()
+    with live_channels_lock:
+        schedulers = [scheduler for _, scheduler in live_channels.values()]
+    reminder = {'scheduled': 0, 'reminders': 0}
+    for scheduler in schedulers:
+        for key, value in scheduler.stats().items():
+            if key in reminder:
+                reminder[key] += value
+    families = [
+        ('todo_db_connections_opened_total', 'counter', 'SQLite connections opened by the pool',
+         [('todo_db_connections_opened_total', {}, pool['misses'])]),
+        ('todo_db_connections', 'gauge', 'Pool connections by state',
+         [('todo_db_connections', {'state': 'open'}, pool['open']),
+          ('todo_db_connections', {'state': 'idle'}, pool['idle'])]),
+        ('todo_db_pool_waits_total', 'counter', 'Checkouts that had to wait for a free connection',
+         [('todo_db_pool_waits_total', {}, pool['waits'])]),
+        ('todo_db_pool_timeouts_total', 'counter', 'Checkouts that timed out',
+         [('todo_db_pool_timeouts_total', {}, pool['timeouts'])]),
+        ('todo_llm_calls_total', 'counter', 'Model calls by outcome',
+         [('todo_llm_calls_total', {'outcome': 'success'}, client['successes']),
+          ('todo_llm_calls_total', {'outcome': 'error'}, client['failures']),
+          ('todo_llm_calls_total', {'outcome': 'short_circuited'}, breaker['short_circuited']),
+          ('todo_llm_calls_total', {'outcome': 'rejected_busy'}, executor['rejected'])]),
+        ('todo_llm_retries_total', 'counter', 'Model call retries after transient errors',
+         [('todo_llm_retries_total', {}, client['retries'])]),
+        ('todo_llm_circuit_open', 'gauge', '1 while the model circuit breaker is open or probing',
+         [('todo_llm_circuit_open', {}, 0 if breaker['state'] == 'closed' else 1)]),
+        ('todo_llm_workers', 'gauge', 'Model worker pool load',
+         [('todo_llm_workers', {'state': 'active'}, executor['active']),
+          ('todo_llm_workers', {'state': 'queued'}, executor['queued'])]),
+        ('todo_live_subscribers', 'gauge', 'Open /api/events streams',
+         [('todo_live_subscribers', {}, live['subscribers'])]),
+        ('todo_live_events_total', 'counter', 'Live update events published',
+         [('todo_live_events_total', {}, live['published'])]),
+        ('todo_live_rejected_total', 'counter', 'Event streams refused at the subscriber limit',
+         [('todo_live_rejected_total', {}, live['rejected'])]),
+        ('todo_reminders_scheduled', 'gauge', 'Due-date reminders waiting to fire',
+         [('todo_reminders_scheduled', {}, reminder['scheduled'])]),
+        ('todo_reminders_total', 'counter', 'Overdue and due-soon reminders published',
+         [('todo_reminders_total', {}, reminder['reminders'])]),
+        ('todo_dashboard_fragments_total', 'counter', 'Dashboard stats/task-list fragments served from cache or rendered',
+         [('todo_dashboard_fragments_total', {'result': 'hit'}, fragments['hits']),
+          ('todo_dashboard_fragments_total', {'result': 'miss'}, fragments['misses'])]),
+    ]
+    if db.router is not None:
+        shards = db.router.stats()
+        families += [
+            ('todo_db_shards_open', 'gauge', 'Tenant databases with an open connection pool',
+             [('todo_db_shards_open', {}, shards['open'])]),
+            ('todo_db_shard_opens_total', 'counter', 'Tenant pools opened (shard cache misses)',
+             [('todo_db_shard_opens_total', {}, shards['opens'])]),
+            ('todo_db_shard_evictions_total', 'counter', 'Tenant pools closed to stay within SHARD_CACHE_SIZE',
+             [('todo_db_shard_evictions_total', {}, shards['evictions'])]),
+        ]
+    samples = []
+    for operation, hist in client['latency'].items():
+        for bound, count in hist['buckets'].items():
+            samples.append(('todo_llm_call_duration_seconds_bucket', {'operation': operation, 'le': bound}, count))
+        samples.append(('todo_llm_call_duration_seconds_sum', {'operation': operation}, hist['sum']))
+        samples.append(('todo_llm_call_duration_seconds_count', {'operation': operation}, hist['count']))
+    families.append(('todo_llm_call_duration_seconds', 'histogram', 'Model call latency, retries included', samples))
+    return families
+
+def cached_generate(cache_key, prompt, max_output_tokens, validate=None):
+    """Model text for a prompt, served from the response cache when possible.
+
+    Only non-empty responses that pass ``validate`` are cached.
+    """
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
+    text = ai_client.call(generate_text, prompt, max_output_tokens)
+    if text and (validate is None or validate(text)):
+        response_cache.set(cache_key, text)
+    return text
+
+@bp.route('/')
 def dashboard():
-    conn = get_db_connection()
-    todos = conn.execute('SELECT * FROM todos ORDER BY created_at DESC').fetchall()
-    
-    # Calculate statistics
-    total_tasks = len(todos)
-    completed_tasks = len([t for t in todos if t['status'] == 'completed'])
-    pending_tasks = total_tasks - completed_tasks
-    
-    # Priority distribution
-    high_priority = len([t for t in todos if t['priority'] == 'high'])
-    medium_priority = len([t for t in todos if t['priority'] == 'medium'])
-    low_priority = len([t for t in todos if t['priority'] == 'low'])
-    
-    conn.close()
-    
-    stats = {
-        'total_tasks': total_tasks,
-        'completed_tasks': completed_tasks,
-        'pending_tasks': pending_tasks,
-        'completion_rate': round((completed_tasks / total_tasks * 100) if total_tasks > 0 else 0, 1),
-        'high_priority': high_priority,
-        'medium_priority': medium_priority,
-        'low_priority': low_priority
-    }
+    with db.connection() as conn:
+        version = tasks.current_version(conn)
+        # The page only changes with the tasks or a deploy of new assets
+        etag = list_etag(f'{version}-{static_assets.version}')
+        if not DEBUG and request.if_none_match.contains_weak(etag):
+            return not_modified(etag)
+        
+        stats_html = dashboard_fragments.get('stats', version, lambda: render_template(
+            'partials/stats.html', stats=tasks.get_stats(conn)))
+        tasks_html = dashboard_fragments.get('tasks', version, lambda: render_template(
+            'partials/task_list.html', todos=tasks.recent_todos(conn)))
     
-    return render_template('dashboard.html', todos=todos, stats=stats)
+    response = current_app.make_response(render_template(
+        'dashboard.html', stats_html=Markup(stats_html), tasks_html=Markup(tasks_html)))
+    return response if DEBUG else with_etag(response, etag)
 
-@app.route('/api/todos', methods=['GET'])
+@bp.app_template_global()
+def asset_url(filename):
+    """Fingerprinted URL of a static file in production, /static otherwise"""
+    url_name = static_assets.url_name(filename)
+    if url_name is None:
+        return url_for('static', filename=filename)
+    return url_for('todo.static_asset', filename=url_name)
+
+@bp.route('/assets/<path:filename>')
+def static_asset(filename):
+    """A fingerprinted static file, in the best precompressed coding the
+    client accepts; its URL changes with its content, so it never expires"""
+    asset = static_assets.get(filename)
+    if asset is None:
+        return jsonify({'success': False, 'error': 'Asset not found'}), 404
+    
+    coding = asset.negotiate(request.accept_encodings)
+    etag = f'{asset.digest}-{coding}'
+    if request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
+    else:
+        response = current_app.response_class(asset.bodies[coding], content_type=asset.mimetype)
+        if coding != 'identity':
+            response.headers['Content-Encoding'] = coding
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = f'public, max-age={pages.ASSET_MAX_AGE}, immutable'
+    response.vary.add('Accept-Encoding')
+    return response
+
+@bp.route('/api/todos', methods=['GET'])
 def get_todos():
-    conn = get_db_connection()
-    todos = conn.execute('SELECT * FROM todos ORDER BY created_at DESC').fetchall()
-    conn.close()
+    args = request.args
+    if 'since' in args:
+        return get_todo_changes()
+    
+    try:
+        filters = {
+            'status': tasks.parse_choices(args.get('status'), tasks.STATUSES, 'status'),
+            'priority': tasks.parse_choices(args.get('priority'), tasks.PRIORITIES, 'priority'),
+            'due_after': parse_date_arg(args.get('due_after')),
+            'due_before': parse_date_arg(args.get('due_before')),
+        }
+        fields = tasks.parse_fields(args.get('fields'))
+        limit = int(args.get('limit', tasks.DEFAULT_PAGE_SIZE))
+        
+        with db.connection() as conn:
+            # Read the version first: rows changed after this point are
+            # picked up again by the client's next ?since= request
+            version = tasks.current_version(conn)
+            etag = list_etag(version)
+            if request.if_none_match.contains_weak(etag):
+                return not_modified(etag)
+            
+            # Tasks arrive as JSON text from SQLite and are spliced in as-is
+            todos, next_cursor = tasks.list_todos_json(
+                conn, cursor=args.get('cursor'), limit=limit, fields=fields, **filters
+            )
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    body = serialize.envelope({
+        'success': True,
+        'next_cursor': next_cursor,
+        'version': version
+    }, 'todos', todos)
+    response = current_app.response_class(body + '\n', mimetype='application/json')
+    return with_etag(response, etag)
+
+def get_todo_changes():
+    """Delta sync: rows inserted/updated and ids deleted after ?since="""
+    try:
+        since = int(request.args['since'])
+        fields = tasks.parse_fields(request.args.get('fields'))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    with db.connection() as conn:
+        changed, deleted, version, has_more = tasks.changes_since(conn, since, fields)
+    
+    return jsonify({
+        'success': True,
+        'changed': changed,
+        'deleted': deleted,
+        'version': version,
+        'has_more': has_more
+    })
+
+@bp.route('/api/todos/due', methods=['GET'])
+def get_due_todos():
+    """Pending tasks due within ?within= days (overdue ones first), read
+    from the (status, due_date) index one page at a time"""
+    args = request.args
+    try:
+        within = int(args.get('within', reminders.DEFAULT_DUE_WITHIN))
+        limit = int(args.get('limit', reminders.DUE_PAGE_SIZE))
+        if not 0 <= within <= reminders.MAX_DUE_WITHIN:
+            raise ValueError(f'within must be between 0 and {reminders.MAX_DUE_WITHIN} days')
+        include_overdue = args.get('overdue', '1') not in ('0', 'false')
+        today = date.today()
+        
+        with db.connection() as conn:
+            # Days left change at midnight, so the date is part of the ETag
+            etag = list_etag(f'{tasks.current_version(conn)}-{today.isoformat()}')
+            if request.if_none_match.contains_weak(etag):
+                return not_modified(etag)
+            
+            todos, next_cursor = reminders.due_page(
+                conn, within, include_overdue, limit, args.get('cursor'), today
+            )
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    response = jsonify({
+        'success': True,
+        'today': today.isoformat(),
+        'todos': todos,
+        'next_cursor': next_cursor
+    })
+    return with_etag(response, etag)
+
+def list_etag(version):
+    """Weak ETag for a list response: the change version plus the query
+    (and tenant, whose versions are numbered independently)"""
+    digest = hashlib.sha1(request.query_string + (db.current_tenant() or '').encode()).hexdigest()[:16]
+    return f'v{version}-{digest}'
+
+def with_etag(response, etag):
+    response.set_etag(etag, weak=True)
+    # Let browsers cache but always revalidate with If-None-Match
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+def not_modified(etag):
+    return with_etag(current_app.response_class(status=304), etag)
+
+def parse_date_arg(value):
+    """Validate an optional YYYY-MM-DD query parameter"""
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').strftime('%Y-%m-%d')
+    except ValueError:
+        raise ValueError(f'Invalid date: {value} (expected YYYY-MM-DD)')
+
+@bp.route('/api/stats', methods=['GET'])
+def get_stats():
+    with db.connection() as conn:
+        etag = list_etag(tasks.current_version(conn))
+        if request.if_none_match.contains_weak(etag):
+            return not_modified(etag)
+        stats = tasks.get_stats(conn)
     
-    return jsonify([dict(todo) for todo in todos])
+    return with_etag(jsonify({'success': True, 'stats': stats}), etag)
 
-@app.route('/api/todos', methods=['POST'])
+@bp.route('/api/todos', methods=['POST'])
 def create_todo():
     data = request.get_json()
     
-    conn = get_db_connection()
-    conn.execute('''
-        INSERT INTO todos (title, description, priority, due_date)
-        VALUES (?, ?, ?, ?)
-    ''', (data['title'], data.get('description', ''), data.get('priority', 'medium'), data.get('due_date')))
-    
-    conn.commit()
-    conn.close()
+    with db.connection() as conn:
+        conn.execute('''
+            INSERT INTO todos (title, description, priority, due_date)
+            VALUES (?, ?, ?, ?)
+        ''', (data['title'], data.get('description', ''), data.get('priority', 'medium'), data.get('due_date')))
+    publish_task_changes()
     
     return jsonify({'success': True, 'message': 'Todo created successfully'})
 
-@app.route('/api/todos/<int:todo_id>', methods=['PUT'])
+@bp.route('/api/todos/<int:todo_id>', methods=['PUT'])
 def update_todo(todo_id):
     data = request.get_json()
     
-    conn = get_db_connection()
-    
-    # If marking as completed, add completion timestamp
-    if data.get('status') == 'completed':
-        conn.execute('''
-            UPDATE todos 
-            SET title=?, description=?, priority=?, status=?, due_date=?, 
-                completed_at=CURRENT_TIMESTAMP, updated_at=CURRENT_TIMESTAMP
-            WHERE id=?
-        ''', (data['title'], data.get('description', ''), data['priority'], 
-              data['status'], data.get('due_date'), todo_id))
-    else:
-        conn.execute('''
-            UPDATE todos 
-            SET title=?, description=?, priority=?, status=?, due_date=?, 
-                completed_at=NULL, updated_at=CURRENT_TIMESTAMP
-            WHERE id=?
-        ''', (data['title'], data.get('description', ''), data['priority'], 
-              data['status'], data.get('due_date'), todo_id))
-    
-    conn.commit()
-    conn.close()
+    with db.connection() as conn:
+        # If marking as completed, add completion timestamp
+        if data.get('status') == 'completed':
+            conn.execute('''
+                UPDATE todos 
+                SET title=?, description=?, priority=?, status=?, due_date=?, 
+                    completed_at=CURRENT_TIMESTAMP, updated_at=CURRENT_TIMESTAMP
+                WHERE id=?
+            ''', (data['title'], data.get('description', ''), data['priority'], 
+                  data['status'], data.get('due_date'), todo_id))
+        else:
+            conn.execute('''
+                UPDATE todos 
+                SET title=?, description=?, priority=?, status=?, due_date=?, 
+                    completed_at=NULL, updated_at=CURRENT_TIMESTAMP
+                WHERE id=?
+            ''', (data['title'], data.get('description', ''), data['priority'], 
+                  data['status'], data.get('due_date'), todo_id))
+    publish_task_changes()
     
     return jsonify({'success': True, 'message': 'Todo updated successfully'})
 
-@app.route('/api/todos/<int:todo_id>', methods=['DELETE'])
+@bp.route('/api/todos/<int:todo_id>', methods=['DELETE'])
 def delete_todo(todo_id):
-    conn = get_db_connection()
-    conn.execute('DELETE FROM todos WHERE id=?', (todo_id,))
-    conn.commit()
-    conn.close()
+    with db.connection() as conn:
+        conn.execute('DELETE FROM todos WHERE id=?', (todo_id,))
+    publish_task_changes()
     
     return jsonify({'success': True, 'message': 'Todo deleted successfully'})
 
-def process_task_command(user_message, todos, conn):
-    """Process natural language commands for task management"""
-    message_lower = user_message.lower().strip()
-    
-    # Create task commands
-    create_patterns = [
-        r'create (?:a )?(?:new )?task:?\s*(.+)',
-        r'add (?:a )?(?:new )?task:?\s*(.+)',
-        r'new task:?\s*(.+)',
-        r'make (?:a )?(?:new )?task:?\s*(.+)',
-        r'i need to\s+(.+)',
-        r'add:?\s*(.+)',
-        r'create:?\s*(.+)',
-    ]
+@bp.route('/api/todos/bulk', methods=['POST'])
+def bulk_todos():
+    """Apply many create/update/delete operations in a single transaction"""
+    data = request.get_json(silent=True) or {}
+    operations = data.get('operations')
+    atomic = bool(data.get('atomic', False))
     
-    for pattern in create_patterns:
-        match = re.search(pattern, message_lower)
-        if match:
-            task_description = match.group(1).strip()
-            
-            # Extract priority if mentioned
-            priority = 'medium'  # default
-            if any(word in task_description for word in ['high priority', 'urgent', 'important', 'critical']):
-                priority = 'high'
-                task_description = re.sub(r'\s*(?:with\s+)?(?:high\s+priority|urgent|important|critical)\s*', ' ', task_description).strip()
-            elif any(word in task_description for word in ['low priority', 'minor']):
-                priority = 'low'
-                task_description = re.sub(r'\s*(?:with\s+)?(?:low\s+priority|minor)\s*', ' ', task_description).strip()
-            elif 'medium priority' in task_description:
-                task_description = re.sub(r'\s*(?:with\s+)?medium\s+priority\s*', ' ', task_description).strip()
-            
-            # Clean up the task description
-            task_description = re.sub(r'\s+', ' ', task_description).strip()
-            
-            if task_description and len(task_description) > 2:
-                # Create the task
-                conn.execute('''
-                    INSERT INTO todos (title, description, priority, due_date)
-                    VALUES (?, ?, ?, ?)
-                ''', (task_description, '', priority, None))
-                
-                return {
-                    'message': f'✅ Created new task: "{task_description}" with {priority} priority!',
-                    'action_type': 'create_task'
-                }
+    if not isinstance(operations, list) or not operations:
+        return jsonify({'success': False, 'error': 'operations must be a non-empty list'}), 400
+    if len(operations) > tasks.MAX_BULK_OPERATIONS:
+        return jsonify({
+            'success': False,
+            'error': f'At most {tasks.MAX_BULK_OPERATIONS} operations per request'
+        }), 400
     
-    # Complete/Mark as done commands
-    complete_patterns = [
-        r'(?:mark|set)\s+(?:the\s+)?task\s+(?:about\s+|titled\s+|called\s+)?["\']?([^"\']+)["\']?\s+as\s+(?:completed|done|finished)',
-        r'complete\s+(?:the\s+)?task\s+(?:about\s+|titled\s+|called\s+)?["\']?([^"\']+)["\']?',
-        r'(?:mark|set)\s+["\']?([^"\']+)["\']?\s+as\s+(?:completed|done|finished)',
-        r'finish\s+(?:the\s+)?task\s+(?:about\s+|titled\s+|called\s+)?["\']?([^"\']+)["\']?',
-        r'done\s+with\s+["\']?([^"\']+)["\']?',
-        r'completed?\s+["\']?([^"\']+)["\']?',
-        r'["\']?([^"\']+)["\']?\s+is\s+(?:completed|done|finished)',
-    ]
+    valid = []
+    results = {}
+    for index, op in enumerate(operations):
+        try:
+            kind, params = tasks.validate_bulk_operation(op)
+            valid.append((index, kind, params))
+        except ValueError as e:
+            results[index] = {'op': op.get('op') if isinstance(op, dict) else None,
+                              'success': False, 'error': str(e)}
     
-    for pattern in complete_patterns:
-        match = re.search(pattern, message_lower)
-        if match:
-            task_search = match.group(1).strip()
-            
-            # Find matching task
-            matching_task = None
-            best_score = 0
-            
-            for todo in todos:
-                if todo['status'] == 'completed':
-                    continue  # Skip already completed tasks
-                    
-                # Calculate match score
-                title_lower = todo['title'].lower()
-                desc_lower = (todo['description'] or '').lower()
-                
-                if task_search in title_lower or task_search in desc_lower:
-                    # Exact substring match gets highest score
-                    score = len(task_search) / max(len(title_lower), 1)
-                    if score > best_score:
-                        best_score = score
-                        matching_task = todo
-                elif any(word in title_lower for word in task_search.split()):
-                    # Word match gets lower score
-                    words_matched = sum(1 for word in task_search.split() if word in title_lower)
-                    score = words_matched / len(task_search.split()) * 0.7
-                    if score > best_score:
-                        best_score = score
-                        matching_task = todo
-            
-            if matching_task and best_score > 0.3:
-                # Mark as completed
-                conn.execute('''
-                    UPDATE todos 
-                    SET status=?, completed_at=CURRENT_TIMESTAMP, updated_at=CURRENT_TIMESTAMP
-                    WHERE id=?
-                ''', ('completed', matching_task['id']))
-                
-                return {
-                    'message': f'✅ Marked task "{matching_task["title"]}" as completed!',
-                    'action_type': 'complete_task'
-                }
-            else:
-                return {
-                    'message': f'❌ Could not find a task matching "{task_search}". Please be more specific or check your task list.',
-                    'action_type': 'task_not_found'
-                }
+    if results and atomic:
+        return jsonify({
+            'success': False,
+            'error': 'Invalid operations; nothing was applied',
+            'results': [dict(results.get(i, {'success': False, 'skipped': True}), index=i)
+                        for i in range(len(operations))]
+        }), 400
     
-    # Delete task commands
-    delete_patterns = [
-        r'delete\s+(?:the\s+)?task\s+(?:about\s+|titled\s+|called\s+)?["\']?([^"\']+)["\']?',
-        r'remove\s+(?:the\s+)?task\s+(?:about\s+|titled\s+|called\s+)?["\']?([^"\']+)["\']?',
-        r'get\s+rid\s+of\s+(?:the\s+)?task\s+(?:about\s+|titled\s+|called\s+)?["\']?([^"\']+)["\']?',
-    ]
+    if valid:
+        with db.connection() as conn:
+            applied = tasks.apply_bulk(conn, valid)
+            if atomic and not all(r['success'] for r in applied.values()):
+                # An update or delete target is missing: undo the rest too
+                conn.rollback()
+                return jsonify({
+                    'success': False,
+                    'error': 'Some operations failed; nothing was applied',
+                    'results': [dict(applied[i] if not applied[i]['success'] else
+                                     {'op': applied[i]['op'], 'success': False, 'skipped': True}, index=i)
+                                for i in range(len(operations))]
+                }), 400
+            results.update(applied)
+        publish_task_changes()
     
-    for pattern in delete_patterns:
-        match = re.search(pattern, message_lower)
-        if match:
-            task_search = match.group(1).strip()
-            
-            # Find matching task
-            matching_task = None
-            for todo in todos:
-                if (task_search.lower() in todo['title'].lower() or 
-                    (todo['description'] and task_search.lower() in todo['description'].lower())):
-                    matching_task = todo
-                    break
+    ordered = [dict(results[i], index=i) for i in range(len(operations))]
+    return jsonify({
+        'success': all(r['success'] for r in ordered),
+        'applied': sum(1 for r in ordered if r['success']),
+        'results': ordered
+    })
+
+@bp.route('/api/todos/export', methods=['GET'])
+def export_todos():
+    """Stream every task (optionally filtered) as JSON lines or CSV"""
+    args = request.args
+    try:
+        fmt = transfer.parse_format(args.get('format'))
+        status = args.get('status')
+        if status and status not in tasks.STATUSES:
+            raise ValueError(f'Invalid status: {status}')
+        priority = args.get('priority')
+        if priority and priority not in tasks.PRIORITIES:
+            raise ValueError(f'Invalid priority: {priority}')
+        release_slot = transfer.acquire_slot()
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except transfer.TransferBusy as e:
+        return busy_response(e, str(e))
+    
+    def generate():
+        try:
+            yield from transfer.export_chunks(fmt, status, priority)
+        finally:
+            release_slot()
+    
+    filename = f"todos-{datetime.now().strftime('%Y%m%d-%H%M%S')}.{fmt}"
+    response = Response(tenant_stream(generate()), mimetype=transfer.FORMATS[fmt], headers={
+        'Content-Disposition': f'attachment; filename="{filename}"',
+        'X-Accel-Buffering': 'no'
+    })
+    # A body that is never read (HEAD, client gone before the first chunk)
+    # never starts generate(); the server still closes the response
+    response.call_on_close(release_slot)
+    return response
+
+@bp.route('/api/todos/import', methods=['POST'])
+def import_todos():
+    """Create tasks from a JSON lines or CSV body, read as it arrives.
+    With ``keep_ids=1`` (restoring an export) existing ids are updated."""
+    try:
+        fmt = transfer.parse_format(request.args.get('format'), request.content_type)
+        release_slot = transfer.acquire_slot()
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except transfer.TransferBusy as e:
+        return busy_response(e, str(e))
+    
+    try:
+        summary = transfer.import_lines(
+            transfer.text_lines(request.stream), fmt,
+            keep_ids=request.args.get('keep_ids') == '1'
+        )
+    finally:
+        release_slot()
+    if summary['imported']:
+        publish_task_changes()
+    
+    return jsonify(dict(summary, success=summary['failed'] == 0))
+
+def process_task_command(user_message, conn):
+    """Process natural language commands for task management.
+
+    A message may hold several commands ("add milk, then mark report as
+    done"); they run in order in one write transaction, so later commands
+    see the tasks earlier ones created or completed.
+    """
+    commands = intents.parse_commands(user_message)
+    if not commands:
+        metrics.CHAT_INTENTS.inc('none')
+        return None
+    
+    # One write lock for the whole message: no other writer can change the
+    # task list between its commands
+    if not conn.in_transaction:
+        conn.execute('BEGIN IMMEDIATE')
+    actions = []
+    for command in commands:
+        metrics.CHAT_INTENTS.inc(command.intent)
+        actions.append(run_task_command(command, conn))
+    
+    if len(actions) == 1:
+        return actions[0]
+    return {
+        'message': '\n'.join(action['message'] for action in actions),
+        'action_type': 'multiple',
+        'actions': actions
+    }
+
+def run_task_command(command, conn):
+    """Apply one parsed command and describe the outcome"""
+    if command.intent == 'create_task':
+        task_description = command.target
+        priority = command.priority
+        
+        # Create the task
+        conn.execute('''
+            INSERT INTO todos (title, description, priority, due_date)
+            VALUES (?, ?, ?, ?)
+        ''', (task_description, '', priority, command.due_date))
+        
+        due_note = f' due {command.due_date}' if command.due_date else ''
+        return {
+            'message': f'✅ Created new task: "{task_description}" with {priority} priority{due_note}!',
+            'action_type': 'create_task'
+        }
+    
+    task_search = command.target
+    
+    if command.intent == 'complete_task':
+        # Best-ranked pending task from the full-text index
+        matching_task = search.find_task(
+            conn, task_search, pending_only=True, min_score=search.COMPLETE_MIN_SCORE
+        )
+        
+        if matching_task:
+            # Mark as completed
+            conn.execute('''
+                UPDATE todos 
+                SET status=?, completed_at=CURRENT_TIMESTAMP, updated_at=CURRENT_TIMESTAMP
+                WHERE id=?
+            ''', ('completed', matching_task['id']))
             
-            if matching_task:
-                # Delete the task
-                conn.execute('DELETE FROM todos WHERE id=?', (matching_task['id'],))
-                
-                return {
-                    'message': f'🗑️ Deleted task: "{matching_task["title"]}"',
-                    'action_type': 'delete_task'
-                }
-            else:
-                return {
-                    'message': f'❌ Could not find a task matching "{task_search}". Please be more specific.',
-                    'action_type': 'task_not_found'
-                }
+            return {
+                'message': f'✅ Marked task "{matching_task["title"]}" as completed!',
+                'action_type': 'complete_task'
+            }
+        else:
+            return {
+                'message': f'❌ Could not find a task matching "{task_search}". Please be more specific or check your task list.',
+                'action_type': 'task_not_found'
+            }
     
-    return None
+    # Delete task commands: same index and ranking, but every search word
+    # has to appear since deleting is not undoable
+    matching_task = search.find_task(conn, task_search, require_all=True)
+    
+    if matching_task:
+        # Delete the task
+        conn.execute('DELETE FROM todos WHERE id=?', (matching_task['id'],))
+        
+        return {
+            'message': f'🗑️ Deleted task: "{matching_task["title"]}"',
+            'action_type': 'delete_task'
+        }
+    else:
+        return {
+            'message': f'❌ Could not find a task matching "{task_search}". Please be more specific.',
+            'action_type': 'task_not_found'
+        }
 
-@app.route('/api/chat', methods=['POST'])
+@bp.route('/api/chat', methods=['POST'])
 def chat_with_ai():
-    conn = None
     try:
         data = request.get_json()
         user_message = data.get('message', '')
@@ -301,81 +750,38 @@ def chat_with_ai():
                 'error': 'Message cannot be empty'
             }), 400
         
-        # Get current todos for context
-        conn = get_db_connection()
-        todos = conn.execute('SELECT * FROM todos').fetchall()
-        
-        # Check if user wants to perform task actions
-        action_result = process_task_command(user_message, todos, conn)
+        # Check if user wants to perform task actions; commands only touch
+        # the rows they need
+        with db.connection() as conn:
+            action_result = process_task_command(user_message, conn)
         
         if action_result:
+            publish_task_changes()
             # Task action was performed
-            conn.commit()
-            conn.close()
             return jsonify({
                 'success': True,
                 'response': action_result['message'],
                 'action_performed': True,
-                'action_type': action_result['action_type']
+                'action_type': action_result['action_type'],
+                'actions': action_result.get('actions', [action_result])
             })
         
-        # Prepare context for AI
-        todos_context = []
-        for todo in todos:
-            todos_context.append({
-                'title': todo['title'],
-                'description': todo['description'],
-                'priority': todo['priority'],
-                'status': todo['status'],
-                'created_at': todo['created_at']
-            })
-        
-        # Create prompt for Gemini
-        if todos_context:
-            context_str = json.dumps(todos_context, indent=2)
-            prompt = f"""You are a helpful AI assistant for a to-do list application. The user has the following tasks:
-
-{context_str}
-
-User message: {user_message}
-
-Please provide a helpful response. If the user is asking about their tasks, provide insights.
-If they want to add tasks, suggest how to do it. If they want productivity tips, provide them.
-Keep responses concise and actionable."""
-        else:
-            prompt = f"""You are a helpful AI assistant for a to-do list application. The user doesn't have any tasks yet.
-
-User message: {user_message}
-
-Please provide a helpful response. Encourage them to add tasks and provide productivity tips.
-Keep responses concise and actionable."""
+        prompt = build_chat_prompt(user_message)
         
         # Generate AI response with safety settings
         try:
-            response = model.generate_content(
-                prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=0.7,
-                    max_output_tokens=500,
-                )
-            )
-            
-            if response.text:
-                ai_response = response.text.strip()
-            else:
+            ai_response = ai_client.call(generate_text, prompt, 500)
+            if not ai_response:
                 ai_response = "I'm sorry, I couldn't generate a response right now. Please try again."
                 
+        except llm_executor.ExecutorBusy as busy:
+            return busy_response(busy)
         except Exception as ai_error:
             print(f"AI Generation Error: {str(ai_error)}")
             ai_response = "I'm having trouble connecting to my AI service right now. Please try again in a moment."
         
         # Save chat to database
-        conn.execute('''
-            INSERT INTO chat_messages (user_message, ai_response)
-            VALUES (?, ?)
-        ''', (user_message, ai_response))
-        conn.commit()
-        conn.close()
+        save_chat_message(user_message, ai_response)
         
         return jsonify({
             'success': True,
@@ -384,14 +790,133 @@ Keep responses concise and actionable."""
         
     except Exception as e:
         print(f"Chat API Error: {str(e)}")
-        if conn:
-            conn.close()
         return jsonify({
             'success': False,
             'error': 'An error occurred while processing your message. Please try again.'
         }), 500
 
-@app.route('/api/ai-suggestions', methods=['POST'])
+def build_chat_prompt(user_message):
+    # Prepare context for AI: the most relevant tasks within a token
+    # budget, the rest summarized as counts. The connection goes back to
+    # the pool before the (slow) model call.
+    with db.connection() as conn:
+        context_str, _ = context.build_task_context(conn, user_message)
+        history_str = chat_history.build_history_context(conn)
+    history = f"Conversation so far:\n{history_str}\n\n" if history_str else ''
+    
+    # Create prompt for Gemini
+    if context_str:
+        return f"""You are a helpful AI assistant for a to-do list application. The user has the following tasks (one JSON object per line):
+
+{context_str}
+
+{history}User message: {user_message}
+
+Please provide a helpful response. If the user is asking about their tasks, provide insights.
+If they want to add tasks, suggest how to do it. If they want productivity tips, provide them.
+Keep responses concise and actionable."""
+    
+    return f"""You are a helpful AI assistant for a to-do list application. The user doesn't have any tasks yet.
+
+{history}User message: {user_message}
+
+Please provide a helpful response. Encourage them to add tasks and provide productivity tips.
+Keep responses concise and actionable."""
+
+def save_chat_message(user_message, ai_response):
+    with db.connection() as conn:
+        chat_history.save(conn, user_message, ai_response)
+    # Summarize older turns and expire old ones off the request path
+    chat_compactor.start()
+    chat_compactor.wake()
+
+def sse_event(payload):
+    """Format one Server-Sent Events frame"""
+    return f"data: {serialize.dumps(payload)}\n\n"
+
+def sse_response(events):
+    return Response(events, mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        # Stop reverse proxies (nginx) from buffering the stream
+        'X-Accel-Buffering': 'no'
+    })
+
+@bp.route('/api/chat/stream', methods=['POST'])
+def chat_with_ai_stream():
+    """Streaming variant of /api/chat: model output is forwarded as SSE
+    ``chunk`` events while it is generated, followed by one ``done`` event.
+    The finished message is saved to chat_messages when the stream ends."""
+    data = request.get_json(silent=True) or {}
+    user_message = data.get('message', '')
+    
+    if not user_message.strip():
+        return jsonify({
+            'success': False,
+            'error': 'Message cannot be empty'
+        }), 400
+    
+    try:
+        with db.connection() as conn:
+            action_result = process_task_command(user_message, conn)
+        if action_result:
+            publish_task_changes()
+        prompt = None if action_result else build_chat_prompt(user_message)
+    except Exception as e:
+        print(f"Chat Stream Error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': 'An error occurred while processing your message. Please try again.'
+        }), 500
+    
+    if action_result:
+        # Commands finish immediately; send the result as a single event
+        return sse_response(iter([sse_event({
+            'type': 'done',
+            'response': action_result['message'],
+            'action_performed': True,
+            'action_type': action_result['action_type'],
+            'actions': action_result.get('actions', [action_result])
+        })]))
+    
+    stream_error = None
+    try:
+        chunks = ai_client.stream(stream_text, prompt, 500)
+    except llm_executor.ExecutorBusy as busy:
+        return busy_response(busy)
+    except model_client.ModelUnavailable as e:
+        # Circuit open: answer with the fallback right away
+        chunks = ()
+        stream_error = e
+    
+    def generate():
+        parts = []
+        try:
+            if stream_error:
+                raise stream_error
+            for text in chunks:
+                parts.append(text)
+                yield sse_event({'type': 'chunk', 'text': text})
+        except Exception as ai_error:
+            print(f"AI Streaming Error: {str(ai_error)}")
+            if not parts:
+                fallback = "I'm having trouble connecting to my AI service right now. Please try again in a moment."
+                parts.append(fallback)
+                yield sse_event({'type': 'chunk', 'text': fallback})
+        
+        ai_response = ''.join(parts).strip() or "I'm sorry, I couldn't generate a response right now. Please try again."
+        try:
+            save_chat_message(user_message, ai_response)
+        except Exception as e:
+            print(f"Chat Stream Save Error: {str(e)}")
+        yield sse_event({'type': 'done', 'response': ai_response, 'action_performed': False})
+    
+    response = sse_response(tenant_stream(generate()))
+    if not stream_error:
+        # Settle the breaker and stop the worker even when the body is never read
+        response.call_on_close(chunks.close)
+    return response
+
+@bp.route('/api/ai-suggestions', methods=['POST'])
 def get_ai_suggestions():
     try:
         data = request.get_json()
@@ -403,63 +928,27 @@ def get_ai_suggestions():
                 'error': 'Input cannot be empty'
             }), 400
         
-        prompt = f"""The user said: "{user_input}"
-
-Based on this input, suggest 3-5 specific, actionable to-do tasks. 
-For each task, also suggest an appropriate priority level (high, medium, low).
-
-Format your response as a JSON array like this:
-[
-    {{"task": "Task description", "priority": "high"}},
-    {{"task": "Another task", "priority": "medium"}}
-]
-
-Only return the JSON array, no other text."""
-        
         try:
-            response = model.generate_content(
-                prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=0.7,
-                    max_output_tokens=800,
-                )
+            response_text = cached_generate(
+                suggestion_cache_key(user_input), suggestions.build_prompt(user_input),
+                suggestions.SUGGESTION_TOKENS, validate=suggestions.is_valid_suggestions
             )
-            
-            if response.text:
-                # Clean the response text
-                response_text = response.text.strip()
-                
-                # Remove any markdown formatting if present
-                if response_text.startswith('```json'):
-                    response_text = response_text.replace('```json', '').replace('```', '').strip()
-                
-                # Try to parse the JSON response
-                suggestions = json.loads(response_text)
-                
-                # Validate the suggestions format
-                if isinstance(suggestions, list) and all(isinstance(s, dict) and 'task' in s and 'priority' in s for s in suggestions):
-                    return jsonify({
-                        'success': True,
-                        'suggestions': suggestions
-                    })
-                else:
-                    raise ValueError("Invalid suggestions format")
-                    
-            else:
+            if not response_text:
                 raise ValueError("No response from AI")
+            
+            return jsonify({
+                'success': True,
+                'suggestions': suggestions.parse_suggestions(response_text)
+            })
                 
-        except (json.JSONDecodeError, ValueError) as parse_error:
+        except llm_executor.ExecutorBusy as busy:
+            return busy_response(busy)
+        except (json.JSONDecodeError, ValueError, model_client.ModelUnavailable) as parse_error:
             print(f"AI Response Parse Error: {str(parse_error)}")
-            # Fallback if AI doesn't return valid JSON
+            # Fallback if AI doesn't return valid JSON or is unavailable
             return jsonify({
                 'success': True,
-                'suggestions': [
-                    {'task': 'Break down your goal into smaller, manageable steps', 'priority': 'medium'},
-                    {'task': 'Set a specific deadline for completion', 'priority': 'high'},
-                    {'task': 'Gather necessary resources and materials', 'priority': 'medium'},
-                    {'task': 'Create a detailed action plan', 'priority': 'high'},
-                    {'task': 'Schedule regular progress reviews', 'priority': 'low'}
-                ]
+                'suggestions': suggestions.FALLBACK_SUGGESTIONS
             })
         
     except Exception as e:
@@ -469,75 +958,269 @@ Only return the JSON array, no other text."""
             'error': 'An error occurred while generating suggestions. Please try again.'
         }), 500
 
-@app.route('/api/productivity-insights', methods=['GET'])
-def get_productivity_insights():
-    conn = None
+@bp.route('/api/ai-suggestions/batch', methods=['POST'])
+def get_ai_suggestions_batch():
+    """Suggestions for several inputs with at most one model call.
+
+    Inputs already in the response cache (shared with /api/ai-suggestions)
+    are answered from it; the rest go to the model in one batch prompt, and
+    each valid answer is cached under its own input.
+    """
+    data = request.get_json(silent=True) or {}
+    inputs = data.get('inputs')
+    
+    if not isinstance(inputs, list) or not inputs or not all(isinstance(i, str) and i.strip() for i in inputs):
+        return jsonify({'success': False, 'error': 'inputs must be a non-empty list of strings'}), 400
+    if len(inputs) > suggestions.SUGGESTIONS_MAX_BATCH:
+        return jsonify({
+            'success': False,
+            'error': f'At most {suggestions.SUGGESTIONS_MAX_BATCH} inputs per request'
+        }), 400
+    if any(len(i) > suggestions.MAX_INPUT_CHARS for i in inputs):
+        return jsonify({
+            'success': False,
+            'error': f'Inputs are limited to {suggestions.MAX_INPUT_CHARS} characters'
+        }), 400
+    
     try:
-        conn = get_db_connection()
-        todos = conn.execute('SELECT * FROM todos').fetchall()
-        conn.close()
+        keys = [suggestion_cache_key(user_input) for user_input in inputs]
+        answers = {}
+        sources = {}
+        for key in keys:
+            cached = response_cache.get(key)
+            if cached is not None and suggestions.is_valid_suggestions(cached):
+                answers[key] = suggestions.parse_suggestions(cached)
+                sources[key] = 'cache'
         
-        if not todos:
-            return jsonify({
-                'success': True,
-                'insights': "You don't have any tasks yet. Start by adding some tasks to get productivity insights!"
-            })
+        # Inputs that normalize to the same key are asked once
+        pending = {}
+        for key, user_input in zip(keys, inputs):
+            if key not in answers:
+                pending.setdefault(key, user_input)
         
-        # Prepare data for AI analysis
-        todos_data = []
-        for todo in todos:
-            todos_data.append({
-                'title': todo['title'],
-                'priority': todo['priority'],
-                'status': todo['status'],
-                'created_at': todo['created_at'],
-                'completed_at': todo['completed_at']
-            })
+        if pending:
+            try:
+                response_text = ai_client.call(
+                    generate_text, suggestions.build_batch_prompt(list(pending.values())),
+                    suggestions.batch_tokens(len(pending))
+                )
+                parsed = suggestions.parse_batch(response_text or '', len(pending))
+            except llm_executor.ExecutorBusy as busy:
+                return busy_response(busy)
+            except (json.JSONDecodeError, ValueError, model_client.ModelUnavailable) as parse_error:
+                print(f"AI Batch Response Parse Error: {str(parse_error)}")
+                parsed = [None] * len(pending)
+            
+            for key, items in zip(pending, parsed):
+                if items is None:
+                    answers[key] = suggestions.FALLBACK_SUGGESTIONS
+                    sources[key] = 'fallback'
+                else:
+                    response_cache.set(key, json.dumps(items))
+                    answers[key] = items
+                    sources[key] = 'model'
         
-        prompt = f"""Analyze the following to-do list data and provide productivity insights:
-
-{json.dumps(todos_data, indent=2)}
+        return jsonify({
+            'success': True,
+            'results': [
+                {'input': user_input, 'suggestions': answers[key], 'source': sources[key]}
+                for key, user_input in zip(keys, inputs)
+            ]
+        })
+        
+    except Exception as e:
+        print(f"AI Batch Suggestions Error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': 'An error occurred while generating suggestions. Please try again.'
+        }), 500
 
-Please provide:
-1. Overall productivity patterns
-2. Priority distribution analysis
-3. Completion trends
-4. Actionable recommendations for improvement
+def suggestion_cache_key(user_input):
+    """Cache key of one input's suggestions, shared by the single and batch routes"""
+    return response_cache.make_key('suggestions', user_input, max_output_tokens=suggestions.SUGGESTION_TOKENS)
 
-Keep the response concise and helpful (max 200 words)."""
+@bp.route('/api/productivity-insights', methods=['GET'])
+def get_productivity_insights():
+    try:
+        # Insights are precomputed by the background refresher; this only
+        # reads the stored analysis and tells the refresher if it is stale
+        insights_refresher.start()
+        with db.connection() as conn:
+            stats = tasks.get_stats(conn)
+            if not stats['total_tasks']:
+                return jsonify({
+                    'success': True,
+                    'insights': "You don't have any tasks yet. Start by adding some tasks to get productivity insights!"
+                })
+            stored = insights.load(conn)
+            stale = insights.needs_refresh(conn, stored)
+            if stored is None:
+                # First request: answer from the metrics now, the model's
+                # analysis is stored in the background
+                summary = insights.compute_metrics(conn)
+                stored = {
+                    'insights': insights.describe_metrics(summary),
+                    'metrics': summary,
+                    'source': 'metrics',
+                    'generated_at': None
+                }
         
-        try:
-            response = model.generate_content(
-                prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=0.7,
-                    max_output_tokens=500,
-                )
-            )
-            
-            if response.text:
-                insights = response.text.strip()
-            else:
-                insights = "I wasn't able to analyze your tasks right now. Please try again later."
-                
-        except Exception as ai_error:
-            print(f"AI Insights Error: {str(ai_error)}")
-            insights = "I'm having trouble analyzing your tasks right now. Based on what I can see, try to focus on completing high-priority tasks first and maintain a good balance between different priority levels."
+        if stale:
+            insights_refresher.wake()
         
         return jsonify({
             'success': True,
-            'insights': insights
+            'insights': stored['insights'],
+            'metrics': stored['metrics'],
+            'source': stored['source'],
+            'generated_at': stored['generated_at'],
+            'stale': stale
         })
         
     except Exception as e:
         print(f"Productivity Insights Error: {str(e)}")
-        if conn:
-            conn.close()
         return jsonify({
             'success': False,
             'error': 'An error occurred while generating insights. Please try again.'
         }), 500
 
-if __name__ == '__main__':
+@bp.route('/api/search', methods=['GET'])
+def search_all():
+    """Ranked full-text search over tasks and chat history, for
+    search-as-you-type"""
+    args = request.args
+    query = args.get('q', '').strip()
+    try:
+        scopes = tasks.parse_choices(args.get('scope'), search.SEARCH_SCOPES, 'scope') or search.SEARCH_SCOPES
+        status = args.get('status')
+        if status and status not in tasks.STATUSES:
+            raise ValueError(f'Invalid status: {status}')
+        limit = max(1, min(int(args.get('limit', search.SEARCH_PAGE_SIZE)), search.MAX_SEARCH_PAGE_SIZE))
+        offset = max(0, min(int(args.get('offset', 0)), search.MAX_SEARCH_OFFSET))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    results = {'success': True, 'query': query}
+    with db.connection() as conn:
+        if 'tasks' in scopes:
+            found, has_more = search.search_todos(conn, query, limit, offset, status)
+            results['tasks'] = {'results': found, 'next_offset': offset + limit if has_more else None}
+        if 'chat' in scopes:
+            found, has_more = search.search_chat(conn, query, limit, offset)
+            results['chat'] = {'results': found, 'next_offset': offset + limit if has_more else None}
+    
+    return jsonify(results)
+
+@bp.route('/api/events', methods=['GET'])
+def live_events():
+    """Server-Sent Events stream of task and stats changes.
+
+    Starts with a ``hello`` event carrying the current task version; clients
+    behind it (or told to ``resync``) catch up with ``GET /api/todos?since=``.
+    """
+    try:
+        subscription = event_broker.subscribe(db.current_tenant())
+    except events.TooManySubscribers as e:
+        response = jsonify({'success': False, 'error': str(e)})
+        response.status_code = 503
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response
+    
+    try:
+        feed, scheduler = live_channel(create=True)
+        version = feed.start()
+        scheduler.start()
+    except Exception:
+        event_broker.unsubscribe(subscription)
+        raise
+    
+    def generate():
+        yield f'retry: {events.EVENTS_RETRY_AFTER * 1000}\n\n'
+        yield sse_event({'type': 'hello', 'version': version})
+        while True:
+            event = subscription.get(events.EVENTS_KEEPALIVE)
+            # Comments keep proxies from timing out idle streams and
+            # surface closed connections
+            yield ': keepalive\n\n' if event is None else sse_event(event)
+    
+    response = sse_response(generate())
+    # Also when the body is never read (HEAD, client gone before the first frame)
+    response.call_on_close(lambda: event_broker.unsubscribe(subscription))
+    return response
+
+@bp.route('/api/chat/history', methods=['GET'])
+def get_chat_history():
+    """Newest-first page of chat messages; pass ``next_before`` back as
+    ``before`` for the next page"""
+    try:
+        before = int(request.args['before']) if 'before' in request.args else None
+        limit = int(request.args.get('limit', chat_history.PAGE_SIZE))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    with db.connection() as conn:
+        messages, next_before = chat_history.page(conn, before, limit)
+        # The rolling summary stands in for messages that were compacted
+        summary = chat_history.latest_summary(conn) if before is None else None
+    
+    return jsonify({
+        'success': True,
+        'messages': messages,
+        'next_before': next_before,
+        'summary': summary
+    })
+
+@bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+@bp.route('/api/db-stats', methods=['GET'])
+def get_db_stats():
+    stats = {'success': True, 'pool': db.pool.stats()}
+    if db.router is not None:
+        stats['shards'] = db.router.stats()
+    return jsonify(stats)
+
+@bp.route('/api/ai-stats', methods=['GET'])
+def get_ai_stats():
+    return jsonify({
+        'success': True,
+        'cache': response_cache.stats(),
+        'executor': llm_pool.stats(),
+        'model': ai_client.stats(),
+        'insights': insights_refresher.stats(),
+        'chat_history': chat_compactor.stats(),
+        'profiler': request_profiler.stats()
+    })
+
+def create_app():
+    """Build the app; called once at import for the module-level ``app``,
+    which is the WSGI entry point (``gunicorn app:app``). Calling it again
+    builds a second app and repeats the startup work.
+
+    Schema setup and migrations run once per process, followed by a check
+    of the dashboard counters; the model client is left for the first AI
+    request.
+    """
+    app = Flask(__name__)
+    app.json = serialize.JSONProvider(app)
+    app.secret_key = os.getenv('SECRET_KEY', 'your-secret-key-change-this')
+    app.config['TEMPLATES_AUTO_RELOAD'] = DEBUG
+    app.register_blueprint(bp)
+    if not DEBUG:
+        static_assets.build(app.static_folder)
     init_db()
-    app.run(debug=True, port=5004)
+    with db.connection() as conn:
+        if tasks.repair_counters(conn):
+            print("Warning: task counters were out of date and have been rebuilt")
+    if model_backends.AI_BACKEND == 'gemini' and not os.getenv('GOOGLE_API_KEY'):
+        print("Warning: GOOGLE_API_KEY is not set; AI endpoints will use their fallback answers")
+    return app
+
+# WSGI entry point
+app = create_app()
+
+if __name__ == '__main__':
+    insights_refresher.start()
+    chat_compactor.start()
+    app.run(debug=DEBUG, port=5004)
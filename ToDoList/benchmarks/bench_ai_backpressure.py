@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Task-list latency while chat traffic saturates a slow model
+
+Serves the app from a fixed pool of request threads (like a gunicorn gthread
+worker), floods /api/chat with clients against a fake model that takes
+--model-latency seconds, and measures GET /api/todos meanwhile. Compares the
+bounded model worker pool with the old behaviour, where every request thread
+could end up waiting on the model.
+
+Usage: python benchmarks/bench_ai_backpressure.py [--threads N] [--chat-clients N] [--duration S]
+"""
+import argparse
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+
+from common import temp_database, load_app
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+class PooledWSGIServer(BaseWSGIServer):
+    """Werkzeug server handling requests on a fixed number of threads"""
+
+    def __init__(self, host, port, app, threads):
+        super().__init__(host, port, app, handler=QuietHandler)
+        self.request_pool = ThreadPoolExecutor(max_workers=threads)
+
+    def process_request(self, request, client_address):
+        self.request_pool.submit(self._handle, request, client_address)
+
+    def _handle(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+
+def request(url, payload=None):
+    data = json.dumps(payload).encode() if payload is not None else None
+    req = urllib.request.Request(url, data=data, headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(req, timeout=120) as response:
+            response.read()
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def run_scenario(app, label, executor, args):
+    app.llm_pool = executor
+    server = PooledWSGIServer('127.0.0.1', 0, app.app, args.threads)
+    base = f'http://127.0.0.1:{server.server_port}'
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    stop = time.monotonic() + args.duration
+    chat_codes = []
+
+    def chat_client():
+        while time.monotonic() < stop:
+            code = request(f'{base}/api/chat', {'message': 'how should I plan my week?'})
+            chat_codes.append(code)
+            if code == 429:
+                # Well-behaved clients back off instead of retrying at once
+                time.sleep(args.backoff)
+
+    clients = [threading.Thread(target=chat_client) for _ in range(args.chat_clients)]
+    for client in clients:
+        client.start()
+    time.sleep(0.2)
+
+    latencies = []
+    while time.monotonic() < stop:
+        start = time.perf_counter()
+        request(f'{base}/api/todos?limit=20')
+        latencies.append((time.perf_counter() - start) * 1000)
+        time.sleep(0.02)
+
+    for client in clients:
+        client.join()
+    server.shutdown()
+    server.server_close()
+
+    print(f"{label:<28} todos p50 {percentile(latencies, 50):>8.1f} ms  p99 {percentile(latencies, 99):>8.1f} ms"
+          f"  chat 200s {chat_codes.count(200):>4}  429s {chat_codes.count(429):>4}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--threads', type=int, default=16, help='request threads serving the app')
+    parser.add_argument('--chat-clients', type=int, default=48, help='concurrent chat clients')
+    parser.add_argument('--model-latency', type=float, default=1.0, help='seconds per fake model call')
+    parser.add_argument('--backoff', type=float, default=0.5, help='client pause after a 429')
+    parser.add_argument('--duration', type=float, default=5.0, help='seconds per scenario')
+    args = parser.parse_args()
+
+    temp_database()
+    app = load_app()
+    import llm_executor
+    import model_backends
+
+    with app.db.connection() as conn:
+        conn.executemany('INSERT INTO todos (title, priority) VALUES (?, ?)',
+                         [(f'task {i}', 'medium') for i in range(200)])
+    app.model = model_backends.FakeModel(latency=args.model_latency, jitter=0)
+
+    print(f"🏁 {args.chat_clients} chat clients, {args.threads} request threads, "
+          f"{args.model_latency}s model latency\n")
+
+    # Old behaviour: effectively no limit, every chat request waits on the model
+    run_scenario(app, 'unbounded model calls',
+                 llm_executor.LLMExecutor(workers=args.chat_clients, queue_size=0), args)
+    run_scenario(app, 'bounded worker pool', llm_executor.LLMExecutor(), args)
+
+
+if __name__ == '__main__':
+    main()
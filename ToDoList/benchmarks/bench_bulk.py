@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Compare single-row todo endpoints with POST /api/todos/bulk
+
+Usage: python benchmarks/bench_bulk.py [--count N] [--batch N]
+"""
+import argparse
+
+from common import temp_database, load_app, timed, report
+
+
+def run_single(client, count):
+    for i in range(count):
+        client.post('/api/todos', json={'title': f'single {i}', 'priority': 'low'})
+
+
+def run_single_updates(client, ids):
+    for todo_id in ids:
+        client.put(f'/api/todos/{todo_id}', json={
+            'title': f'single {todo_id}', 'priority': 'low', 'status': 'completed'
+        })
+
+
+def run_single_deletes(client, ids):
+    for todo_id in ids:
+        client.delete(f'/api/todos/{todo_id}')
+
+
+def run_bulk(client, operations, batch):
+    results = []
+    for start in range(0, len(operations), batch):
+        response = client.post('/api/todos/bulk', json={'operations': operations[start:start + batch]})
+        results.extend(response.get_json()['results'])
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--count', type=int, default=1000, help='operations per phase')
+    parser.add_argument('--batch', type=int, default=500, help='operations per bulk request')
+    args = parser.parse_args()
+
+    temp_database()
+    client = load_app().app.test_client()
+
+    print(f"🏁 {args.count} creates, updates and deletes (bulk batch size {args.batch})\n")
+
+    seconds, _ = timed(run_single, client, args.count)
+    report('POST /api/todos', args.count, seconds)
+    ids = list(range(1, args.count + 1))
+    seconds, _ = timed(run_single_updates, client, ids)
+    report('PUT /api/todos/<id>', args.count, seconds)
+    seconds, _ = timed(run_single_deletes, client, ids)
+    report('DELETE /api/todos/<id>', args.count, seconds)
+
+    creates = [{'op': 'create', 'title': f'bulk {i}', 'priority': 'low'} for i in range(args.count)]
+    seconds, results = timed(run_bulk, client, creates, args.batch)
+    report('bulk create', args.count, seconds)
+    ids = [r['id'] for r in results]
+    updates = [{'op': 'update', 'id': i, 'status': 'completed'} for i in ids]
+    seconds, _ = timed(run_bulk, client, updates, args.batch)
+    report('bulk update', args.count, seconds)
+    deletes = [{'op': 'delete', 'id': i} for i in ids]
+    seconds, _ = timed(run_bulk, client, deletes, args.batch)
+    report('bulk delete', args.count, seconds)
+
+
+if __name__ == '__main__':
+    main()
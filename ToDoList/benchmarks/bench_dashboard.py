@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Dashboard requests per second and static asset delivery
+
+Seeds --tasks tasks and requests GET / through Flask's test client:
+
+  debug render      - templates checked for changes and both fragments
+                      rendered on every request (as under FLASK_DEBUG=1)
+  fragments rendered - production template cache, fragment cache disabled
+  fragments cached  - stats and task list served from the fragment cache
+  change + render   - a task is updated before each request (cache miss)
+  revalidate (304)  - the browser sends back the page's ETag
+
+then fetches app.js as the plain /static file and as the fingerprinted,
+precompressed /assets file, and reports bytes sent per response.
+
+Usage: python benchmarks/bench_dashboard.py [--tasks 100000] [--requests 2000]
+"""
+import argparse
+import random
+import re
+import time
+
+from common import temp_database, load_app
+from loadtest import seed
+
+
+def measure(label, fn, requests):
+    size = 0
+    start = time.perf_counter()
+    for _ in range(requests):
+        size = fn()
+    seconds = time.perf_counter() - start
+    print(f"{label:<28} {requests / seconds:>10,.0f} req/s {seconds / requests * 1000:>8.3f} ms {size:>10,} bytes")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tasks', type=int, default=100000)
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    temp_database()
+    app = load_app()
+    seed(app.db, args.tasks, random.Random(1))
+    client = app.app.test_client()
+    jinja = app.app.jinja_env
+    cache = app.dashboard_fragments
+
+    def page(headers=None):
+        response = client.get('/', headers=headers)
+        assert response.status_code in (200, 304), response.status_code
+        return len(response.data)
+
+    print(f"🏁 GET / over {args.tasks:,} tasks, {args.requests:,} requests per row\n")
+    app.dashboard_fragments = app.pages.FragmentCache(0)
+    jinja.auto_reload = True
+    measure('debug render', page, args.requests)
+    jinja.auto_reload = False
+    measure('fragments rendered', page, args.requests)
+    app.dashboard_fragments = cache
+    measure('fragments cached', page, args.requests)
+
+    rng = random.Random(2)
+
+    def change_and_page():
+        with app.db.connection() as conn:
+            conn.execute("UPDATE todos SET priority = ? WHERE id = ?",
+                         (rng.choice(('high', 'medium', 'low')), rng.randrange(1, args.tasks)))
+        return page()
+    measure('change + render', change_and_page, args.requests)
+
+    etag = client.get('/').headers['ETag']
+    measure('revalidate (304)', lambda: page({'If-None-Match': etag}), args.requests)
+    print(f"\nFragment cache: {cache.stats()}\n")
+
+    html = client.get('/').get_data(as_text=True)
+    asset_url = re.search(r'src="(/assets/js/app\.[0-9a-f]+\.js)"', html).group(1)
+
+    def fetch(url, encoding):
+        response = client.get(url, headers={'Accept-Encoding': encoding})
+        assert response.status_code == 200, response.status_code
+        size = len(response.data)
+        response.close()
+        return size
+    measure('/static/js/app.js', lambda: fetch('/static/js/app.js', 'gzip, br'), args.requests)
+    measure('/assets app.js (gzip)', lambda: fetch(asset_url, 'gzip'), args.requests)
+    measure('/assets app.js (br)', lambda: fetch(asset_url, 'gzip, br'), args.requests)
+    print(f"\nAssets: {app.static_assets.stats()}")
+
+
+if __name__ == '__main__':
+    main()
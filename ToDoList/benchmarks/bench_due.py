@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Upcoming-deadline queries: (status, due_date) index range vs a table scan
+
+Seeds --tasks tasks with due dates spread around today, then times a page of
+GET /api/todos/due through the test client, the same page read with the index
+disabled (NOT INDEXED: full scan plus sort), a full load of the reminder
+scheduler's heap, and applying one task change to it.
+
+Usage: python benchmarks/bench_due.py [--tasks N] [--requests N]
+"""
+import argparse
+import random
+import time
+from datetime import date, timedelta
+
+from common import temp_database, load_app
+
+SEED_CHUNK = 10000
+
+
+def seed(db, count, rng):
+    """Pending and completed tasks due from a year ago to a year ahead"""
+    today = date.today()
+    with db.connection() as conn:
+        for start in range(0, count, SEED_CHUNK):
+            rows = []
+            for i in range(start, min(start + SEED_CHUNK, count)):
+                due = today + timedelta(days=rng.randrange(-365, 366)) if rng.random() < 0.7 else None
+                rows.append((f'task {i}', rng.choice(('high', 'medium', 'low')),
+                             'pending' if rng.random() < 0.6 else 'completed',
+                             due.isoformat() if due else None))
+            conn.executemany(
+                'INSERT INTO todos (title, priority, status, due_date) VALUES (?, ?, ?, ?)', rows
+            )
+            conn.commit()
+
+
+def scan_page(conn, today, within, limit):
+    """The same page with the index unusable"""
+    return conn.execute('''
+        SELECT id, title, description, priority, status, due_date, created_at
+        FROM todos NOT INDEXED
+        WHERE status = 'pending' AND due_date IS NOT NULL AND due_date >= ? AND due_date <= ?
+        ORDER BY due_date, id LIMIT ?
+    ''', (today.isoformat(), (today + timedelta(days=within)).isoformat(), limit)).fetchall()
+
+
+def measure(label, fn, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    seconds = time.perf_counter() - start
+    print(f"{label:<36} {seconds / rounds * 1000:>10.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tasks', type=int, default=1000000)
+    parser.add_argument('--requests', type=int, default=200)
+    args = parser.parse_args()
+
+    temp_database()
+    app = load_app()
+    seed(app.db, args.tasks, random.Random(3))
+    client = app.app.test_client()
+    today = date.today()
+    rounds = max(1, args.requests // 20)
+
+    print(f"🏁 Pending tasks due within 7 days, 50 per page, over {args.tasks:,} tasks\n")
+    measure('GET /api/todos/due (index range)',
+            lambda: client.get('/api/todos/due?within=7&overdue=0'), args.requests)
+    with app.db.connection() as conn:
+        measure('reminders.due_page (index range)',
+                lambda: app.reminders.due_page(conn, 7, include_overdue=False, today=today), args.requests)
+        measure('NOT INDEXED scan + sort', lambda: scan_page(conn, today, 7, 51), rounds)
+
+    scheduler = app.reminders.ReminderScheduler(app.event_broker)
+    measure('scheduler load (21-day window)',
+            lambda: app.reminders.ReminderScheduler(app.event_broker).run_once(), rounds)
+    scheduler.run_once()
+    rng = random.Random(5)
+
+    def reschedule():
+        with app.db.connection() as conn:
+            conn.execute("UPDATE todos SET due_date = ?, status = 'pending' WHERE id = ?",
+                         (today.isoformat(), rng.randrange(1, args.tasks)))
+        scheduler.wake()
+        scheduler.run_once()
+    measure('reschedule one task + scheduler update', reschedule, args.requests)
+    print(f"\n{scheduler.stats()['scheduled']:,} tasks scheduled")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for the chat command intent matcher (intents.py)
+
+Measures messages per second on a corpus of realistic chat messages and
+compares the compiled single-pass matcher with the previous approach of
+calling re.search on each raw pattern string in turn.
+
+Usage: python benchmarks/bench_intents.py [--rounds N]
+"""
+import argparse
+import re
+import time
+
+from common import APP_DIR  # noqa: F401  (puts the app directory on sys.path)
+import sys
+sys.path.insert(0, APP_DIR)
+
+import intents
+
+CORPUS = [
+    'Create a new task: Buy groceries',
+    'add task: call the dentist with high priority',
+    'Add task review pull requests urgent',
+    'new task: book flights to Lisbon by friday',
+    'I need to renew my passport due next week',
+    'make a task to water the plants low priority',
+    'add: pay electricity bill due 2026-11-01',
+    'Mark shopping as completed',
+    'mark the task about quarterly report as done',
+    'complete task "write blog post"',
+    'finish the task called taxes',
+    'done with laundry',
+    'the presentation is finished',
+    'Delete task about meeting',
+    'remove the task titled old notes',
+    'get rid of the task called gym',
+    'How am I doing this week?',
+    'What should I focus on today?',
+    'Can you give me some productivity tips for deep work?',
+    'Summarize my pending high priority items please',
+]
+
+
+def legacy_parse(message):
+    """The pre-compiled-matcher behaviour: every pattern string searched in turn"""
+    message_lower = message.lower().strip()
+    for intent, patterns in intents.INTENT_PATTERNS:
+        for pattern in patterns:
+            match = re.search(pattern, message_lower)
+            if not match:
+                continue
+            target = match.group('target').strip()
+            if intent != 'create_task':
+                return intent, target
+            priority = 'medium'
+            if any(w in target for w in ['high priority', 'urgent', 'important', 'critical']):
+                priority = 'high'
+                target = re.sub(r'\s*(?:with\s+)?(?:high\s+priority|urgent|important|critical)\s*', ' ', target).strip()
+            elif any(w in target for w in ['low priority', 'minor']):
+                priority = 'low'
+                target = re.sub(r'\s*(?:with\s+)?(?:low\s+priority|minor)\s*', ' ', target).strip()
+            elif 'medium priority' in target:
+                target = re.sub(r'\s*(?:with\s+)?medium\s+priority\s*', ' ', target).strip()
+            target = re.sub(r'\s+', ' ', target).strip()
+            if target and len(target) > 2:
+                return intent, target
+    return None
+
+
+def run(parse, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for message in CORPUS:
+            parse(message)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rounds', type=int, default=5000)
+    args = parser.parse_args()
+
+    # Both matchers must agree on which intent a message triggers
+    for message in CORPUS:
+        legacy = legacy_parse(message)
+        command = intents.parse_command(message)
+        assert (legacy and legacy[0]) == (command and command.intent), message
+
+    total = args.rounds * len(CORPUS)
+    print(f"🏁 {len(CORPUS)} messages x {args.rounds} rounds\n")
+    for label, parse in (('re.search per pattern (legacy)', legacy_parse),
+                         ('compiled intent matcher', intents.parse_command)):
+        seconds = run(parse, args.rounds)
+        print(f"{label:<34} {total / seconds:>12,.0f} msg/s {seconds / total * 1e6:>8.2f} µs/msg")
+
+
+if __name__ == '__main__':
+    main()
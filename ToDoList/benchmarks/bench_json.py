@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+JSON encoding of large task responses: Python dicts vs SQLite json_object()
+
+Seeds --rows tasks and builds a {"success": true, "todos": [...]} body of all
+of them in each of these ways, reporting the best of --rounds timings and the
+peak traced Python memory (tracemalloc) of one more run:
+
+  dicts + json          - Row -> dict per task, then json.dumps of the list
+                          (what jsonify did before)
+  dicts + jsonify       - the same list through the app's JSON provider
+                          (orjson when installed)
+  json_object + join    - SQLite encodes each row; the texts are joined into
+                          the body (what GET /api/todos does)
+  json_group_array      - SQLite encodes the whole array as one value
+
+and then times the streamed JSON lines export of the same rows, with the
+former Python encoder and with json_object() rows.
+
+Usage: python benchmarks/bench_json.py [--rows 100000] [--rounds 5]
+"""
+import argparse
+import json
+import random
+import time
+import tracemalloc
+
+from common import temp_database, load_app
+from loadtest import seed
+from bench_transfer import export
+
+
+def traced(fn):
+    """Peak traced memory of ``fn()`` in MB"""
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / 1024 / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def best(fn, rounds):
+    times = []
+    size = 0
+    for _ in range(rounds):
+        start = time.perf_counter()
+        size = fn()
+        times.append(time.perf_counter() - start)
+    return min(times), size
+
+
+def report(label, rows, seconds, size, peak):
+    print(f"{label:<24} {seconds * 1000:>9.1f} ms {rows / seconds:>12,.0f} rows/s "
+          f"{size / 1024 / 1024:>8.1f} MB {peak:>9.1f} MB peak")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    temp_database()
+    app = load_app()
+    seed(app.db, args.rows, random.Random(1))
+    fields = list(app.tasks.TODO_FIELDS)
+    select = f"SELECT {', '.join(fields)} FROM todos ORDER BY created_at DESC, id DESC"
+    select_json = f"SELECT {app.serialize.json_object_sql(fields)} AS doc FROM todos ORDER BY created_at DESC, id DESC"
+
+    def dicts(conn):
+        return [{f: row[f] for f in fields} for row in conn.execute(select).fetchall()]
+
+    def dicts_json(conn):
+        return len(json.dumps({'success': True, 'todos': dicts(conn)}))
+
+    def dicts_jsonify(conn):
+        with app.app.test_request_context():
+            return len(app.jsonify({'success': True, 'todos': dicts(conn)}).get_data())
+
+    def json_object_join(conn):
+        docs = [row[0] for row in conn.execute(select_json).fetchall()]
+        return len(app.serialize.envelope({'success': True}, 'todos', docs))
+
+    def json_group_array(conn):
+        # json() keeps each object from being re-quoted as a string
+        doc = conn.execute(f'SELECT json_group_array(json(doc)) FROM ({select_json})').fetchone()[0]
+        return len(f'{{"success":true,"todos":{doc}}}')
+
+    print(f"🏁 {args.rows:,} tasks per response, JSON backend: {app.serialize.JSON_BACKEND}\n")
+    with app.db.connection() as conn:
+        for label, fn in (('dicts + json', dicts_json), ('dicts + jsonify', dicts_jsonify),
+                          ('json_object + join', json_object_join), ('json_group_array', json_group_array)):
+            seconds, size = best(lambda: fn(conn), args.rounds)
+            report(label, args.rows, seconds, size, traced(lambda: fn(conn)))
+
+    client = app.app.test_client()
+    columns, encoder = app.transfer.COLUMNS['jsonl'], app.transfer.ENCODERS['jsonl']
+
+    def python_jsonl(rows):
+        return ''.join(json.dumps(dict(zip(fields, row)), ensure_ascii=False, separators=(',', ':')) + '\n'
+                       for row in rows)
+
+    print()
+    for label, column_sql, encode in (('export jsonl (python)', ', '.join(fields), python_jsonl),
+                                      ('export jsonl (sqlite)', columns, encoder)):
+        app.transfer.COLUMNS['jsonl'], app.transfer.ENCODERS['jsonl'] = column_sql, encode
+        seconds, size = best(lambda: export(client, 'jsonl'), args.rounds)
+        report(label, args.rows, seconds, size, traced(lambda: export(client, 'jsonl')))
+    app.transfer.COLUMNS['jsonl'], app.transfer.ENCODERS['jsonl'] = columns, encoder
+
+
+if __name__ == '__main__':
+    main()
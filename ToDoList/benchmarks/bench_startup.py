@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Startup-time benchmark for the app factory
+
+Starts a fresh interpreter per round (so nothing is cached in sys.modules)
+and measures, inside it: importing app.py (which runs create_app(), i.e.
+schema setup and migrations), serving the first GET /api/todos, and creating
+the model client on the first AI use. The lazy rows are what the app does
+now; the eager rows create the model before the first request, as the app
+used to at import time.
+
+The default backend is gemini with a dummy key, so the eager cost includes
+importing and configuring google.generativeai (no network calls are made).
+
+Usage: python benchmarks/bench_startup.py [--rounds N] [--backend gemini|fake]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from common import APP_DIR
+
+CHILD = r'''
+import json, sys, time
+start = time.perf_counter()
+sys.path.insert(0, sys.argv[1])
+eager = sys.argv[2] == 'eager'
+import app
+timings = {'import + create_app': time.perf_counter() - start}
+if eager:
+    app.get_model()
+    timings['model client'] = time.perf_counter() - start - timings['import + create_app']
+client = app.app.test_client()
+before = time.perf_counter()
+assert client.get('/api/todos').status_code == 200
+timings['first CRUD request'] = time.perf_counter() - before
+timings['ready to serve'] = time.perf_counter() - start
+sdk_loaded = 'google.generativeai' in sys.modules
+if not eager:
+    before = time.perf_counter()
+    app.get_model()
+    timings['model client'] = time.perf_counter() - before
+print(json.dumps({'timings': timings, 'sdk_loaded_before_ai': sdk_loaded}))
+'''
+
+
+def run_child(mode, backend, database):
+    env = dict(os.environ, AI_BACKEND=backend, DATABASE_PATH=database,
+               GOOGLE_API_KEY=os.environ.get('GOOGLE_API_KEY') or 'benchmark-dummy-key')
+    result = subprocess.run([sys.executable, '-c', CHILD, APP_DIR, mode], env=env,
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rounds', type=int, default=5, help='fresh interpreters per mode')
+    parser.add_argument('--backend', default='gemini', choices=('gemini', 'fake'))
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix='todo-bench-')
+    print(f"🏁 {args.rounds} cold starts per mode, AI_BACKEND={args.backend} (median ms)")
+    print(f"{'mode':<8} {'import + create_app':>20} {'first CRUD request':>19} "
+          f"{'ready to serve':>15} {'model client':>13} {'SDK loaded':>11}")
+    for mode in ('lazy', 'eager'):
+        runs = []
+        for i in range(args.rounds):
+            # A new database every round so create_app() always migrates from scratch
+            runs.append(run_child(mode, args.backend, os.path.join(directory, f'{mode}-{i}.db')))
+        median = {name: statistics.median(run['timings'][name] * 1000 for run in runs)
+                  for name in runs[0]['timings']}
+        loaded = 'yes' if any(run['sdk_loaded_before_ai'] for run in runs) else 'no'
+        print(f"{mode:<8} {median['import + create_app']:>20.1f} {median['first CRUD request']:>19.1f} "
+              f"{median['ready to serve']:>15.1f} {median['model client']:>13.1f} {loaded:>11}")
+
+
+if __name__ == '__main__':
+    main()
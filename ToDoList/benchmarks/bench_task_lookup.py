@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Task lookup for chat complete/delete commands: FTS5 index vs Python scan,
+plus the any-word lookups that fall back to OR queries (a typo in the
+command, and the task context built for every chat message)
+
+Usage: python benchmarks/bench_task_lookup.py [--tasks N] [--lookups N]
+"""
+import argparse
+import random
+import time
+
+from common import temp_database, load_app
+
+COMMON_WORDS = (
+    'report budget meeting groceries dentist invoice review deploy backup '
+    'garden taxes flight hotel slides draft email call plan design test'
+).split()
+SYLLABLES = 'ka lo mi re su ta ve no pi da ze ro lu fe ga'.split()
+
+
+def vocabulary(rng, size=5000):
+    """Distinct made-up words standing in for project and people names"""
+    words = set()
+    while len(words) < size:
+        words.add(''.join(rng.choice(SYLLABLES) for _ in range(4)))
+    return sorted(words)
+
+
+def seed(db, count, rng):
+    rare = vocabulary(rng)
+    titles = [f'{rng.choice(COMMON_WORDS)} {rng.choice(rare)} {rng.choice(rare)}' for _ in range(count)]
+    rows = [
+        (title, ' '.join(rng.sample(COMMON_WORDS, 4)),
+         rng.choice(['high', 'medium', 'low']), rng.choice(['pending', 'pending', 'completed']))
+        for title in titles
+    ]
+    with db.connection() as conn:
+        conn.executemany(
+            'INSERT INTO todos (title, description, priority, status) VALUES (?, ?, ?, ?)', rows
+        )
+    return titles
+
+
+def legacy_find(conn, task_search):
+    """The previous approach: load every todo and score each in Python"""
+    todos = conn.execute('SELECT * FROM todos').fetchall()
+    matching_task = None
+    best_score = 0
+    for todo in todos:
+        if todo['status'] == 'completed':
+            continue
+        title_lower = todo['title'].lower()
+        desc_lower = (todo['description'] or '').lower()
+        if task_search in title_lower or task_search in desc_lower:
+            score = len(task_search) / max(len(title_lower), 1)
+        elif any(word in title_lower for word in task_search.split()):
+            words_matched = sum(1 for word in task_search.split() if word in title_lower)
+            score = words_matched / len(task_search.split()) * 0.7
+        else:
+            continue
+        if score > best_score:
+            best_score, matching_task = score, todo
+    return matching_task if best_score > 0.3 else None
+
+
+def measure(label, fn, queries):
+    start = time.perf_counter()
+    for query in queries:
+        fn(query)
+    seconds = time.perf_counter() - start
+    print(f"{label:<28} {seconds / len(queries) * 1000:>10.3f} ms/lookup")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tasks', type=int, default=100000)
+    parser.add_argument('--lookups', type=int, default=200)
+    args = parser.parse_args()
+
+    temp_database()
+    app = load_app()
+    rng = random.Random(7)
+    titles = seed(app.db, args.tasks, rng)
+
+    # What users type: a couple of words from an existing task's title
+    queries = []
+    for _ in range(args.lookups):
+        words = rng.choice(titles).split()
+        queries.append(' '.join(rng.sample(words, 2)))
+
+    print(f"🏁 {args.lookups} lookups over {args.tasks:,} tasks\n")
+    with app.db.connection() as conn:
+        measure('FTS5 index (search.py)',
+                lambda q: app.search.find_task(conn, q, pending_only=True, min_score=0.3), queries)
+        legacy_queries = queries[:max(1, args.lookups // 20)]
+        measure('Python scan (legacy)', lambda q: legacy_find(conn, q), legacy_queries)
+
+        # A misspelled word defeats the all-words tiers
+        typos = [f'the {rng.choice(COMMON_WORDS)} for {rng.choice(SYLLABLES)}xq' for _ in range(args.lookups)]
+        measure('FTS5 any-word fallback',
+                lambda q: app.search.find_task(conn, q, pending_only=True, min_score=0.3), typos)
+        messages = [f'what should I do about the {rng.choice(COMMON_WORDS)} for the '
+                    f'{rng.choice(COMMON_WORDS)} today?' for _ in range(args.lookups)]
+        measure('chat context (context.py)',
+                lambda m: app.context.build_task_context(conn, m), messages)
+
+
+if __name__ == '__main__':
+    main()
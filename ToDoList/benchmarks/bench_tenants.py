@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Per-tenant databases: request cost as the number of tenants grows
+
+Runs the app with TENANT_DIR set and creates --tenants tenants of --tasks
+tasks each, plus one tenant with --big tasks. After the first 100 tenants
+and again after all of them, it times a mix of tenant requests (task list,
+stats, upcoming deadlines, search) through Flask's test client:
+
+  hot   - a few tenants that stay in the shard router's LRU of open pools
+  cold  - random tenants, nearly always an LRU miss (pool opened per request)
+  big   - the large tenant, measured the same way as hot
+
+If a tenant's cost depends only on its own data, the hot and cold rows stay
+flat from 100 to --tenants tenants.
+
+Usage: python benchmarks/bench_tenants.py [--tenants 10000] [--tasks 20] [--big 200000]
+                                          [--requests 400] [--cache-size 64]
+"""
+import argparse
+import os
+import random
+import time
+
+from common import temp_database, load_app
+from loadtest import seed
+
+HOT_TENANTS = 16
+ROUTES = (
+    '/api/todos?limit=50',
+    '/api/stats',
+    '/api/todos/due?within=7',
+    '/api/search?q=report',
+)
+
+
+def tenant_name(i):
+    return f'tenant-{i:05d}'
+
+
+def seed_tenants(app, start, stop, tasks, rng):
+    for i in range(start, stop):
+        with app.db.tenant(tenant_name(i)):
+            with app.db.connection() as conn:
+                conn.executemany(
+                    'INSERT INTO todos (title, description, priority, status, due_date) VALUES (?, ?, ?, ?, ?)',
+                    [(f'report {i} item {n}', 'weekly review', rng.choice(('high', 'medium', 'low')),
+                      rng.choice(('pending', 'completed')), f'2030-01-{rng.randrange(1, 29):02d}')
+                     for n in range(tasks)]
+                )
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def drive(client, tenants, requests, rng):
+    latencies = []
+    for n in range(requests):
+        headers = {'X-Tenant-ID': rng.choice(tenants)}
+        start = time.perf_counter()
+        response = client.get(ROUTES[n % len(ROUTES)], headers=headers)
+        latencies.append((time.perf_counter() - start) * 1000)
+        assert response.status_code == 200, response.get_data(as_text=True)
+    return latencies
+
+
+def report(label, tenant_count, latencies):
+    print(f"{label:<6} {tenant_count:>9,} {percentile(latencies, 50):>9.2f} {percentile(latencies, 95):>9.2f} "
+          f"{percentile(latencies, 99):>9.2f}")
+
+
+def measure(client, tenant_count, args, rng):
+    hot = [tenant_name(i) for i in range(HOT_TENANTS)]
+    cold = [tenant_name(i) for i in range(HOT_TENANTS, tenant_count)]
+    drive(client, hot, len(ROUTES) * HOT_TENANTS, rng)
+    report('hot', tenant_count, drive(client, hot, args.requests, rng))
+    report('cold', tenant_count, drive(client, cold, args.requests, rng))
+    drive(client, ['big'], len(ROUTES), rng)
+    report('big', tenant_count, drive(client, ['big'], args.requests, rng))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tenants', type=int, default=10000)
+    parser.add_argument('--tasks', type=int, default=20, help='tasks per tenant')
+    parser.add_argument('--big', type=int, default=200000, help='tasks of the one large tenant')
+    parser.add_argument('--requests', type=int, default=400, help='requests per measurement')
+    parser.add_argument('--cache-size', type=int, default=64, help='SHARD_CACHE_SIZE')
+    args = parser.parse_args()
+
+    path = temp_database()
+    os.environ['TENANT_DIR'] = os.path.join(os.path.dirname(path), 'tenants')
+    os.environ['SHARD_CACHE_SIZE'] = str(args.cache_size)
+    os.environ.setdefault('INSIGHTS_REFRESH_INTERVAL', '0')
+    app = load_app()
+    client = app.app.test_client()
+    rng = random.Random(11)
+
+    with app.db.tenant('big'):
+        seed(app.db, args.big, random.Random(1))
+
+    print(f"🏁 {args.requests} requests per row, routes: {', '.join(ROUTES)}")
+    print(f"   {args.tasks} tasks per tenant, big tenant {args.big:,} tasks, "
+          f"LRU of {args.cache_size} open tenant pools (ms)\n")
+    print(f"{'tenant':<6} {'tenants':>9} {'p50':>9} {'p95':>9} {'p99':>9}")
+
+    first = min(100, args.tenants)
+    seed_tenants(app, 0, first, args.tasks, rng)
+    measure(client, first, args, rng)
+
+    start = time.perf_counter()
+    seed_tenants(app, first, args.tenants, args.tasks, rng)
+    seconds = time.perf_counter() - start
+    measure(client, args.tenants, args, rng)
+
+    created = args.tenants - first
+    if created:
+        print(f"\n📦 Created {created:,} more tenants in {seconds:.1f}s "
+              f"({seconds / created * 1000:.2f} ms each, schema copied from the template)")
+    print(f"Shard router: {app.db.router.stats()}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Throughput and memory of the streaming export/import endpoints
+
+Seeds --rows tasks, streams GET /api/todos/export as JSON lines and CSV
+through Flask's test client, then streams the JSONL file back into an empty
+database with POST /api/todos/import. Each step is timed once, then repeated
+under tracemalloc to record peak Python memory. For comparison, the
+"in-memory" row builds the whole export with fetchall() and one json.dumps(),
+as a non-streaming endpoint would.
+
+Usage: python benchmarks/bench_transfer.py [--rows 1000000]
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from common import temp_database, load_app
+from loadtest import seed
+
+
+def traced(fn):
+    """Peak traced memory of ``fn()`` in MB"""
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / 1024 / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def export(client, fmt, path=None):
+    response = client.get(f'/api/todos/export?format={fmt}', buffered=False)
+    size = 0
+    out = open(path, 'wb') if path else None
+    try:
+        for chunk in response.response:
+            chunk = chunk.encode() if isinstance(chunk, str) else chunk
+            size += len(chunk)
+            if out:
+                out.write(chunk)
+    finally:
+        response.close()
+        if out:
+            out.close()
+    return size
+
+
+def export_in_memory(db):
+    with db.connection() as conn:
+        rows = conn.execute('SELECT * FROM todos ORDER BY id').fetchall()
+        return len(json.dumps([dict(row) for row in rows]))
+
+
+def import_file(client, path):
+    with open(path, 'rb') as f:
+        response = client.post('/api/todos/import', input_stream=f, content_type='application/x-ndjson',
+                               headers={'Content-Length': str(os.path.getsize(path))})
+    return response.get_json()
+
+
+def use_database(app, path):
+    app.db.pool.close_all()
+    app.db.pool = app.db.ConnectionPool(path)
+    app.init_db()
+
+
+def report(label, rows, seconds, size, peak):
+    print(f"{label:<18} {rows:>10,} rows {seconds:>8.2f} s {rows / seconds:>12,.0f} rows/s "
+          f"{size / 1024 / 1024 / seconds:>8.1f} MB/s {peak:>10.1f} MB peak")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1000000, help='tasks to seed')
+    args = parser.parse_args()
+
+    temp_database()
+    app = load_app()
+    client = app.app.test_client()
+    directory = tempfile.mkdtemp(prefix='todo-bench-')
+    jsonl_path = os.path.join(directory, 'export.jsonl')
+
+    start = time.perf_counter()
+    seed(app.db, args.rows, random.Random(1))
+    print(f"📦 Seeded {args.rows:,} tasks in {time.perf_counter() - start:.1f}s\n")
+
+    for fmt, path in (('jsonl', jsonl_path), ('csv', None)):
+        start = time.perf_counter()
+        size = export(client, fmt, path)
+        seconds = time.perf_counter() - start
+        report(f'export {fmt}', args.rows, seconds, size, traced(lambda: export(client, fmt)))
+
+    start = time.perf_counter()
+    size = export_in_memory(app.db)
+    seconds = time.perf_counter() - start
+    report('in-memory json', args.rows, seconds, size, traced(lambda: export_in_memory(app.db)))
+
+    size = os.path.getsize(jsonl_path)
+    use_database(app, os.path.join(directory, 'import.db'))
+    start = time.perf_counter()
+    result = import_file(client, jsonl_path)
+    seconds = time.perf_counter() - start
+    assert result['imported'] == args.rows, result
+    use_database(app, os.path.join(directory, 'import-traced.db'))
+    report('import jsonl', args.rows, seconds, size, traced(lambda: import_file(client, jsonl_path)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,38 @@
+"""
+Shared helpers for the benchmark scripts
+"""
+import os
+import sys
+import tempfile
+import time
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def temp_database(name='bench.db'):
+    """Point the app at a fresh database file; must run before importing it"""
+    path = os.path.join(tempfile.mkdtemp(prefix='todo-bench-'), name)
+    os.environ['DATABASE_PATH'] = path
+    return path
+
+
+def load_app():
+    """Import app.py from the project directory and create its schema"""
+    if APP_DIR not in sys.path:
+        sys.path.insert(0, APP_DIR)
+    # Benchmarks never call the real model; AI routes hit the local fake
+    os.environ.setdefault('AI_BACKEND', 'fake')
+    import app
+    app.init_db()
+    return app
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def report(label, count, seconds):
+    rate = count / seconds if seconds else float('inf')
+    print(f"{label:<40} {count:>8} ops {seconds * 1000:>10.1f} ms {rate:>12,.0f} ops/s")
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+End-to-end load test of every route against seeded databases
+
+Seeds databases of each --sizes task count, then drives the dashboard, todo
+CRUD, chat commands, the chat LLM path (plain and streamed), suggestions,
+insights and search through Flask's test client from --concurrency threads.
+The model is the local fake backend (AI_BACKEND=fake) with --model-latency
+seconds per call.
+Reports p50/p99 latency and throughput per route.
+
+Save a run with --save and compare later runs with --baseline: the script
+exits with status 1 when a route's p99 exceeds the baseline by more than
+--tolerance (ratio) plus --slack-ms.
+
+Usage: python benchmarks/loadtest.py [--sizes 1000,100000,1000000] [--requests N]
+                                     [--concurrency N] [--save FILE] [--baseline FILE]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+from common import temp_database, load_app, timed
+from bench_task_lookup import COMMON_WORDS, vocabulary
+
+SEED_CHUNK = 50000
+
+
+def seed(db, count, rng):
+    """Insert ``count`` tasks spread over the past year; returns some titles"""
+    rare = vocabulary(rng)
+    now = datetime.utcnow()
+    titles = []
+    with db.connection() as conn:
+        for start in range(0, count, SEED_CHUNK):
+            rows = []
+            for _ in range(min(SEED_CHUNK, count - start)):
+                title = f'{rng.choice(COMMON_WORDS)} {rng.choice(rare)} {rng.choice(rare)}'
+                created = now - timedelta(minutes=rng.randrange(365 * 24 * 60))
+                completed = rng.random() < 0.4
+                completed_at = created + timedelta(minutes=rng.randrange(1, 14 * 24 * 60)) if completed else None
+                due = (created + timedelta(days=rng.randrange(1, 30))).date().isoformat() if rng.random() < 0.5 else None
+                rows.append((
+                    title, ' '.join(rng.sample(COMMON_WORDS, 4)),
+                    rng.choice(('high', 'medium', 'low')),
+                    'completed' if completed else 'pending',
+                    created.strftime('%Y-%m-%d %H:%M:%S'),
+                    completed_at.strftime('%Y-%m-%d %H:%M:%S') if completed_at else None,
+                    due,
+                ))
+                if len(titles) < 1000:
+                    titles.append(title)
+            conn.executemany('''
+                INSERT INTO todos (title, description, priority, status, created_at, completed_at, due_date)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', rows)
+            conn.commit()
+    return titles
+
+
+def build_routes(count, titles):
+    """(name, request function) pairs; each function gets (client, i, rng)"""
+    def create(client, i, rng):
+        return client.post('/api/todos', json={'title': f'load test task {i}', 'priority': 'low'})
+
+    def update(client, i, rng):
+        todo_id = rng.randrange(1, count + 1)
+        return client.put(f'/api/todos/{todo_id}', json={
+            'title': f'updated task {todo_id}', 'priority': 'high', 'status': 'completed'
+        })
+
+    def delete(client, i, rng):
+        return client.delete(f'/api/todos/{count - i}')
+
+    return [
+        ('GET /', lambda client, i, rng: client.get('/')),
+        ('GET /api/todos', lambda client, i, rng: client.get('/api/todos')),
+        ('GET /api/todos?status=pending', lambda client, i, rng: client.get('/api/todos?status=pending&limit=20')),
+        ('GET /api/stats', lambda client, i, rng: client.get('/api/stats')),
+        ('POST /api/todos', create),
+        ('PUT /api/todos/<id>', update),
+        ('DELETE /api/todos/<id>', delete),
+        ('chat: create command', lambda client, i, rng: client.post(
+            '/api/chat', json={'message': f'add task water the plants {i} tomorrow'})),
+        ('chat: complete command', lambda client, i, rng: client.post(
+            '/api/chat', json={'message': f'mark {rng.choice(titles)} as done'})),
+        ('chat: LLM', lambda client, i, rng: client.post(
+            '/api/chat', json={'message': f'how should I plan my week around {rng.choice(titles)}?'})),
+        ('chat: LLM stream', lambda client, i, rng: client.post(
+            '/api/chat/stream', json={'message': f'what should I focus on next, {i}?'})),
+        ('POST /api/ai-suggestions', lambda client, i, rng: client.post(
+            '/api/ai-suggestions', json={'input': f'prepare for event number {i}'})),
+        ('GET /api/productivity-insights', lambda client, i, rng: client.get('/api/productivity-insights')),
+        ('GET /api/search', lambda client, i, rng: client.get(
+            '/api/search', query_string={'q': ' '.join(word[:4] for word in rng.choice(titles).split()[:2])})),
+    ]
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def drive(app, fn, requests, concurrency, seed_value):
+    """Run ``requests`` calls of ``fn`` split over ``concurrency`` threads"""
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    def worker(offset):
+        client = app.test_client()
+        rng = random.Random(seed_value + offset)
+        mine = []
+        failed = 0
+        for i in range(offset, requests, concurrency):
+            start = time.perf_counter()
+            response = fn(client, i, rng)
+            response.get_data()
+            mine.append((time.perf_counter() - start) * 1000)
+            if response.status_code >= 400:
+                failed += 1
+        with lock:
+            latencies.extend(mine)
+            errors.append(failed)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    return {
+        'requests': len(latencies),
+        'errors': sum(errors),
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p99_ms': round(percentile(latencies, 99), 2),
+        'rps': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+    }
+
+
+def run_size(app, count, args):
+    path = os.path.join(tempfile.mkdtemp(prefix='todo-loadtest-'), f'tasks-{count}.db')
+    app.db.pool.close_all()
+    app.db.pool = app.db.ConnectionPool(path)
+    app.init_db()
+    app.response_cache.clear()
+
+    seconds, titles = timed(seed, app.db, count, random.Random(count))
+    print(f"\n📦 {count:,} tasks (seeded in {seconds:.1f}s)")
+    print(f"{'route':<34} {'requests':>8} {'errors':>6} {'p50 ms':>9} {'p99 ms':>9} {'req/s':>9}")
+
+    results = {}
+    for name, fn in build_routes(count, titles):
+        result = drive(app.app, fn, args.requests, args.concurrency, count)
+        results[name] = result
+        print(f"{name:<34} {result['requests']:>8} {result['errors']:>6} "
+              f"{result['p50_ms']:>9.2f} {result['p99_ms']:>9.2f} {result['rps']:>9.1f}")
+    return results
+
+
+def compare(results, baseline, tolerance, slack_ms):
+    regressions = []
+    for size, routes in results.items():
+        for name, result in routes.items():
+            before = baseline.get(size, {}).get(name)
+            if before and result['p99_ms'] > before['p99_ms'] * tolerance + slack_ms:
+                regressions.append(f"{size} tasks, {name}: p99 {before['p99_ms']} -> {result['p99_ms']} ms")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='1000,100000,1000000', help='comma-separated task counts')
+    parser.add_argument('--requests', type=int, default=200, help='requests per route')
+    parser.add_argument('--concurrency', type=int, default=4, help='client threads')
+    parser.add_argument('--model-latency', type=float, default=0.05, help='seconds per fake model call')
+    parser.add_argument('--save', help='write results as JSON')
+    parser.add_argument('--baseline', help='JSON results of an earlier run to compare against')
+    parser.add_argument('--tolerance', type=float, default=1.5, help='allowed p99 ratio over the baseline')
+    parser.add_argument('--slack-ms', type=float, default=2.0, help='absolute p99 slack over the baseline')
+    args = parser.parse_args()
+
+    os.environ['AI_BACKEND'] = 'fake'
+    os.environ['FAKE_MODEL_LATENCY'] = str(args.model_latency)
+    # Keep the background insights refresher out of the measurements
+    os.environ.setdefault('INSIGHTS_REFRESH_INTERVAL', '0')
+    temp_database()
+    app = load_app()
+
+    sizes = [int(size) for size in args.sizes.split(',') if size.strip()]
+    print(f"🏁 {args.requests} requests per route, {args.concurrency} threads, "
+          f"fake model {args.model_latency}s")
+    results = {str(count): run_size(app, count, args) for count in sizes}
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Results saved to {args.save}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance, args.slack_ms)
+        if regressions:
+            print('\n❌ Regressions against the baseline:')
+            for line in regressions:
+                print(f'  {line}')
+            sys.exit(1)
+        print('\n✅ No regressions against the baseline')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,280 @@
+"""
+Chat history: paged reads, conversation memory for prompts, compaction and
+retention.
+
+Every exchange is kept in ``chat_messages``. Prompts get a bounded window:
+the latest rolling summary plus the newest unsummarized turns that fit in
+CHAT_HISTORY_TOKENS. A background compactor folds older turns into the
+rolling summary in batches of CHAT_SUMMARY_BATCH, and moves summarized
+messages older than CHAT_RETENTION_DAYS to gzipped JSON-lines files in
+CHAT_ARCHIVE_DIR before deleting them.
+"""
+import gzip
+import json
+import os
+import threading
+
+import context
+import db
+import workers
+
+CHAT_HISTORY_TOKENS = int(os.getenv('CHAT_HISTORY_TOKENS', '600'))
+CHAT_HISTORY_TURNS = int(os.getenv('CHAT_HISTORY_TURNS', '6'))
+CHAT_SUMMARY_BATCH = int(os.getenv('CHAT_SUMMARY_BATCH', '10'))
+CHAT_RETENTION_DAYS = float(os.getenv('CHAT_RETENTION_DAYS', '90'))
+CHAT_ARCHIVE_DIR = os.getenv('CHAT_ARCHIVE_DIR', 'chat_archive')
+CHAT_COMPACT_INTERVAL = float(os.getenv('CHAT_COMPACT_INTERVAL', '300'))
+
+TURN_CHARS = 400
+SUMMARY_CHARS = 1200
+ARCHIVE_BATCH = 5000
+PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+MESSAGE_COLUMNS = 'id, user_message, ai_response, created_at'
+
+
+def save(conn, user_message, ai_response):
+    cursor = conn.execute('''
+        INSERT INTO chat_messages (user_message, ai_response)
+        VALUES (?, ?)
+    ''', (user_message, ai_response))
+    return cursor.lastrowid
+
+
+def message_dict(row):
+    return {
+        'id': row['id'],
+        'user_message': row['user_message'],
+        'ai_response': row['ai_response'],
+        'created_at': row['created_at'],
+    }
+
+
+def page(conn, before=None, limit=PAGE_SIZE):
+    """Newest-first page of messages older than id ``before``.
+
+    Keyset pagination on the primary key: each page is an index range scan
+    however deep the client has scrolled. Returns ``(messages, next_before)``;
+    ``next_before`` is ``None`` on the last page.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    if before is None:
+        rows = conn.execute(f'''
+            SELECT {MESSAGE_COLUMNS} FROM chat_messages
+            ORDER BY id DESC LIMIT ?
+        ''', (limit + 1,)).fetchall()
+    else:
+        rows = conn.execute(f'''
+            SELECT {MESSAGE_COLUMNS} FROM chat_messages
+            WHERE id < ?
+            ORDER BY id DESC LIMIT ?
+        ''', (before, limit + 1)).fetchall()
+    messages = [message_dict(row) for row in rows[:limit]]
+    next_before = messages[-1]['id'] if len(rows) > limit else None
+    return messages, next_before
+
+
+def latest_summary(conn):
+    """The current rolling summary, or ``None`` before the first compaction"""
+    row = conn.execute('''
+        SELECT id, first_message_id, last_message_id, message_count, summary, source, created_at
+        FROM chat_summaries ORDER BY id DESC LIMIT 1
+    ''').fetchone()
+    return dict(row) if row else None
+
+
+def summarized_through(summary):
+    return summary['last_message_id'] if summary else 0
+
+
+def clip(text, limit):
+    text = ' '.join((text or '').split())
+    return text if len(text) <= limit else text[:limit - 3] + '...'
+
+
+def format_turn(row):
+    return f"User: {clip(row['user_message'], TURN_CHARS)}\nAssistant: {clip(row['ai_response'], TURN_CHARS)}"
+
+
+def build_history_context(conn, budget=CHAT_HISTORY_TOKENS):
+    """Conversation memory for a chat prompt within ``budget`` tokens.
+
+    The rolling summary comes first, then the newest turns it does not
+    cover, oldest to newest. Returns an empty string with no history.
+    """
+    summary = latest_summary(conn)
+    parts = []
+    remaining = budget
+    if summary:
+        text = f"Summary of the earlier conversation: {summary['summary']}"
+        remaining -= context.estimate_tokens(text)
+        parts.append(text)
+
+    turns = []
+    rows = conn.execute('''
+        SELECT id, user_message, ai_response FROM chat_messages
+        WHERE id > ?
+        ORDER BY id DESC LIMIT ?
+    ''', (summarized_through(summary), CHAT_HISTORY_TURNS + CHAT_SUMMARY_BATCH)).fetchall()
+    for row in rows:
+        turn = format_turn(row)
+        cost = context.estimate_tokens(turn)
+        if cost > remaining:
+            break
+        turns.append(turn)
+        remaining -= cost
+    parts.extend(reversed(turns))
+    return '\n\n'.join(parts)
+
+
+def build_summary_prompt(previous, rows):
+    conversation = '\n\n'.join(format_turn(row) for row in rows)
+    earlier = f"Summary so far: {previous['summary']}\n\n" if previous else ''
+    return f"""Summarize this conversation between a user and the assistant of their to-do list app.
+
+{earlier}New messages:
+{conversation}
+
+Write one paragraph of at most {SUMMARY_CHARS // 6} words that updates the summary so far with the new messages.
+Keep the user's goals, preferences, decisions and any tasks they mentioned; drop small talk."""
+
+
+def describe_turns(previous, rows):
+    """Model-free summary: the user's messages, clipped"""
+    asked = '; '.join(clip(row['user_message'], 80) for row in rows)
+    text = f"{previous['summary']} Later the user said: {asked}" if previous else f"The user said: {asked}"
+    return clip(text, SUMMARY_CHARS)
+
+
+def archive_path(directory, rows):
+    return os.path.join(directory, f"chat-{rows[0]['id']:09d}-{rows[-1]['id']:09d}.jsonl.gz")
+
+
+def write_archive(directory, rows):
+    """Write ``rows`` as gzipped JSON lines; the file appears atomically"""
+    os.makedirs(directory, exist_ok=True)
+    path = archive_path(directory, rows)
+    partial = path + '.partial'
+    with gzip.open(partial, 'wt', encoding='utf-8') as f:
+        for row in rows:
+            f.write(json.dumps(message_dict(row), ensure_ascii=False) + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(partial, path)
+    return path
+
+
+def read_archive(path):
+    """Messages from an archive file written by ``write_archive``"""
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+class ChatCompactor(workers.BackgroundWorker):
+    """Background thread that summarizes and expires chat history.
+
+    ``generate(prompt)`` returns the model's text and may raise; on failure
+    the turns are summarized without the model (source ``extract``) so
+    compaction never stalls. An ``interval`` of 0 only runs when woken. With
+    per-tenant databases, a pass compacts the tenants that woke it (timed
+    passes cover the shared database) and archives under a directory per
+    tenant.
+    """
+
+    thread_name = 'chat-compactor'
+    error_label = 'Chat Compaction Error'
+
+    def __init__(self, generate, interval=CHAT_COMPACT_INTERVAL, batch=CHAT_SUMMARY_BATCH,
+                 keep_turns=CHAT_HISTORY_TURNS, retention_days=CHAT_RETENTION_DAYS,
+                 archive_dir=CHAT_ARCHIVE_DIR):
+        super().__init__(interval)
+        self.generate = generate
+        self.batch = max(1, batch)
+        self.keep_turns = keep_turns
+        self.retention_days = retention_days
+        self.archive_dir = archive_dir
+        self._run_lock = threading.Lock()
+        self._stats.update(runs=0, summaries=0, model_errors=0, archived=0, deleted=0)
+
+    def run_once(self):
+        """One compaction and retention pass; safe to call directly"""
+        with self._run_lock:
+            self._stats['runs'] += 1
+            while self.compact_batch():
+                pass
+            if self.retention_days > 0:
+                self.expire()
+
+    def compact_batch(self):
+        """Fold the oldest ``batch`` unsummarized turns into the rolling
+        summary, keeping the newest ``keep_turns`` verbatim. Returns True if
+        a batch was compacted."""
+        with db.connection() as conn:
+            previous = latest_summary(conn)
+            through = summarized_through(previous)
+            pending = conn.execute(
+                'SELECT COUNT(*) FROM chat_messages WHERE id > ?', (through,)
+            ).fetchone()[0]
+            if pending - self.keep_turns < self.batch:
+                return False
+            rows = conn.execute(f'''
+                SELECT {MESSAGE_COLUMNS} FROM chat_messages
+                WHERE id > ?
+                ORDER BY id LIMIT ?
+            ''', (through, self.batch)).fetchall()
+
+        # No connection is held during the (slow) model call
+        text = None
+        source = 'model'
+        try:
+            text = self.generate(build_summary_prompt(previous, rows))
+        except Exception as e:
+            self._stats['model_errors'] += 1
+            print(f"Chat Summary Error: {str(e)}")
+        if not text:
+            text = describe_turns(previous, rows)
+            source = 'extract'
+
+        first_id = previous['first_message_id'] if previous else rows[0]['id']
+        count = (previous['message_count'] if previous else 0) + len(rows)
+        with db.connection() as conn:
+            # Only store if no other process summarized these turns meanwhile
+            cursor = conn.execute('''
+                INSERT INTO chat_summaries (first_message_id, last_message_id, message_count, summary, source)
+                SELECT ?, ?, ?, ?, ?
+                WHERE COALESCE((SELECT MAX(last_message_id) FROM chat_summaries), 0) = ?
+            ''', (first_id, rows[-1]['id'], count, clip(text, SUMMARY_CHARS), source, through))
+            if cursor.rowcount:
+                self._stats['summaries'] += 1
+        return True
+
+    def expire(self):
+        """Archive, then delete, summarized messages past the retention
+        window; superseded summaries past it are deleted too"""
+        cutoff = f'-{self.retention_days} days'
+        archive_dir = self.archive_dir
+        if archive_dir and db.current_tenant():
+            archive_dir = os.path.join(archive_dir, db.current_tenant())
+        while True:
+            with db.connection() as conn:
+                through = summarized_through(latest_summary(conn))
+                rows = conn.execute(f'''
+                    SELECT {MESSAGE_COLUMNS} FROM chat_messages
+                    WHERE created_at < datetime('now', ?) AND id <= ?
+                    ORDER BY created_at, id LIMIT ?
+                ''', (cutoff, through, ARCHIVE_BATCH)).fetchall()
+                if not rows:
+                    break
+                if archive_dir:
+                    write_archive(archive_dir, sorted(rows, key=lambda row: row['id']))
+                    self._stats['archived'] += len(rows)
+                conn.executemany('DELETE FROM chat_messages WHERE id = ?', [(row['id'],) for row in rows])
+                self._stats['deleted'] += len(rows)
+
+        with db.connection() as conn:
+            conn.execute('''
+                DELETE FROM chat_summaries
+                WHERE created_at < datetime('now', ?)
+                  AND id < (SELECT MAX(id) FROM chat_summaries)
+            ''', (cutoff,))
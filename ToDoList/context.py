@@ -0,0 +1,109 @@
+"""
+Token-budgeted task context for chat prompts.
+
+Instead of serializing every task into the prompt, pick the tasks most
+likely to matter for the message (title matches, high priority, due soon,
+recently added), emit them as compact JSON lines until the budget is used,
+and summarize everything else as counts.
+"""
+import os
+from datetime import date, timedelta
+
+import search
+import serialize
+import tasks
+
+CHAT_CONTEXT_TOKENS = int(os.getenv('CHAT_CONTEXT_TOKENS', '1500'))
+# Rough size of a token for English text and JSON
+CHARS_PER_TOKEN = 4
+DUE_SOON_DAYS = 7
+SECTION_LIMIT = 20
+DESCRIPTION_CHARS = 120
+
+CONTEXT_COLUMNS = 'id, title, description, priority, status, due_date, created_at'
+
+
+def estimate_tokens(text):
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def candidate_tasks(conn, message, today=None):
+    """Relevant tasks in priority order, without duplicates"""
+    today = today or date.today()
+    due_by = (today + timedelta(days=DUE_SOON_DAYS)).isoformat()
+
+    sections = [
+        search.search_tasks(conn, message, limit=SECTION_LIMIT),
+        conn.execute(f'''
+            SELECT {CONTEXT_COLUMNS} FROM todos
+            WHERE status = 'pending' AND due_date IS NOT NULL AND due_date <= ?
+            ORDER BY due_date
+            LIMIT ?
+        ''', (due_by, SECTION_LIMIT)).fetchall(),
+        conn.execute(f'''
+            SELECT {CONTEXT_COLUMNS} FROM todos
+            WHERE status = 'pending' AND priority = 'high'
+            ORDER BY created_at DESC
+            LIMIT ?
+        ''', (SECTION_LIMIT,)).fetchall(),
+        conn.execute(f'''
+            SELECT {CONTEXT_COLUMNS} FROM todos
+            WHERE status = 'pending'
+            ORDER BY created_at DESC
+            LIMIT ?
+        ''', (SECTION_LIMIT,)).fetchall(),
+        tasks.recent_todos(conn, SECTION_LIMIT),
+    ]
+
+    seen = set()
+    for rows in sections:
+        for row in rows:
+            if row['id'] not in seen:
+                seen.add(row['id'])
+                yield row
+
+
+def compact_task(row):
+    task = {
+        'title': row['title'],
+        'priority': row['priority'],
+        'status': row['status'],
+    }
+    if row['description']:
+        task['description'] = row['description'][:DESCRIPTION_CHARS]
+    if row['due_date']:
+        task['due'] = row['due_date']
+    task['created'] = row['created_at']
+    return serialize.dumps(task)
+
+
+def build_task_context(conn, message, budget=CHAT_CONTEXT_TOKENS, today=None):
+    """Prompt text describing the user's tasks within ``budget`` tokens.
+
+    Returns ``(context, stats)``; ``context`` is empty when there are no
+    tasks at all.
+    """
+    stats = tasks.get_stats(conn)
+    if not stats['total_tasks']:
+        return '', stats
+
+    summary = (
+        f"Totals: {stats['total_tasks']} tasks, {stats['completed_tasks']} completed, "
+        f"{stats['pending_tasks']} pending; priorities: {stats['high_priority']} high, "
+        f"{stats['medium_priority']} medium, {stats['low_priority']} low."
+    )
+    remaining = budget - estimate_tokens(summary) - 20
+
+    lines = []
+    for row in candidate_tasks(conn, message, today):
+        line = compact_task(row)
+        cost = estimate_tokens(line)
+        if cost > remaining:
+            break
+        lines.append(line)
+        remaining -= cost
+
+    omitted = stats['total_tasks'] - len(lines)
+    if omitted > 0:
+        summary += f' {omitted} other tasks are not listed.'
+    return '\n'.join(lines + [summary]), stats
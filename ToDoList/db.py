@@ -0,0 +1,650 @@
+"""
+SQLite data-access layer: pooled, WAL-mode connections shared by every route
+
+With TENANT_DIR set, each tenant's tasks and chat history live in their own
+SQLite file. ``connection()`` routes to the pool of the tenant bound to the
+current context (see ``tenant()``), so a tenant's queries only ever touch
+that tenant's data.
+"""
+import contextvars
+import hashlib
+import os
+import re
+import shutil
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import metrics
+
+DATABASE_PATH = os.getenv('DATABASE_PATH', 'todos.db')
+
+# Pool sizing and pragma tuning (overridable through the environment)
+POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '8'))
+POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '10'))
+BUSY_TIMEOUT_MS = int(os.getenv('DB_BUSY_TIMEOUT_MS', '5000'))
+CACHE_SIZE_KB = int(os.getenv('DB_CACHE_SIZE_KB', '16384'))
+MMAP_SIZE = int(os.getenv('DB_MMAP_SIZE', str(128 * 1024 * 1024)))
+STATEMENT_CACHE_SIZE = int(os.getenv('DB_STATEMENT_CACHE_SIZE', '256'))
+# Record per-statement timings and row counts for /metrics (off by default:
+# it wraps every statement)
+TRACE_QUERIES = os.getenv('DB_TRACE_QUERIES', '0') == '1'
+
+# Per-tenant databases (empty = one shared database at DATABASE_PATH)
+TENANT_DIR = os.getenv('TENANT_DIR', '')
+# Tenant pools kept open; each holds up to SHARD_POOL_SIZE connections
+SHARD_CACHE_SIZE = int(os.getenv('SHARD_CACHE_SIZE', '64'))
+SHARD_POOL_SIZE = int(os.getenv('SHARD_POOL_SIZE', '2'))
+TENANT_ID_RE = re.compile(r'[A-Za-z0-9_-]{1,64}')
+
+PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    f'PRAGMA cache_size=-{CACHE_SIZE_KB}',
+    f'PRAGMA mmap_size={MMAP_SIZE}',
+    f'PRAGMA busy_timeout={BUSY_TIMEOUT_MS}',
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA foreign_keys=ON',
+)
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection becomes free within the pool timeout"""
+
+
+class ConnectionPool:
+    """Thread-safe pool of SQLite connections with per-thread reuse.
+
+    Each thread prefers the connection it used last, so its prepared
+    statement cache stays warm. Acquiring is reentrant: nested
+    ``connection()`` blocks on the same thread share one connection and
+    only the outermost block commits or rolls back.
+    """
+
+    def __init__(self, path, size=POOL_SIZE, timeout=POOL_TIMEOUT):
+        self.path = path
+        self.size = size
+        self.timeout = timeout
+        self._idle = []
+        self._open = 0
+        self.closed = False
+        self._cond = threading.Condition()
+        self._local = threading.local()
+        self._stats = {
+            'hits': 0,
+            'thread_hits': 0,
+            'misses': 0,
+            'waits': 0,
+            'wait_time': 0.0,
+            'timeouts': 0,
+        }
+
+    def _connect(self):
+        conn = sqlite3.connect(
+            self.path,
+            timeout=BUSY_TIMEOUT_MS / 1000,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE,
+            factory=metrics.TracedConnection if TRACE_QUERIES else sqlite3.Connection,
+        )
+        conn.row_factory = sqlite3.Row
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def _acquire(self):
+        preferred = getattr(self._local, 'preferred', None)
+        waited = None
+        with self._cond:
+            while True:
+                if preferred is not None and preferred in self._idle:
+                    self._idle.remove(preferred)
+                    self._stats['hits'] += 1
+                    self._stats['thread_hits'] += 1
+                    conn = preferred
+                    break
+                if self._idle:
+                    conn = self._idle.pop()
+                    self._stats['hits'] += 1
+                    break
+                if self._open < self.size:
+                    self._open += 1
+                    self._stats['misses'] += 1
+                    conn = None
+                    break
+
+                if waited is None:
+                    waited = time.perf_counter()
+                    self._stats['waits'] += 1
+                remaining = self.timeout - (time.perf_counter() - waited)
+                if remaining <= 0 or not self._cond.wait(remaining):
+                    self._stats['timeouts'] += 1
+                    self._stats['wait_time'] += time.perf_counter() - waited
+                    raise PoolTimeout(f'No database connection available after {self.timeout}s')
+
+            if waited is not None:
+                self._stats['wait_time'] += time.perf_counter() - waited
+
+        if conn is None:
+            try:
+                conn = self._connect()
+            except Exception:
+                with self._cond:
+                    self._open -= 1
+                    self._cond.notify()
+                raise
+
+        self._local.preferred = conn
+        return conn
+
+    def _release(self, conn):
+        with self._cond:
+            if self.closed:
+                self._open -= 1
+                conn.close()
+            else:
+                self._idle.append(conn)
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """Check out a connection; commit on success, roll back on error"""
+        held = getattr(self._local, 'held', None)
+        if held is not None:
+            self._local.depth += 1
+            try:
+                yield held
+            finally:
+                self._local.depth -= 1
+            return
+
+        conn = self._acquire()
+        self._local.held = conn
+        self._local.depth = 1
+        try:
+            yield conn
+            if conn.in_transaction:
+                conn.commit()
+        except BaseException:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+        finally:
+            self._local.held = None
+            self._local.depth = 0
+            self._release(conn)
+
+    @contextmanager
+    def dedicated(self):
+        """A connection outside the pool for long-running work (exports):
+        configured like pooled ones, closed afterwards, and never holding
+        one of the ``size`` slots"""
+        conn = self._connect()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def stats(self):
+        with self._cond:
+            stats = dict(self._stats)
+            stats['open'] = self._open
+            stats['idle'] = len(self._idle)
+            stats['size'] = self.size
+        requests = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / requests, 4) if requests else 0.0
+        return stats
+
+    def close_all(self):
+        with self._cond:
+            for conn in self._idle:
+                conn.close()
+            self._open -= len(self._idle)
+            self._idle.clear()
+
+    def close(self):
+        """Close idle connections now and checked-out ones when returned"""
+        with self._cond:
+            self.closed = True
+        self.close_all()
+
+
+class ShardRouter:
+    """Maps tenant ids to their database files, with an LRU of open pools.
+
+    Files are spread over 256 subdirectories by a hash of the tenant id. A
+    new tenant's file is a copy of a migrated template, so creating one
+    costs a file copy rather than running every migration. Evicted pools
+    close their connections as they are returned.
+    """
+
+    def __init__(self, directory, capacity=SHARD_CACHE_SIZE, pool_size=SHARD_POOL_SIZE):
+        self.directory = directory
+        self.capacity = max(1, capacity)
+        self.pool_size = pool_size
+        self._pools = OrderedDict()
+        self._lock = threading.Lock()
+        self._template_lock = threading.Lock()
+        self._template = None
+        self._stats = {'hits': 0, 'opens': 0, 'created': 0, 'evictions': 0}
+
+    def path_for(self, tenant_id):
+        bucket = hashlib.sha1(tenant_id.encode()).hexdigest()[:2]
+        return os.path.join(self.directory, bucket, f'{tenant_id}.db')
+
+    def pool_for(self, tenant_id):
+        with self._lock:
+            shard = self._pools.get(tenant_id)
+            if shard is not None:
+                self._pools.move_to_end(tenant_id)
+                self._stats['hits'] += 1
+                return shard
+
+        # Opening (and possibly creating) the file happens outside the lock
+        shard = self._open(tenant_id)
+        evicted = []
+        with self._lock:
+            existing = self._pools.get(tenant_id)
+            if existing is not None:
+                # Another thread opened it meanwhile
+                self._pools.move_to_end(tenant_id)
+                evicted.append(shard)
+                shard = existing
+            else:
+                self._pools[tenant_id] = shard
+                self._stats['opens'] += 1
+                while len(self._pools) > self.capacity:
+                    evicted.append(self._pools.popitem(last=False)[1])
+                    self._stats['evictions'] += 1
+        for old in evicted:
+            old.close()
+        return shard
+
+    def _open(self, tenant_id):
+        path = self.path_for(tenant_id)
+        if not os.path.exists(path):
+            self._create(path)
+        shard = ConnectionPool(path, size=self.pool_size)
+        init_pool(shard)
+        return shard
+
+    def _create(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        partial = f'{path}.{os.getpid()}-{threading.get_ident()}.partial'
+        shutil.copyfile(self._template_path(), partial)
+        try:
+            # A hard link never replaces a file another process created first
+            os.link(partial, path)
+            with _init_lock:
+                _initialized.add(path)
+            self._stats['created'] += 1
+        except FileExistsError:
+            pass
+        finally:
+            os.unlink(partial)
+
+    def _template_path(self):
+        """An empty database at the current schema version"""
+        with self._template_lock:
+            if self._template:
+                return self._template
+            path = os.path.join(self.directory, 'template.db')
+            if schema_version(path) != len(MIGRATIONS):
+                os.makedirs(self.directory, exist_ok=True)
+                partial = f'{path}.{os.getpid()}.partial'
+                builder = ConnectionPool(partial, size=1)
+                _create_schema(builder)
+                # Closing the last connection checkpoints the WAL into the file
+                builder.close()
+                os.replace(partial, path)
+            self._template = path
+            return path
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['open'] = len(self._pools)
+            stats['capacity'] = self.capacity
+        return stats
+
+    def close_all(self):
+        with self._lock:
+            pools = list(self._pools.values())
+            self._pools.clear()
+        for shard in pools:
+            shard.close()
+
+
+def schema_version(path):
+    """PRAGMA user_version of a database file, or None if there is none"""
+    if not os.path.exists(path):
+        return None
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute('PRAGMA user_version').fetchone()[0]
+    finally:
+        conn.close()
+
+
+pool = ConnectionPool(DATABASE_PATH)
+router = ShardRouter(TENANT_DIR) if TENANT_DIR else None
+
+# Tenant of the current request or background job (None = shared database)
+_tenant = contextvars.ContextVar('tenant', default=None)
+
+
+def check_tenant(tenant_id):
+    if tenant_id is not None and not TENANT_ID_RE.fullmatch(tenant_id):
+        raise ValueError('Invalid tenant id (1-64 letters, digits, "-" or "_")')
+    return tenant_id
+
+
+def current_tenant():
+    return _tenant.get()
+
+
+def set_tenant(tenant_id):
+    """Bind a tenant to the current context; returns a token for ``reset_tenant``"""
+    return _tenant.set(check_tenant(tenant_id))
+
+
+def reset_tenant(token):
+    _tenant.reset(token)
+
+
+@contextmanager
+def tenant(tenant_id):
+    """Route ``connection()`` to ``tenant_id``'s database inside the block"""
+    token = set_tenant(tenant_id)
+    try:
+        yield
+    finally:
+        reset_tenant(token)
+
+
+def current_pool():
+    """The pool of the current tenant, or the shared one"""
+    tenant_id = _tenant.get()
+    if tenant_id is None or router is None:
+        return pool
+    return router.pool_for(tenant_id)
+
+
+def connection():
+    """Shortcut for ``current_pool().connection()`` used by the routes"""
+    return current_pool().connection()
+
+
+def dedicated_connection():
+    """Shortcut for ``current_pool().dedicated()``"""
+    return current_pool().dedicated()
+
+
+# Schema migrations, applied in order on top of the base tables. The index of
+# each entry + 1 is the schema version recorded in PRAGMA user_version.
+MIGRATIONS = [
+    # 1: indexes and maintained counters for the dashboard statistics
+    '''
+    CREATE INDEX IF NOT EXISTS idx_todos_status_priority ON todos(status, priority);
+    CREATE INDEX IF NOT EXISTS idx_todos_priority ON todos(priority);
+    CREATE INDEX IF NOT EXISTS idx_todos_created_at ON todos(created_at);
+
+    CREATE TABLE IF NOT EXISTS todo_counters (
+        name TEXT PRIMARY KEY,
+        count INTEGER NOT NULL DEFAULT 0
+    ) WITHOUT ROWID;
+
+    DELETE FROM todo_counters;
+    INSERT INTO todo_counters (name, count)
+        SELECT 'total', COUNT(*) FROM todos
+        UNION ALL
+        SELECT 'status:' || ifnull(status, ''), COUNT(*) FROM todos GROUP BY status
+        UNION ALL
+        SELECT 'priority:' || ifnull(priority, ''), COUNT(*) FROM todos GROUP BY priority;
+
+    CREATE TRIGGER IF NOT EXISTS todos_counters_insert AFTER INSERT ON todos
+    BEGIN
+        INSERT INTO todo_counters (name, count)
+            VALUES ('total', 1), ('status:' || ifnull(NEW.status, ''), 1), ('priority:' || ifnull(NEW.priority, ''), 1)
+            ON CONFLICT(name) DO UPDATE SET count = count + 1;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS todos_counters_delete AFTER DELETE ON todos
+    BEGIN
+        UPDATE todo_counters SET count = count - 1
+            WHERE name IN ('total', 'status:' || ifnull(OLD.status, ''), 'priority:' || ifnull(OLD.priority, ''));
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS todos_counters_update
+    AFTER UPDATE OF status, priority ON todos
+    WHEN OLD.status IS NOT NEW.status OR OLD.priority IS NOT NEW.priority
+    BEGIN
+        UPDATE todo_counters SET count = count - 1
+            WHERE name IN ('status:' || ifnull(OLD.status, ''), 'priority:' || ifnull(OLD.priority, ''));
+        INSERT INTO todo_counters (name, count)
+            VALUES ('status:' || ifnull(NEW.status, ''), 1), ('priority:' || ifnull(NEW.priority, ''), 1)
+            ON CONFLICT(name) DO UPDATE SET count = count + 1;
+    END;
+    ''',
+
+    # 2: keyset pagination on (created_at, id) within a status or priority
+    '''
+    DROP INDEX IF EXISTS idx_todos_priority;
+    CREATE INDEX IF NOT EXISTS idx_todos_priority_created_at ON todos(priority, created_at);
+    CREATE INDEX IF NOT EXISTS idx_todos_status_created_at ON todos(status, created_at);
+    ''',
+
+    # 3: change log for delta sync; one row per todo holding its latest change,
+    # deletions are kept as tombstones
+    '''
+    CREATE TABLE IF NOT EXISTS todo_changes (
+        version INTEGER PRIMARY KEY AUTOINCREMENT,
+        todo_id INTEGER NOT NULL,
+        op TEXT NOT NULL,
+        changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE INDEX IF NOT EXISTS idx_todo_changes_todo_id ON todo_changes(todo_id);
+
+    INSERT INTO todo_changes (todo_id, op) SELECT id, 'upsert' FROM todos ORDER BY id;
+
+    CREATE TRIGGER IF NOT EXISTS todos_changes_insert AFTER INSERT ON todos
+    BEGIN
+        DELETE FROM todo_changes WHERE todo_id = NEW.id;
+        INSERT INTO todo_changes (todo_id, op) VALUES (NEW.id, 'upsert');
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS todos_changes_update AFTER UPDATE ON todos
+    BEGIN
+        DELETE FROM todo_changes WHERE todo_id = NEW.id;
+        INSERT INTO todo_changes (todo_id, op) VALUES (NEW.id, 'upsert');
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS todos_changes_delete AFTER DELETE ON todos
+    BEGIN
+        DELETE FROM todo_changes WHERE todo_id = OLD.id;
+        INSERT INTO todo_changes (todo_id, op) VALUES (OLD.id, 'delete');
+    END;
+    ''',
+
+    # 4: full-text index over task titles/descriptions for chat task lookup
+    '''
+    CREATE VIRTUAL TABLE IF NOT EXISTS todos_fts USING fts5(
+        title, description,
+        content='todos', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    );
+    INSERT INTO todos_fts(todos_fts) VALUES ('rebuild');
+
+    CREATE TRIGGER IF NOT EXISTS todos_fts_insert AFTER INSERT ON todos
+    BEGIN
+        INSERT INTO todos_fts (rowid, title, description)
+            VALUES (NEW.id, NEW.title, NEW.description);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS todos_fts_delete AFTER DELETE ON todos
+    BEGIN
+        INSERT INTO todos_fts (todos_fts, rowid, title, description)
+            VALUES ('delete', OLD.id, OLD.title, OLD.description);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS todos_fts_update AFTER UPDATE OF title, description ON todos
+    BEGIN
+        INSERT INTO todos_fts (todos_fts, rowid, title, description)
+            VALUES ('delete', OLD.id, OLD.title, OLD.description);
+        INSERT INTO todos_fts (rowid, title, description)
+            VALUES (NEW.id, NEW.title, NEW.description);
+    END;
+    ''',
+
+    # 5: pending tasks by due date (chat context, upcoming deadlines)
+    '''
+    CREATE INDEX IF NOT EXISTS idx_todos_status_due_date ON todos(status, due_date);
+    ''',
+
+    # 6: stored productivity insights, refreshed in the background
+    '''
+    CREATE INDEX IF NOT EXISTS idx_todos_completed_at ON todos(completed_at);
+
+    CREATE TABLE IF NOT EXISTS productivity_insights (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        version INTEGER NOT NULL,
+        metrics TEXT NOT NULL,
+        insights TEXT NOT NULL,
+        source TEXT NOT NULL,
+        generated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    ''',
+
+    # 7: chat history retention and rolling summaries
+    '''
+    CREATE INDEX IF NOT EXISTS idx_chat_messages_created_at ON chat_messages(created_at);
+
+    CREATE TABLE IF NOT EXISTS chat_summaries (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        first_message_id INTEGER NOT NULL,
+        last_message_id INTEGER NOT NULL,
+        message_count INTEGER NOT NULL,
+        summary TEXT NOT NULL,
+        source TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    ''',
+
+    # 8: full-text index over chat messages for /api/search
+    '''
+    CREATE VIRTUAL TABLE IF NOT EXISTS chat_messages_fts USING fts5(
+        user_message, ai_response,
+        content='chat_messages', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    );
+    INSERT INTO chat_messages_fts(chat_messages_fts) VALUES ('rebuild');
+
+    CREATE TRIGGER IF NOT EXISTS chat_messages_fts_insert AFTER INSERT ON chat_messages
+    BEGIN
+        INSERT INTO chat_messages_fts (rowid, user_message, ai_response)
+            VALUES (NEW.id, NEW.user_message, NEW.ai_response);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS chat_messages_fts_delete AFTER DELETE ON chat_messages
+    BEGIN
+        INSERT INTO chat_messages_fts (chat_messages_fts, rowid, user_message, ai_response)
+            VALUES ('delete', OLD.id, OLD.user_message, OLD.ai_response);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS chat_messages_fts_update AFTER UPDATE OF user_message, ai_response ON chat_messages
+    BEGIN
+        INSERT INTO chat_messages_fts (chat_messages_fts, rowid, user_message, ai_response)
+            VALUES ('delete', OLD.id, OLD.user_message, OLD.ai_response);
+        INSERT INTO chat_messages_fts (rowid, user_message, ai_response)
+            VALUES (NEW.id, NEW.user_message, NEW.ai_response);
+    END;
+    ''',
+]
+
+
+# Database paths already initialized by this process
+_initialized = set()
+_init_lock = threading.Lock()
+
+
+# Database initialization
+def init_db():
+    """Create the schema and apply migrations, once per process per database"""
+    init_pool(pool)
+
+
+def init_pool(target):
+    """``init_db()`` for any pool, e.g. a tenant's"""
+    with _init_lock:
+        if target.path in _initialized:
+            return
+        _create_schema(target)
+        _initialized.add(target.path)
+
+
+def _create_schema(target):
+    with target.connection() as conn:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS todos (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                title TEXT NOT NULL,
+                description TEXT,
+                priority TEXT DEFAULT 'medium',
+                status TEXT DEFAULT 'pending',
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                due_date DATE,
+                completed_at TIMESTAMP
+            )
+        ''')
+
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS chat_messages (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_message TEXT NOT NULL,
+                ai_response TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+
+        migrate(conn)
+
+
+def split_statements(script):
+    """Split a migration script into its individual statements"""
+    statements, buffer = [], ''
+    for line in script.splitlines(keepends=True):
+        buffer += line
+        if sqlite3.complete_statement(buffer):
+            statements.append(buffer.strip())
+            buffer = ''
+    if buffer.strip():
+        statements.append(buffer.strip())
+    return statements
+
+
+def migrate(conn):
+    """Apply any migrations newer than the database's user_version.
+
+    Each migration takes the write lock (BEGIN IMMEDIATE) and re-reads the
+    version before running, so several worker processes starting at once
+    apply it exactly once. executescript() is avoided because it commits
+    any open transaction first.
+    """
+    if conn.in_transaction:
+        conn.commit()
+    for number, script in enumerate(MIGRATIONS, start=1):
+        if conn.execute('PRAGMA user_version').fetchone()[0] >= number:
+            continue
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            if conn.execute('PRAGMA user_version').fetchone()[0] < number:
+                for statement in split_statements(script):
+                    conn.execute(statement)
+                conn.execute(f'PRAGMA user_version={number}')
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
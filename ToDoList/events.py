@@ -0,0 +1,182 @@
+"""
+In-process pub/sub for live dashboard updates over Server-Sent Events.
+
+Mutation routes call ``TaskChangeFeed.publish_changes()`` after they commit.
+The feed reads what changed since the last event from ``todo_changes``, the
+same log behind ``GET /api/todos?since=``, and publishes one compact
+``tasks`` event (changed rows and deleted ids) plus a ``stats`` event to
+every subscriber of the ``EventBroker``. A background poll picks up changes
+committed by other worker processes. With per-tenant databases each tenant
+has its own feed, and events only reach that tenant's subscribers.
+"""
+import os
+import queue
+import threading
+import time
+
+import db
+import tasks
+
+EVENTS_MAX_SUBSCRIBERS = int(os.getenv('EVENTS_MAX_SUBSCRIBERS', '100'))
+EVENTS_QUEUE_SIZE = int(os.getenv('EVENTS_QUEUE_SIZE', '64'))
+EVENTS_KEEPALIVE = float(os.getenv('EVENTS_KEEPALIVE', '15'))
+EVENTS_POLL_INTERVAL = float(os.getenv('EVENTS_POLL_INTERVAL', '2'))
+EVENTS_RETRY_AFTER = 5
+
+# Columns sent for changed tasks (what the dashboard renders)
+EVENT_FIELDS = ['id', 'title', 'description', 'priority', 'status', 'due_date', 'created_at']
+# Larger changes are announced as a resync; clients fetch the delta themselves
+MAX_EVENT_CHANGES = 200
+
+
+class TooManySubscribers(Exception):
+    def __init__(self, retry_after=EVENTS_RETRY_AFTER):
+        super().__init__('Too many live update connections')
+        self.retry_after = retry_after
+
+
+class Subscription:
+    """One client's bounded event queue.
+
+    A client too slow to keep up loses its backlog and gets a single
+    ``resync`` event instead, so one stalled tab can't hold memory.
+    """
+
+    def __init__(self, queue_size, tenant=None):
+        self.tenant = tenant
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def put(self, event):
+        with self._lock:
+            try:
+                self._queue.put_nowait(event)
+                return
+            except queue.Full:
+                pass
+            while True:
+                try:
+                    self._queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    break
+            self._queue.put_nowait({'type': 'resync'})
+
+    def get(self, timeout):
+        """Next event, or ``None`` after ``timeout`` seconds without one"""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class EventBroker:
+    def __init__(self, max_subscribers=EVENTS_MAX_SUBSCRIBERS, queue_size=EVENTS_QUEUE_SIZE):
+        self.max_subscribers = max_subscribers
+        self.queue_size = queue_size
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._stats = {'subscribed': 0, 'rejected': 0, 'published': 0}
+
+    def subscribe(self, tenant=None):
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                self._stats['rejected'] += 1
+                raise TooManySubscribers()
+            subscription = Subscription(self.queue_size, tenant)
+            self._subscribers.add(subscription)
+            self._stats['subscribed'] += 1
+            return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def has_subscribers(self, tenant=None):
+        with self._lock:
+            return any(s.tenant == tenant for s in self._subscribers)
+
+    def publish(self, event, tenant=None):
+        """Queue ``event`` for every subscriber of ``tenant``"""
+        with self._lock:
+            subscribers = [s for s in self._subscribers if s.tenant == tenant]
+            self._stats['published'] += 1
+        for subscription in subscribers:
+            subscription.put(event)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['subscribers'] = len(self._subscribers)
+            stats['dropped'] = sum(s.dropped for s in self._subscribers)
+        return stats
+
+
+class TaskChangeFeed:
+    """Turns ``todo_changes`` into ``tasks``/``stats`` events.
+
+    Only tracks a version while someone is subscribed; with no subscribers
+    ``publish_changes()`` costs nothing. ``start()`` and ``publish_changes()``
+    are called in the context of the feed's tenant (a request); the poll
+    thread binds it itself.
+    """
+
+    def __init__(self, broker, tenant=None, poll_interval=EVENTS_POLL_INTERVAL):
+        self.broker = broker
+        self.tenant = tenant
+        self.poll_interval = poll_interval
+        self.version = None
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        """Begin tracking from the current version; called on subscribe"""
+        with self._lock:
+            if self.version is None:
+                with db.connection() as conn:
+                    self.version = tasks.current_version(conn)
+            if self.poll_interval > 0 and self._thread is None:
+                self._thread = threading.Thread(target=self._poll, name='task-change-feed', daemon=True)
+                self._thread.start()
+            return self.version
+
+    def _poll(self):
+        with db.tenant(self.tenant):
+            while True:
+                time.sleep(self.poll_interval)
+                with self._lock:
+                    if not self.broker.has_subscribers(self.tenant):
+                        self._thread = None
+                        return
+                try:
+                    self.publish_changes()
+                except Exception as e:
+                    print(f"Live Update Error: {str(e)}")
+
+    def publish_changes(self):
+        """Publish whatever changed since the last event"""
+        if not self.broker.has_subscribers(self.tenant):
+            with self._lock:
+                self.version = None
+            return
+        with self._lock:
+            if self.version is None:
+                return
+            since = self.version
+            with db.connection() as conn:
+                changed, deleted, version, has_more = tasks.changes_since(
+                    conn, since, EVENT_FIELDS, limit=MAX_EVENT_CHANGES)
+                if version == since:
+                    return
+                if has_more:
+                    version = tasks.current_version(conn)
+                stats = tasks.get_stats(conn)
+            self.version = version
+            # Publish under the lock so events leave in version order
+            if has_more:
+                self.broker.publish({'type': 'resync', 'version': version}, self.tenant)
+            else:
+                self.broker.publish({'type': 'tasks', 'since': since, 'version': version,
+                                     'changed': changed, 'deleted': deleted}, self.tenant)
+            self.broker.publish({'type': 'stats', 'stats': stats}, self.tenant)
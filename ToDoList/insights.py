@@ -0,0 +1,232 @@
+"""
+Precomputed productivity insights.
+
+The deterministic numbers (completion trend, time to complete, priority mix,
+overdue work) are computed in SQL. Only that compact summary is sent to the
+model, and the analysis is stored in ``productivity_insights`` so the endpoint
+answers from the table. A background thread recomputes it once the task set
+has changed enough since the stored version.
+"""
+import json
+import os
+from datetime import date, timedelta
+
+import db
+import serialize
+import tasks
+import workers
+
+INSIGHTS_REFRESH_INTERVAL = float(os.getenv('INSIGHTS_REFRESH_INTERVAL', '60'))
+INSIGHTS_MIN_CHANGES = int(os.getenv('INSIGHTS_MIN_CHANGES', '5'))
+# Any change at all is picked up once the stored analysis is this old
+INSIGHTS_MAX_AGE = float(os.getenv('INSIGHTS_MAX_AGE', '3600'))
+TREND_WEEKS = 4
+
+
+def compute_metrics(conn, today=None):
+    """Deterministic productivity numbers for the current task set"""
+    today = today or date.today()
+    stats = tasks.get_stats(conn)
+
+    # Weeks start on Monday; date(x, 'weekday 0', '-6 days') is that Monday
+    since = (today - timedelta(days=today.weekday() + 7 * (TREND_WEEKS - 1))).isoformat()
+    created = dict(conn.execute('''
+        SELECT date(created_at, 'weekday 0', '-6 days') AS week, COUNT(*)
+        FROM todos
+        WHERE created_at >= ?
+        GROUP BY week
+    ''', (since,)).fetchall())
+    completed = dict(conn.execute('''
+        SELECT date(completed_at, 'weekday 0', '-6 days') AS week, COUNT(*)
+        FROM todos
+        WHERE completed_at >= ?
+        GROUP BY week
+    ''', (since,)).fetchall())
+    weeks = [(date.fromisoformat(since) + timedelta(weeks=i)).isoformat() for i in range(TREND_WEEKS)]
+    trend = [
+        {'week': week, 'created': created.get(week, 0), 'completed': completed.get(week, 0)}
+        for week in weeks
+    ]
+
+    lag = {}
+    rows = conn.execute('''
+        SELECT priority, COUNT(*) AS count,
+               AVG(julianday(completed_at) - julianday(created_at)) * 24 AS avg_hours,
+               MAX(julianday(completed_at) - julianday(created_at)) * 24 AS max_hours
+        FROM todos
+        WHERE status = 'completed' AND completed_at IS NOT NULL
+        GROUP BY priority
+    ''').fetchall()
+    for row in rows:
+        lag[row['priority'] or 'none'] = {
+            'count': row['count'],
+            'avg_hours': round(row['avg_hours'] or 0, 1),
+            'max_hours': round(row['max_hours'] or 0, 1),
+        }
+
+    pending_mix = dict(conn.execute('''
+        SELECT ifnull(priority, 'none'), COUNT(*)
+        FROM todos
+        WHERE status = 'pending'
+        GROUP BY priority
+    ''').fetchall())
+
+    overdue = conn.execute('''
+        SELECT COUNT(*) FROM todos
+        WHERE status = 'pending' AND due_date IS NOT NULL AND due_date < ?
+    ''', (today.isoformat(),)).fetchone()[0]
+
+    # created_at is a UTC timestamp, so age it against 'now' rather than today
+    oldest = conn.execute('''
+        SELECT julianday('now') - julianday(MIN(created_at))
+        FROM todos
+        WHERE status = 'pending'
+    ''').fetchone()[0]
+
+    return {
+        'totals': stats,
+        'weekly_trend': trend,
+        'completion_hours': lag,
+        'pending_by_priority': pending_mix,
+        'overdue': overdue,
+        'oldest_pending_days': round(oldest, 1) if oldest is not None else None,
+    }
+
+
+def build_prompt(metrics):
+    return f"""Here is a summary of a user's to-do list, computed from their data:
+
+{serialize.dumps(metrics)}
+
+weekly_trend counts tasks created and completed per week (weeks start on the
+given Monday); completion_hours is the time from creation to completion per
+priority.
+
+Please provide:
+1. Overall productivity patterns
+2. Priority distribution analysis
+3. Completion trends
+4. Actionable recommendations for improvement
+
+Keep the response concise and helpful (max 200 words)."""
+
+
+def describe_metrics(metrics):
+    """Plain-text insights from the metrics alone, used until the model's
+    analysis is available or when the model cannot be reached"""
+    totals = metrics['totals']
+    lines = [
+        f"You have completed {totals['completed_tasks']} of {totals['total_tasks']} tasks "
+        f"({totals['completion_rate']}%), with {totals['pending_tasks']} still pending."
+    ]
+    pending_high = metrics['pending_by_priority'].get('high', 0)
+    if pending_high:
+        lines.append(f"{pending_high} high-priority tasks are waiting; tackle those first.")
+    if metrics['overdue']:
+        lines.append(f"{metrics['overdue']} tasks are past their due date.")
+    lag = metrics['completion_hours']
+    if lag:
+        count = sum(v['count'] for v in lag.values())
+        hours = sum(v['avg_hours'] * v['count'] for v in lag.values()) / count
+        lines.append(f"On average a task takes {hours:.1f} hours from creation to completion.")
+    this_week = metrics['weekly_trend'][-1]
+    lines.append(f"This week you added {this_week['created']} tasks and completed {this_week['completed']}.")
+    return ' '.join(lines)
+
+
+def load(conn):
+    """Stored insights row, or ``None`` if they were never computed"""
+    row = conn.execute('''
+        SELECT version, metrics, insights, source, generated_at
+        FROM productivity_insights WHERE id = 1
+    ''').fetchone()
+    if row is None:
+        return None
+    return {
+        'version': row['version'],
+        'metrics': json.loads(row['metrics']),
+        'insights': row['insights'],
+        'source': row['source'],
+        'generated_at': row['generated_at'],
+    }
+
+
+def store(conn, version, metrics, text, source):
+    conn.execute('''
+        INSERT INTO productivity_insights (id, version, metrics, insights, source, generated_at)
+        VALUES (1, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+        ON CONFLICT(id) DO UPDATE SET
+            version = excluded.version,
+            metrics = excluded.metrics,
+            insights = excluded.insights,
+            source = excluded.source,
+            generated_at = excluded.generated_at
+    ''', (version, serialize.dumps(metrics), text, source))
+
+
+def needs_refresh(conn, stored):
+    """True once the task set changed meaningfully since ``stored``"""
+    if stored is None or stored['source'] == 'metrics':
+        # A metrics-only answer means the model failed last time; retry it
+        return True
+    changes = conn.execute(
+        'SELECT COUNT(*) FROM todo_changes WHERE version > ?', (stored['version'],)
+    ).fetchone()[0]
+    if changes >= INSIGHTS_MIN_CHANGES:
+        return True
+    if not changes:
+        return False
+    age = conn.execute(
+        "SELECT (julianday('now') - julianday(?)) * 86400", (stored['generated_at'],)
+    ).fetchone()[0]
+    return age >= INSIGHTS_MAX_AGE
+
+
+class InsightsRefresher(workers.BackgroundWorker):
+    """Background thread that keeps ``productivity_insights`` current.
+
+    ``generate(prompt)`` returns the model's text and may raise; on failure
+    the metric-based description is stored (source ``metrics``) so the
+    endpoint still has an answer, and the next pass tries the model again.
+    An ``interval`` of 0 only refreshes when woken. With per-tenant
+    databases, a pass refreshes the tenants that woke it (timed passes cover
+    the shared database).
+    """
+
+    thread_name = 'insights-refresher'
+    error_label = 'Insights Refresh Error'
+
+    def __init__(self, generate, interval=INSIGHTS_REFRESH_INTERVAL):
+        super().__init__(interval)
+        self.generate = generate
+        self._stats.update(runs=0, refreshes=0, model_errors=0)
+
+    def run_once(self):
+        self.refresh()
+
+    def refresh(self, force=False):
+        """Recompute and store insights if needed; returns the stored row"""
+        self._stats['runs'] += 1
+        with db.connection() as conn:
+            stored = load(conn)
+            if not force and not needs_refresh(conn, stored):
+                return stored
+            version = tasks.current_version(conn)
+            metrics = compute_metrics(conn)
+
+        text = None
+        source = 'model'
+        if metrics['totals']['total_tasks']:
+            try:
+                text = self.generate(build_prompt(metrics))
+            except Exception as e:
+                self._stats['model_errors'] += 1
+                print(f"AI Insights Error: {str(e)}")
+        if not text:
+            text = describe_metrics(metrics)
+            source = 'metrics'
+
+        with db.connection() as conn:
+            store(conn, version, metrics, text, source)
+            self._stats['refreshes'] += 1
+            return load(conn)
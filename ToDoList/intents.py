@@ -0,0 +1,199 @@
+"""
+Compiled intent matcher for natural language task commands.
+
+All command patterns are compiled once at import time. A single merged
+keyword scan (one named group per intent) decides which intents a message
+can trigger, so ordinary chat messages are rejected in one pass and only
+the relevant compiled patterns run for commands. Priority and due date are
+pulled out of the task text as structured slots.
+"""
+import re
+from collections import namedtuple
+from datetime import date, timedelta
+
+Command = namedtuple('Command', 'intent target priority due_date')
+
+# Patterns are tried in order and the first one that matches anywhere in the
+# message wins. Each has exactly one (?P<target>...) group.
+INTENT_PATTERNS = [
+    ('create_task', [
+        r'create (?:a )?(?:new )?task:?\s*(?P<target>.+)',
+        r'add (?:a )?(?:new )?task:?\s*(?P<target>.+)',
+        r'new task:?\s*(?P<target>.+)',
+        r'make (?:a )?(?:new )?task:?\s*(?P<target>.+)',
+        r'i need to\s+(?P<target>.+)',
+        r'add:?\s*(?P<target>.+)',
+        r'create:?\s*(?P<target>.+)',
+    ]),
+    ('complete_task', [
+        r'(?:mark|set)\s+(?:the\s+)?task\s+(?:about\s+|titled\s+|called\s+)?["\']?(?P<target>[^"\']+)["\']?\s+as\s+(?:completed|done|finished)',
+        r'complete\s+(?:the\s+)?task\s+(?:about\s+|titled\s+|called\s+)?["\']?(?P<target>[^"\']+)["\']?',
+        r'(?:mark|set)\s+["\']?(?P<target>[^"\']+)["\']?\s+as\s+(?:completed|done|finished)',
+        r'finish\s+(?:the\s+)?task\s+(?:about\s+|titled\s+|called\s+)?["\']?(?P<target>[^"\']+)["\']?',
+        r'done\s+with\s+["\']?(?P<target>[^"\']+)["\']?',
+        r'completed?\s+["\']?(?P<target>[^"\']+)["\']?',
+        r'["\']?(?P<target>[^"\']+)["\']?\s+is\s+(?:completed|done|finished)',
+    ]),
+    ('delete_task', [
+        r'delete\s+(?:the\s+)?task\s+(?:about\s+|titled\s+|called\s+)?["\']?(?P<target>[^"\']+)["\']?',
+        r'remove\s+(?:the\s+)?task\s+(?:about\s+|titled\s+|called\s+)?["\']?(?P<target>[^"\']+)["\']?',
+        r'get\s+rid\s+of\s+(?:the\s+)?task\s+(?:about\s+|titled\s+|called\s+)?["\']?(?P<target>[^"\']+)["\']?',
+    ]),
+]
+
+
+# Literal keywords, one of which occurs in every message a pattern of that
+# intent can match. They are merged into one named alternation so a single
+# scan tells which intents are possible; plain chat messages stop there.
+INTENT_TRIGGERS = {
+    'create_task': r'create|add|new task|make|i need to',
+    'complete_task': r'mark|set|complet|finish|done',
+    'delete_task': r'delete|remove|get\s+rid',
+}
+
+
+def _compile():
+    """Compile every pattern once and build the trigger dispatch regex.
+
+    The dispatch is a zero-width lookahead, so overlapping keywords (e.g.
+    "add" inside "addelete") are all reported.
+    """
+    ordered = []
+    for intent, patterns in INTENT_PATTERNS:
+        for pattern in patterns:
+            ordered.append((intent, re.compile(pattern)))
+    triggers = '|'.join(f'(?P<{intent}>{keywords})' for intent, keywords in INTENT_TRIGGERS.items())
+    return re.compile(f'(?=(?:{triggers}))'), ordered
+
+
+TRIGGER_RE, ORDERED_PATTERNS = _compile()
+
+
+# Slot extraction for created tasks
+PRIORITY_RE = re.compile(
+    r'\s*(?:with\s+)?(?:'
+    r'(?P<high>high\s+priority|urgent|important|critical)'
+    r'|(?P<low>low\s+priority|minor)'
+    r'|(?P<medium>medium\s+priority)'
+    r')\s*'
+)
+PRIORITY_ORDER = ('high', 'low', 'medium')
+
+WEEKDAYS = ('monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday')
+DUE_RE = re.compile(
+    r'\s*\b(?:due|by|on)\s+(?:(?:this|on)\s+)?'
+    r'(?P<due>today|tonight|tomorrow|next\s+week|' + '|'.join(WEEKDAYS) + r'|\d{4}-\d{2}-\d{2})\b\s*'
+    r'|\s*\bin\s+(?P<days>\d{1,3})\s+days?\b\s*'
+)
+WHITESPACE_RE = re.compile(r'\s+')
+
+# Multi-command messages ("add buy milk, add call bob and complete report").
+# A message is cut at these separators only where the text after them starts
+# with a command verb, so "add buy milk, eggs and bread" stays one command.
+CLAUSE_SEPARATOR_RE = re.compile(
+    r'\s*[,;\n]+\s*(?:(?:and|then|also)\s+)*|\s+(?:and\s+then|and|then|also)\s+'
+)
+COMMAND_START_RE = re.compile(
+    r'(?:create|add|new task|make|i need to|mark|set|complete|finish|done with|delete|remove|get rid of)\b'
+)
+MAX_COMMANDS = 10
+
+
+def parse_command(message, today=None):
+    """Match a chat message against the task commands.
+
+    Returns a ``Command`` or ``None`` when the message is not a command.
+    Patterns are tried in list order, skipping intents whose keywords are
+    absent. For ``create_task`` the target is the cleaned task title and
+    the priority/due date slots are filled.
+    """
+    message_lower = message.lower().strip()
+    candidates = {m.lastgroup for m in TRIGGER_RE.finditer(message_lower)}
+    if not candidates:
+        return None
+
+    for intent, pattern in ORDERED_PATTERNS:
+        if intent not in candidates:
+            continue
+        match = pattern.search(message_lower)
+        if not match:
+            continue
+        target = match.group('target').strip()
+        if intent != 'create_task':
+            return Command(intent, target, None, None)
+        # A title that is too short once the slots are removed falls
+        # through to the next pattern
+        command = fill_task_slots(target, today)
+        if command:
+            return command
+    return None
+
+
+def split_clauses(message):
+    """Split a message into clauses that each start a new command"""
+    clauses = []
+    start = 0
+    for separator in CLAUSE_SEPARATOR_RE.finditer(message):
+        if COMMAND_START_RE.match(message, separator.end()):
+            clauses.append(message[start:separator.start()])
+            start = separator.end()
+    clauses.append(message[start:])
+    return [clause for clause in clauses if clause.strip()]
+
+
+def parse_commands(message, today=None):
+    """Every command in a chat message, in order (at most MAX_COMMANDS).
+
+    The split is only used when every clause is a command on its own;
+    otherwise (e.g. "add buy groceries and make dinner", where "make
+    dinner" is part of the title) the whole message is matched exactly
+    like ``parse_command``.
+    """
+    clauses = split_clauses(message.lower().strip())
+    if len(clauses) > 1:
+        commands = [parse_command(clause, today) for clause in clauses]
+        if all(commands):
+            return commands[:MAX_COMMANDS]
+    command = parse_command(message, today)
+    return [command] if command else []
+
+
+def fill_task_slots(text, today=None):
+    """Pull priority and due date out of a task description"""
+    priority = 'medium'
+    found = {m.lastgroup for m in PRIORITY_RE.finditer(text)}
+    for level in PRIORITY_ORDER:
+        if level in found:
+            priority = level
+            text = PRIORITY_RE.sub(lambda m: ' ' if m.lastgroup == level else m.group(0), text)
+            break
+
+    due_date = None
+    due_match = DUE_RE.search(text)
+    if due_match:
+        due_date = resolve_due_date(due_match, today or date.today())
+        text = text[:due_match.start()] + ' ' + text[due_match.end():]
+
+    title = WHITESPACE_RE.sub(' ', text).strip()
+    if len(title) <= 2:
+        return None
+    return Command('create_task', title, priority, due_date.isoformat() if due_date else None)
+
+
+def resolve_due_date(match, today):
+    if match.group('days'):
+        return today + timedelta(days=int(match.group('days')))
+
+    due = WHITESPACE_RE.sub(' ', match.group('due'))
+    if due in ('today', 'tonight'):
+        return today
+    if due == 'tomorrow':
+        return today + timedelta(days=1)
+    if due == 'next week':
+        return today + timedelta(days=7)
+    if due in WEEKDAYS:
+        return today + timedelta(days=(WEEKDAYS.index(due) - today.weekday()) % 7)
+    try:
+        return date.fromisoformat(due)
+    except ValueError:
+        return None
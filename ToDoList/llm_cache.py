@@ -0,0 +1,126 @@
+"""
+Response cache for model calls: in-memory LRU with TTL, optionally backed by
+a persistent SQLite file so entries survive restarts and are shared between
+worker processes.
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+LLM_CACHE_SIZE = int(os.getenv('LLM_CACHE_SIZE', '256'))
+LLM_CACHE_TTL = float(os.getenv('LLM_CACHE_TTL', '600'))
+LLM_CACHE_DB = os.getenv('LLM_CACHE_DB')
+
+WHITESPACE_RE = re.compile(r'\s+')
+
+
+def normalize_prompt(text):
+    """Case and whitespace differences should not defeat the cache"""
+    return WHITESPACE_RE.sub(' ', text).strip().casefold()
+
+
+class ResponseCache:
+    """Thread-safe TTL/LRU cache of model responses keyed by prompt and
+    task-set revision"""
+
+    def __init__(self, max_entries=LLM_CACHE_SIZE, ttl=LLM_CACHE_TTL, persist_path=LLM_CACHE_DB):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self._stats = {
+            'hits': 0,
+            'persistent_hits': 0,
+            'misses': 0,
+            'stores': 0,
+            'evictions': 0,
+            'expirations': 0,
+        }
+        if persist_path:
+            self._db = sqlite3.connect(persist_path, check_same_thread=False)
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute('PRAGMA synchronous=NORMAL')
+            self._db.execute('''
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    response TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+            ''')
+            self._db.commit()
+
+    @staticmethod
+    def make_key(namespace, prompt, revision='', **config):
+        """Stable key for a prompt under a given task revision and generation config"""
+        raw = json.dumps(
+            [namespace, normalize_prompt(prompt), str(revision), sorted(config.items())],
+            separators=(',', ':')
+        )
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._stats['hits'] += 1
+                    return value
+                del self._entries[key]
+                self._stats['expirations'] += 1
+
+            if self._db is not None:
+                row = self._db.execute(
+                    'SELECT response, expires_at FROM llm_cache WHERE key = ?', (key,)
+                ).fetchone()
+                if row and row[1] > time.time():
+                    self._stats['persistent_hits'] += 1
+                    self._store_memory(key, row[0], now + (row[1] - time.time()))
+                    return row[0]
+
+            self._stats['misses'] += 1
+            return None
+
+    def set(self, key, value):
+        now = time.monotonic()
+        with self._lock:
+            self._store_memory(key, value, now + self.ttl)
+            self._stats['stores'] += 1
+            if self._db is not None:
+                self._db.execute(
+                    'INSERT OR REPLACE INTO llm_cache (key, response, expires_at) VALUES (?, ?, ?)',
+                    (key, value, time.time() + self.ttl)
+                )
+                self._db.execute('DELETE FROM llm_cache WHERE expires_at <= ?', (time.time(),))
+                self._db.commit()
+
+    def _store_memory(self, key, value, expires_at):
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats['evictions'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute('DELETE FROM llm_cache')
+                self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+        lookups = stats['hits'] + stats['persistent_hits'] + stats['misses']
+        stats['hit_rate'] = round((stats['hits'] + stats['persistent_hits']) / lookups, 4) if lookups else 0.0
+        stats['persistent'] = self._db is not None
+        return stats
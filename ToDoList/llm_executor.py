@@ -0,0 +1,204 @@
+"""
+Bounded worker pool for model calls.
+
+Gemini requests take seconds. Run directly on the WSGI request threads, a
+burst of chat traffic can occupy every thread so cheap task reads queue
+behind it. Model calls are handed to a fixed set of worker threads with a
+bounded backlog instead: once the backlog is full new calls are rejected
+straight away (the routes answer 429 with Retry-After) and every call has a
+deadline, so at most ``workers + queue_size`` request threads are ever
+waiting on the model.
+"""
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+LLM_WORKERS = int(os.getenv('LLM_WORKERS', '4'))
+LLM_QUEUE_SIZE = int(os.getenv('LLM_QUEUE_SIZE', '4'))
+LLM_TIMEOUT = float(os.getenv('LLM_TIMEOUT', '30'))
+LLM_RETRY_AFTER = int(os.getenv('LLM_RETRY_AFTER', '5'))
+
+
+class ExecutorBusy(Exception):
+    """Raised when every worker is busy and the backlog is full"""
+
+    def __init__(self, retry_after):
+        super().__init__('AI service is busy, please retry shortly')
+        self.retry_after = retry_after
+
+
+class ExecutorTimeout(Exception):
+    """Raised when a model call does not finish within its deadline"""
+
+
+class Stream:
+    """Iterator returned by ``stream()``. ``close()`` runs ``on_close`` once,
+    also when iteration never started (a generator's own ``close()`` skips
+    its ``finally`` then), so callers can hand it to ``call_on_close``."""
+
+    def __init__(self, items, on_close):
+        self._items = items
+        self._on_close = on_close
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._items)
+
+    def close(self):
+        self._items.close()
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._on_close()
+
+
+class LLMExecutor:
+    """Fixed-size thread pool with a bounded backlog and per-call timeouts"""
+
+    def __init__(self, workers=LLM_WORKERS, queue_size=LLM_QUEUE_SIZE,
+                 timeout=LLM_TIMEOUT, retry_after=LLM_RETRY_AFTER):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='llm')
+        # One slot per call that is running or waiting for a worker
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self._lock = threading.Lock()
+        self._active = 0
+        self._pending = 0
+        self._stats = {
+            'submitted': 0,
+            'completed': 0,
+            'failed': 0,
+            'rejected': 0,
+            'timeouts': 0,
+            'run_time': 0.0,
+        }
+
+    def submit(self, fn, *args, **kwargs):
+        """Schedule ``fn`` on a worker; raises ExecutorBusy when full"""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._stats['rejected'] += 1
+            raise ExecutorBusy(self.retry_after)
+
+        with self._lock:
+            self._stats['submitted'] += 1
+            self._pending += 1
+
+        def run():
+            with self._lock:
+                self._pending -= 1
+                self._active += 1
+            start = time.perf_counter()
+            ok = False
+            try:
+                result = fn(*args, **kwargs)
+                ok = True
+                return result
+            finally:
+                with self._lock:
+                    self._active -= 1
+                    self._stats['run_time'] += time.perf_counter() - start
+                    self._stats['completed' if ok else 'failed'] += 1
+
+        try:
+            future = self._pool.submit(run)
+        except BaseException:
+            with self._lock:
+                self._pending -= 1
+            self._slots.release()
+            raise
+        future.add_done_callback(self._done)
+        return future
+
+    def _done(self, future):
+        if future.cancelled():
+            # Cancelled before a worker picked it up
+            with self._lock:
+                self._pending -= 1
+        self._slots.release()
+
+    def call(self, fn, *args, timeout=None, **kwargs):
+        """Run ``fn`` on a worker and wait for its result.
+
+        Raises ExecutorTimeout after ``timeout`` seconds. A call that is
+        already running cannot be interrupted; it keeps its slot until it
+        returns, so the backlog limit stays honest.
+        """
+        future = self.submit(fn, *args, **kwargs)
+        try:
+            return future.result(timeout=timeout or self.timeout)
+        except FutureTimeout:
+            future.cancel()
+            with self._lock:
+                self._stats['timeouts'] += 1
+            raise ExecutorTimeout(f'Model call timed out after {timeout or self.timeout}s')
+
+    def stream(self, fn, *args, timeout=None, **kwargs):
+        """Iterate ``fn(*args, **kwargs)`` on a worker and hand its items to
+        the caller as they are produced.
+
+        The slot is taken immediately (ExecutorBusy is raised here, not on
+        first iteration); the returned generator raises ExecutorTimeout if
+        the whole stream is not finished within ``timeout`` seconds. Close
+        it to stop the worker early.
+        """
+        items = queue.Queue()
+        stopped = threading.Event()
+        done = object()
+
+        def produce():
+            try:
+                for item in fn(*args, **kwargs):
+                    if stopped.is_set():
+                        break
+                    items.put((True, item))
+                items.put((True, done))
+            except BaseException as e:
+                items.put((False, e))
+                raise
+
+        self.submit(produce)
+        deadline = time.monotonic() + (timeout or self.timeout)
+
+        def consume():
+            try:
+                while True:
+                    remaining = deadline - time.monotonic()
+                    try:
+                        ok, item = items.get(timeout=max(remaining, 0))
+                    except queue.Empty:
+                        with self._lock:
+                            self._stats['timeouts'] += 1
+                        raise ExecutorTimeout(f'Model stream timed out after {timeout or self.timeout}s')
+                    if not ok:
+                        raise item
+                    if item is done:
+                        return
+                    yield item
+            finally:
+                # Client went away or we gave up: let the worker stop early
+                stopped.set()
+
+        return Stream(consume(), stopped.set)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['active'] = self._active
+            stats['queued'] = self._pending
+        finished = stats['completed'] + stats['failed']
+        stats['avg_run_time'] = round(stats['run_time'] / finished, 4) if finished else 0.0
+        stats['run_time'] = round(stats['run_time'], 4)
+        stats['workers'] = self.workers
+        stats['queue_size'] = self.queue_size
+        return stats
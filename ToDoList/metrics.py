@@ -0,0 +1,226 @@
+"""
+Prometheus-style metrics without extra dependencies.
+
+Counters and histograms are registered once at import time and rendered in
+the Prometheus text exposition format by ``render()`` (served at /metrics).
+Values owned by other components (connection pool, model worker pool,
+circuit breaker) are exported through collector callbacks evaluated at
+scrape time, so there is no double bookkeeping.
+"""
+import re
+import sqlite3
+import threading
+import time
+
+# Histogram bucket upper bounds in seconds
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1)
+ROW_BUCKETS = (0, 1, 10, 100, 1000, 10000, 100000)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+_registry = []
+_collectors = []
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def format_labels(names, values, extra=None):
+    pairs = list(zip(names, values)) + (list(extra.items()) if extra else [])
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+class Counter:
+    """Monotonic counter with optional labels"""
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            lines.append(f'{self.name}{format_labels(self.label_names, labels)} {value}')
+        return lines
+
+
+class Histogram:
+    """Histogram with cumulative ``le`` buckets and optional labels"""
+
+    def __init__(self, name, documentation, labels=(), buckets=REQUEST_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def observe(self, value, *labels):
+        with self._lock:
+            series = self._values.get(labels)
+            if series is None:
+                series = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            counts = series[0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            else:
+                counts[-1] += 1
+            series[1] += value
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            items = sorted((labels, (list(series[0]), series[1])) for labels, series in self._values.items())
+        for labels, (counts, total) in items:
+            running = 0
+            for bound, count in zip(list(self.buckets) + ['+Inf'], counts):
+                running += count
+                le = format_labels(self.label_names, labels, {'le': bound})
+                lines.append(f'{self.name}_bucket{le} {running}')
+            label_text = format_labels(self.label_names, labels)
+            lines.append(f'{self.name}_sum{label_text} {total}')
+            lines.append(f'{self.name}_count{label_text} {running}')
+        return lines
+
+
+def collector(fn):
+    """Register ``fn() -> [(name, type, help, samples)]`` to be evaluated on
+    every scrape; ``samples`` is a list of ``(sample_name, labels_dict, value)``"""
+    _collectors.append(fn)
+    return fn
+
+
+def render():
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    for fn in _collectors:
+        try:
+            families = fn()
+        except Exception as e:
+            print(f"Metrics Collector Error: {str(e)}")
+            continue
+        for name, kind, documentation, samples in families:
+            lines.append(f'# HELP {name} {documentation}')
+            lines.append(f'# TYPE {name} {kind}')
+            for sample_name, labels, value in samples:
+                names = tuple(labels)
+                lines.append(f'{sample_name}{format_labels(names, [labels[n] for n in names])} {value}')
+    return '\n'.join(lines) + '\n'
+
+
+# HTTP
+REQUEST_LATENCY = Histogram(
+    'todo_http_request_duration_seconds', 'Time to produce a response, per route',
+    labels=('method', 'route', 'status'))
+
+# SQLite
+QUERY_LATENCY = Histogram(
+    'todo_sqlite_query_duration_seconds', 'Statement execution time (to the first row for queries)',
+    labels=('operation', 'table'), buckets=QUERY_BUCKETS)
+QUERY_ROWS = Histogram(
+    'todo_sqlite_query_rows', 'Rows fetched by queries and changed by writes',
+    labels=('operation', 'table'), buckets=ROW_BUCKETS)
+
+# Model
+LLM_TOKENS = Counter(
+    'todo_llm_tokens_total', 'Tokens reported by the model backend', labels=('kind',))
+
+# Chat commands
+CHAT_INTENTS = Counter(
+    'todo_chat_intents_total', 'Chat messages by matched task command intent', labels=('intent',))
+
+
+# Statement labels: the leading keyword and the first table it touches. Kept
+# to a fixed vocabulary so label cardinality stays bounded.
+STATEMENT_RE = re.compile(
+    r'^\s*(?:WITH\b.*?\)\s*)?(SELECT|INSERT|UPDATE|DELETE|REPLACE|PRAGMA|BEGIN|COMMIT|ROLLBACK|CREATE|DROP)\b'
+    r'(?:\s+(?:OR\s+\w+\s+)?(?=\w+\s+SET\b)|.*?\b(?:FROM|INTO|JOIN)\s+)?([A-Za-z_][A-Za-z0-9_]*)?',
+    re.IGNORECASE | re.DOTALL
+)
+_statement_labels = {}
+
+
+def statement_labels(sql):
+    labels = _statement_labels.get(sql)
+    if labels is None:
+        match = STATEMENT_RE.match(sql)
+        if match:
+            labels = (match.group(1).upper(), (match.group(2) or '').lower())
+        else:
+            labels = ('OTHER', '')
+        if len(_statement_labels) < 4096:
+            _statement_labels[sql] = labels
+    return labels
+
+
+class TracedCursor(sqlite3.Cursor):
+    """Cursor recording statement timings and row counts"""
+
+    def execute(self, sql, parameters=()):
+        self._labels = statement_labels(sql)
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            QUERY_LATENCY.observe(time.perf_counter() - start, *self._labels)
+            if self._labels[0] in ('INSERT', 'UPDATE', 'DELETE', 'REPLACE'):
+                QUERY_ROWS.observe(max(self.rowcount, 0), *self._labels)
+
+    def executemany(self, sql, seq_of_parameters):
+        self._labels = statement_labels(sql)
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            QUERY_LATENCY.observe(time.perf_counter() - start, *self._labels)
+            QUERY_ROWS.observe(max(self.rowcount, 0), *self._labels)
+
+    def fetchone(self):
+        row = super().fetchone()
+        if row is not None and getattr(self, '_labels', None):
+            QUERY_ROWS.observe(1, *self._labels)
+        return row
+
+    def fetchmany(self, size=None):
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        if getattr(self, '_labels', None):
+            QUERY_ROWS.observe(len(rows), *self._labels)
+        return rows
+
+    def fetchall(self):
+        rows = super().fetchall()
+        if getattr(self, '_labels', None):
+            QUERY_ROWS.observe(len(rows), *self._labels)
+        return rows
+
+
+class TracedConnection(sqlite3.Connection):
+    """Connection whose cursors (including ``conn.execute``) are traced"""
+
+    def cursor(self, factory=TracedCursor):
+        return super().cursor(factory)
+
+    # The C implementations of these shortcuts bypass cursor()
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
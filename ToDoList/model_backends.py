@@ -0,0 +1,133 @@
+"""
+Pluggable model backends.
+
+``AI_BACKEND=gemini`` (the default) talks to Google Gemini and needs
+GOOGLE_API_KEY. ``AI_BACKEND=fake`` is an in-process stand-in with
+configurable latency, streaming and error rate, so the app can be imported,
+benchmarked and load-tested without a key or network access. Both expose the
+``generate_content(prompt, generation_config=..., stream=..., request_options=...)``
+call the app uses.
+"""
+import json
+import os
+import random
+import re
+import threading
+import time
+
+AI_BACKEND = os.getenv('AI_BACKEND', 'gemini')
+GEMINI_MODEL = os.getenv('GEMINI_MODEL', 'gemini-1.5-flash')
+
+FAKE_MODEL_LATENCY = float(os.getenv('FAKE_MODEL_LATENCY', '0.05'))
+FAKE_MODEL_JITTER = float(os.getenv('FAKE_MODEL_JITTER', '0.2'))
+FAKE_MODEL_ERROR_RATE = float(os.getenv('FAKE_MODEL_ERROR_RATE', '0'))
+FAKE_MODEL_CHUNKS = int(os.getenv('FAKE_MODEL_CHUNKS', '8'))
+
+QUOTED_RE = re.compile(r'(?:said|message): "?(.+?)"?$', re.MULTILINE)
+NUMBERED_RE = re.compile(r'^(\d+)\. "(.+)"$', re.MULTILINE)
+
+
+def create_model(backend=None):
+    """Model object for ``backend`` (defaults to AI_BACKEND)"""
+    backend = backend or AI_BACKEND
+    if backend == 'fake':
+        return FakeModel()
+    if backend != 'gemini':
+        raise ValueError(f"Unknown AI_BACKEND: {backend}")
+
+    api_key = os.getenv('GOOGLE_API_KEY')
+    if not api_key:
+        raise ValueError("GOOGLE_API_KEY environment variable is not set")
+    import google.generativeai as genai
+    genai.configure(api_key=api_key)
+    return genai.GenerativeModel(GEMINI_MODEL)
+
+
+class ServiceUnavailable(Exception):
+    """Injected failure; named like the google.api_core error so the model
+    client treats it as transient"""
+
+
+class FakeUsage:
+    def __init__(self, prompt, text):
+        self.prompt_token_count = len(prompt) // 4 + 1
+        self.candidates_token_count = len(text) // 4 + 1
+
+
+class FakeResponse:
+    def __init__(self, text, usage_metadata=None):
+        self.text = text
+        self.usage_metadata = usage_metadata
+
+
+class FakeModel:
+    """Deterministic stand-in for ``genai.GenerativeModel``.
+
+    Each call sleeps ``latency`` seconds (+/- ``jitter`` as a fraction) and
+    fails with probability ``error_rate``. Suggestion prompts (single or
+    batch) get valid JSON back; everything else gets a short canned answer.
+    Streaming splits the answer into ``chunks`` pieces spread over the latency.
+    """
+
+    def __init__(self, latency=None, jitter=None, error_rate=None, chunks=None, seed=None):
+        self.latency = FAKE_MODEL_LATENCY if latency is None else latency
+        self.jitter = FAKE_MODEL_JITTER if jitter is None else jitter
+        self.error_rate = FAKE_MODEL_ERROR_RATE if error_rate is None else error_rate
+        self.chunks = max(1, FAKE_MODEL_CHUNKS if chunks is None else chunks)
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def _delay(self):
+        with self._lock:
+            self.calls += 1
+            factor = 1 + self._rng.uniform(-self.jitter, self.jitter)
+            failed = self._rng.random() < self.error_rate
+        return max(0.0, self.latency * factor), failed
+
+    @staticmethod
+    def suggest(topic):
+        return [
+            {'task': f'Outline the first steps for {topic}', 'priority': 'high'},
+            {'task': f'Schedule time to work on {topic}', 'priority': 'medium'},
+            {'task': f'Review progress on {topic}', 'priority': 'low'},
+        ]
+
+    def answer(self, prompt):
+        if 'numbered inputs' in prompt:
+            return json.dumps([
+                {'input': int(number), 'suggestions': self.suggest(topic)}
+                for number, topic in NUMBERED_RE.findall(prompt)
+            ])
+        if 'JSON array' in prompt:
+            match = QUOTED_RE.search(prompt)
+            return json.dumps(self.suggest(match.group(1) if match else 'your goal'))
+        return ('Focus on your high priority tasks first, break large tasks into '
+                'smaller steps, and review your progress at the end of each day.')
+
+    def generate_content(self, prompt, generation_config=None, stream=False, request_options=None, **kwargs):
+        delay, failed = self._delay()
+        timeout = (request_options or {}).get('timeout')
+        if timeout is not None and delay > timeout:
+            time.sleep(timeout)
+            raise TimeoutError(f'Fake model timed out after {timeout}s')
+        if failed:
+            time.sleep(delay / 2)
+            raise ServiceUnavailable('Injected fake model failure')
+
+        text = self.answer(prompt)
+        usage = FakeUsage(prompt, text)
+        if not stream:
+            time.sleep(delay)
+            return FakeResponse(text, usage)
+        return self._stream(text, delay, usage)
+
+    def _stream(self, text, delay, usage):
+        words = text.split(' ')
+        size = max(1, -(-len(words) // self.chunks))
+        for start in range(0, len(words), size):
+            time.sleep(delay / self.chunks)
+            piece = ' '.join(words[start:start + size])
+            last = start + size >= len(words)
+            # Like Gemini, the final chunk carries the usage totals
+            yield FakeResponse(piece if start == 0 else ' ' + piece, usage if last else None)
@@ -0,0 +1,258 @@
+"""
+Resilient wrapper around model calls: an overall deadline per call, retries
+with jittered exponential backoff for transient errors, and a circuit breaker
+that fails fast while the model service is down, so the AI endpoints drop to
+their fallback answers immediately instead of waiting out SDK timeouts.
+Latency histograms and breaker state are exposed through ``stats()``.
+"""
+import os
+import random
+import threading
+import time
+
+import llm_executor
+
+MODEL_DEADLINE = float(os.getenv('MODEL_DEADLINE', '20'))
+MODEL_ATTEMPT_TIMEOUT = float(os.getenv('MODEL_ATTEMPT_TIMEOUT', '10'))
+MODEL_RETRIES = int(os.getenv('MODEL_RETRIES', '2'))
+MODEL_BACKOFF = float(os.getenv('MODEL_BACKOFF', '0.5'))
+MODEL_BACKOFF_MAX = float(os.getenv('MODEL_BACKOFF_MAX', '4'))
+BREAKER_FAILURES = int(os.getenv('BREAKER_FAILURES', '5'))
+BREAKER_RESET = float(os.getenv('BREAKER_RESET', '30'))
+
+# Histogram bucket upper bounds in seconds
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30)
+
+# google.api_core exception class names worth retrying; matched by name so the
+# check works whichever SDK version raised them
+TRANSIENT_ERRORS = {
+    'DeadlineExceeded', 'ServiceUnavailable', 'InternalServerError',
+    'TooManyRequests', 'ResourceExhausted', 'Aborted', 'GatewayTimeout',
+    'RetryError',
+}
+
+
+class ModelUnavailable(Exception):
+    """The model could not produce an answer; callers use their fallback"""
+
+
+class CircuitOpen(ModelUnavailable):
+    """Raised without calling the model while the circuit breaker is open"""
+
+
+def is_transient(error):
+    if isinstance(error, (llm_executor.ExecutorTimeout, TimeoutError, ConnectionError)):
+        return True
+    return any(cls.__name__ in TRANSIENT_ERRORS for cls in type(error).__mro__)
+
+
+class CircuitBreaker:
+    """Classic closed / open / half-open breaker.
+
+    ``failure_threshold`` consecutive failures open the circuit; after
+    ``reset_timeout`` seconds one probe call is let through (half-open) and
+    its outcome closes or re-opens it.
+    """
+
+    def __init__(self, failure_threshold=BREAKER_FAILURES, reset_timeout=BREAKER_RESET):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._state = 'closed'
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._stats = {'opened': 0, 'short_circuited': 0}
+
+    def allow(self):
+        with self._lock:
+            if self._state == 'open' and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._state = 'half_open'
+            if self._state == 'closed':
+                return True
+            if self._state == 'half_open' and not self._probing:
+                self._probing = True
+                return True
+            self._stats['short_circuited'] += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._state = 'closed'
+            self._failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self._state == 'half_open' or self._failures >= self.failure_threshold:
+                if self._state != 'open':
+                    self._stats['opened'] += 1
+                self._state = 'open'
+                self._opened_at = time.monotonic()
+
+    def release(self):
+        """End a call that produced no verdict (e.g. rejected as busy)"""
+        with self._lock:
+            self._probing = False
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['state'] = self._state
+            stats['consecutive_failures'] = self._failures
+            if self._state == 'open':
+                stats['retry_in'] = round(max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at)), 1)
+        return stats
+
+
+class LatencyHistogram:
+    """Cumulative latency histogram (Prometheus-style ``le`` buckets)"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._counts = [0] * (len(buckets) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        with self._lock:
+            self._sum += seconds
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    self._counts[i] += 1
+                    break
+            else:
+                self._counts[-1] += 1
+
+    def snapshot(self):
+        with self._lock:
+            counts = list(self._counts)
+            total = self._sum
+        cumulative = {}
+        running = 0
+        for bound, count in zip(list(self.buckets) + ['+Inf'], counts):
+            running += count
+            cumulative[str(bound)] = running
+        return {'buckets': cumulative, 'count': running, 'sum': round(total, 4)}
+
+
+class ModelClient:
+    """Runs model calls on an ``LLMExecutor`` with deadlines, retries and a
+    circuit breaker.
+
+    The wrapped functions receive a ``request_timeout`` keyword with the
+    seconds the current attempt may take, to pass on to the SDK.
+    """
+
+    def __init__(self, executor, breaker=None, deadline=MODEL_DEADLINE,
+                 attempt_timeout=MODEL_ATTEMPT_TIMEOUT, retries=MODEL_RETRIES,
+                 backoff=MODEL_BACKOFF, backoff_max=MODEL_BACKOFF_MAX):
+        self.executor = executor
+        self.breaker = breaker or CircuitBreaker()
+        self.deadline = deadline
+        self.attempt_timeout = attempt_timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.latency = {'generate': LatencyHistogram(), 'stream': LatencyHistogram()}
+        self._lock = threading.Lock()
+        self._stats = {'calls': 0, 'successes': 0, 'failures': 0, 'retries': 0}
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def _admit(self):
+        if not self.breaker.allow():
+            raise CircuitOpen('Model circuit breaker is open')
+        self._count('calls')
+
+    def _finish(self, operation, start, error):
+        self.latency[operation].observe(time.perf_counter() - start)
+        if error is None:
+            self._count('successes')
+            self.breaker.record_success()
+            return
+        self._count('failures')
+        if is_transient(error):
+            self.breaker.record_failure()
+        else:
+            # The service answered (e.g. a blocked prompt); not an outage
+            self.breaker.record_success()
+
+    def _attempts(self, fn, args, kwargs, expires):
+        """Worker-side retry loop; runs inside the executor"""
+        attempt = 0
+        while True:
+            remaining = expires - time.monotonic()
+            try:
+                return fn(*args, request_timeout=max(0.1, min(self.attempt_timeout, remaining)), **kwargs)
+            except Exception as e:
+                if not is_transient(e) or attempt >= self.retries:
+                    raise
+                delay = random.uniform(0, min(self.backoff_max, self.backoff * 2 ** attempt))
+                if time.monotonic() + delay >= expires:
+                    raise
+                attempt += 1
+                self._count('retries')
+                time.sleep(delay)
+
+    def call(self, fn, *args, **kwargs):
+        """Result of ``fn(*args, **kwargs)``; raises ModelUnavailable (or
+        CircuitOpen) on failure and ExecutorBusy when the pool is full"""
+        self._admit()
+        start = time.perf_counter()
+        expires = time.monotonic() + self.deadline
+        try:
+            result = self.executor.call(self._attempts, fn, args, kwargs, expires, timeout=self.deadline)
+        except llm_executor.ExecutorBusy:
+            self.breaker.release()
+            raise
+        except Exception as e:
+            self._finish('generate', start, e)
+            raise ModelUnavailable(str(e)) from e
+        self._finish('generate', start, None)
+        return result
+
+    def stream(self, fn, *args, **kwargs):
+        """Iterator over ``fn(*args, **kwargs)``'s items; streams are not
+        retried since part of the answer may already have been sent. Close
+        the iterator when done with it, read or not."""
+        self._admit()
+        start = time.perf_counter()
+        try:
+            items = self.executor.stream(fn, *args, timeout=self.deadline,
+                                         request_timeout=self.deadline, **kwargs)
+        except llm_executor.ExecutorBusy:
+            self.breaker.release()
+            raise
+
+        finished = threading.Event()
+
+        def consume():
+            error = None
+            try:
+                yield from items
+            except Exception as e:
+                error = e
+                raise ModelUnavailable(str(e)) from e
+            finally:
+                finished.set()
+                self._finish('stream', start, error)
+
+        def release():
+            # Closed without being read: no verdict, but free a half-open probe
+            items.close()
+            if not finished.is_set():
+                self.breaker.release()
+
+        return llm_executor.Stream(consume(), release)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats['breaker'] = self.breaker.stats()
+        stats['latency'] = {name: hist.snapshot() for name, hist in self.latency.items()}
+        return stats
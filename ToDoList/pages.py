@@ -0,0 +1,150 @@
+"""
+Production serving of the dashboard: fingerprinted static assets and cached
+HTML fragments.
+
+``AssetManifest`` reads ``static/`` once at startup. Every file gets a URL
+with a content hash in its name (``css/style.3f2a9c1b7e4d.css``) and its
+gzip and, with the optional ``brotli`` package, brotli bodies are built
+then, so requests never compress. A changed file gets a new URL, so asset
+responses can be cached forever (``immutable``).
+
+``FragmentCache`` keeps the rendered stats and task-list parts of the page
+per tenant, tagged with the task revision (``tasks.current_version``) they
+were rendered at; a newer revision renders them again.
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+from collections import OrderedDict
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+import db
+
+ASSET_MAX_AGE = 365 * 24 * 3600
+# Types worth compressing; images other than SVG are compressed already
+COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json', 'image/svg+xml')
+MIN_COMPRESS_BYTES = 256
+DASHBOARD_CACHE_SIZE = int(os.getenv('DASHBOARD_CACHE_SIZE', '256'))
+
+
+def fingerprint(filename, digest):
+    root, ext = os.path.splitext(filename)
+    return f'{root}.{digest}{ext}'
+
+
+class Asset:
+    """One static file: its bodies per content coding and response headers"""
+
+    def __init__(self, filename, data):
+        self.filename = filename
+        self.digest = hashlib.sha256(data).hexdigest()[:12]
+        self.url_name = fingerprint(filename, self.digest)
+        self.mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        if self.mimetype.startswith('text/') or self.mimetype == 'application/javascript':
+            self.mimetype += '; charset=utf-8'
+        self.bodies = {'identity': data}
+        if len(data) >= MIN_COMPRESS_BYTES and self.mimetype.startswith(COMPRESSIBLE_TYPES):
+            candidates = {'gzip': gzip.compress(data, compresslevel=9, mtime=0)}
+            if brotli is not None:
+                candidates['br'] = brotli.compress(data, quality=11)
+            # Keep a coding only if it actually saves bytes
+            self.bodies.update((coding, body) for coding, body in candidates.items() if len(body) < len(data))
+
+    def negotiate(self, accept_encodings):
+        """Best available coding for an Accept-Encoding header"""
+        for coding in ('br', 'gzip'):
+            if coding in self.bodies and accept_encodings.quality(coding) > 0:
+                return coding
+        return 'identity'
+
+
+class AssetManifest:
+    """Fingerprinted URLs and precompressed bodies of the files in a
+    directory; empty (plain ``/static`` URLs) until ``build()``"""
+
+    def __init__(self):
+        self._assets = {}
+        self._by_url = {}
+        self.version = ''
+
+    def build(self, directory):
+        assets = {}
+        for root, _, files in os.walk(directory):
+            for name in files:
+                path = os.path.join(root, name)
+                filename = os.path.relpath(path, directory).replace(os.sep, '/')
+                with open(path, 'rb') as f:
+                    assets[filename] = Asset(filename, f.read())
+        self._assets = assets
+        self._by_url = {asset.url_name: asset for asset in assets.values()}
+        # Changes whenever any asset does: part of the dashboard's ETag
+        self.version = hashlib.sha256(
+            ''.join(sorted(asset.url_name for asset in assets.values())).encode()
+        ).hexdigest()[:12]
+        return self
+
+    @property
+    def enabled(self):
+        return bool(self._assets)
+
+    def url_name(self, filename):
+        """Fingerprinted name of ``filename``, or None if it is not an asset"""
+        asset = self._assets.get(filename)
+        return asset.url_name if asset else None
+
+    def get(self, url_name):
+        return self._by_url.get(url_name)
+
+    def stats(self):
+        sizes = {}
+        for asset in self._assets.values():
+            for coding, body in asset.bodies.items():
+                sizes[coding] = sizes.get(coding, 0) + len(body)
+        return {'assets': len(self._assets), 'version': self.version, 'bytes': sizes}
+
+
+class FragmentCache:
+    """Thread-safe LRU of rendered HTML fragments, one entry per tenant and
+    fragment name holding the revision it was rendered at"""
+
+    def __init__(self, max_entries=DASHBOARD_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    def get(self, name, version, render):
+        """The fragment ``name`` at ``version``, calling ``render()`` to
+        build it when the cached copy is older or missing"""
+        key = (db.current_tenant(), name)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                self._stats['hits'] += 1
+                return entry[1]
+            self._stats['misses'] += 1
+
+        html = render()
+        if self.max_entries <= 0:
+            return html
+        with self._lock:
+            entry = self._entries.get(key)
+            # A concurrent request may have stored a newer revision meanwhile
+            if entry is None or entry[0] <= version:
+                self._entries[key] = (version, html)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+        return html
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, entries=len(self._entries))
@@ -0,0 +1,104 @@
+"""
+Opt-in sampling profiler for slow requests.
+
+With PROFILE_SLOW_MS set, a background thread samples the stacks of threads
+that are serving requests every PROFILE_INTERVAL_MS. When a request takes at
+least PROFILE_SLOW_MS, its samples are written to a new file in PROFILE_DIR
+(one per slow request) in folded-stack format (``frame;frame;frame count``
+per line), ready for flamegraph.pl or speedscope. Threads not serving a
+request are never sampled.
+"""
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+PROFILE_SLOW_MS = float(os.getenv('PROFILE_SLOW_MS', '0'))
+PROFILE_INTERVAL_MS = float(os.getenv('PROFILE_INTERVAL_MS', '5'))
+PROFILE_DIR = os.getenv('PROFILE_DIR', 'profiles')
+MAX_DEPTH = 64
+
+
+def frame_name(frame):
+    code = frame.f_code
+    # Keep the parent directory so flask/app.py and our app.py stay apart
+    path = os.path.join(os.path.basename(os.path.dirname(code.co_filename)), os.path.basename(code.co_filename))
+    return f'{path}:{code.co_name}:{frame.f_lineno}'
+
+
+def fold(frame):
+    stack = []
+    while frame is not None and len(stack) < MAX_DEPTH:
+        stack.append(frame_name(frame))
+        frame = frame.f_back
+    return ';'.join(reversed(stack))
+
+
+class SlowRequestProfiler:
+    def __init__(self, slow_ms=PROFILE_SLOW_MS, interval_ms=PROFILE_INTERVAL_MS, directory=PROFILE_DIR):
+        self.slow_ms = slow_ms
+        self.interval = interval_ms / 1000
+        self.directory = directory
+        self.enabled = slow_ms > 0
+        self._active = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stats = {'profiled': 0, 'dumped': 0, 'samples': 0}
+
+    def _ensure_thread(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._sample, name='request-profiler', daemon=True)
+            self._thread.start()
+
+    def begin(self):
+        """Start sampling the calling thread"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._ensure_thread()
+            self._active[threading.get_ident()] = Counter()
+
+    def end(self, label, seconds):
+        """Stop sampling the calling thread; dump its stacks if slow"""
+        if not self.enabled:
+            return
+        with self._lock:
+            samples = self._active.pop(threading.get_ident(), None)
+            self._stats['profiled'] += 1
+        if samples and seconds * 1000 >= self.slow_ms:
+            self._dump(label, seconds, samples)
+
+    def _sample(self):
+        me = threading.get_ident()
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                if not self._active:
+                    continue
+                frames = sys._current_frames()
+                for ident, samples in self._active.items():
+                    frame = frames.get(ident)
+                    if frame is not None and ident != me:
+                        samples[fold(frame)] += 1
+                        self._stats['samples'] += 1
+
+    def _dump(self, label, seconds, samples):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            safe = ''.join(c if c.isalnum() else '_' for c in label).strip('_') or 'request'
+            name = f'{time.strftime("%Y%m%d-%H%M%S")}-{int(seconds * 1000)}ms-{safe}.folded'
+            with open(os.path.join(self.directory, name), 'w') as f:
+                for stack, count in samples.most_common():
+                    f.write(f'{stack} {count}\n')
+            with self._lock:
+                self._stats['dumped'] += 1
+        except OSError as e:
+            print(f"Profiler Dump Error: {str(e)}")
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats['enabled'] = self.enabled
+        stats['slow_ms'] = self.slow_ms
+        return stats
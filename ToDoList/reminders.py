@@ -0,0 +1,278 @@
+"""
+Due-date reminders and the upcoming-deadlines query.
+
+Pending tasks are read by due date with a range scan on
+``idx_todos_status_due_date`` (status, due_date), so a page of deadlines
+costs an index seek plus one step per row, whatever the size of the table.
+
+The scheduler keeps only the pending tasks due within REMINDER_HORIZON_DAYS
+(and those overdue by at most REMINDER_OVERDUE_DAYS) in a heap keyed on the
+moment each reminder fires: ``due_soon`` REMINDER_DUE_SOON_DAYS before the
+due date, ``overdue`` once the due date has passed. The thread sleeps until
+the earliest entry instead of polling, and publishes what fired as one
+``reminders`` event. Task changes wake it to reload.
+"""
+import heapq
+import os
+import threading
+from datetime import date, datetime, time, timedelta
+
+import db
+import tasks
+import workers
+
+REMINDER_HORIZON_DAYS = int(os.getenv('REMINDER_HORIZON_DAYS', '14'))
+REMINDER_OVERDUE_DAYS = int(os.getenv('REMINDER_OVERDUE_DAYS', '7'))
+REMINDER_DUE_SOON_DAYS = int(os.getenv('REMINDER_DUE_SOON_DAYS', '1'))
+# Longest sleep between checks for changes made by other processes
+REMINDER_CHECK_INTERVAL = float(os.getenv('REMINDER_CHECK_INTERVAL', '60'))
+
+DUE_PAGE_SIZE = 50
+MAX_DUE_PAGE_SIZE = 200
+DEFAULT_DUE_WITHIN = 7
+MAX_DUE_WITHIN = 366
+# Tasks per kind in one reminders event; the rest are in /api/todos/due
+MAX_EVENT_REMINDERS = 50
+
+DUE_COLUMNS = 'id, title, description, priority, status, due_date, created_at'
+
+
+def pending_due(conn, until, since=None, after=None, limit=None, columns=DUE_COLUMNS):
+    """Pending tasks due between ``since`` and ``until`` (ISO dates,
+    inclusive), soonest first and by id within a day.
+
+    ``after`` is the ``(due_date, id)`` of the last row of the previous
+    page. The order matches the index, so no sort step is needed; with
+    ``columns='id, due_date'`` the index alone answers the query.
+    """
+    conditions = ["status = 'pending'", 'due_date IS NOT NULL', 'due_date <= ?']
+    params = [until]
+    if since:
+        conditions.append('due_date >= ?')
+        params.append(since)
+    if after:
+        conditions.append('(due_date, id) > (?, ?)')
+        params.extend(after)
+    sql = f'''
+        SELECT {columns} FROM todos
+        WHERE {' AND '.join(conditions)}
+        ORDER BY due_date, id
+    '''
+    if limit is not None:
+        sql += ' LIMIT ?'
+        params.append(limit)
+    return conn.execute(sql, params).fetchall()
+
+
+def parse_due(value):
+    try:
+        return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def due_state(days_left, due_soon_days=REMINDER_DUE_SOON_DAYS):
+    if days_left is None:
+        return None
+    if days_left < 0:
+        return 'overdue'
+    return 'due_soon' if days_left <= due_soon_days else 'upcoming'
+
+
+def due_task(row, today):
+    task = dict(row)
+    due = parse_due(task['due_date'])
+    task['days_left'] = (due - today).days if due else None
+    task['state'] = due_state(task['days_left'])
+    return task
+
+
+def due_page(conn, within=DEFAULT_DUE_WITHIN, include_overdue=True, limit=DUE_PAGE_SIZE,
+             cursor=None, today=None):
+    """One page of pending tasks due within ``within`` days.
+
+    Returns ``(tasks, next_cursor)``; ``next_cursor`` is ``None`` on the
+    last page. Each task carries ``days_left`` and a ``state`` of
+    ``overdue``, ``due_soon`` or ``upcoming``.
+    """
+    today = today or date.today()
+    limit = max(1, min(limit, MAX_DUE_PAGE_SIZE))
+    after = tasks.decode_cursor(cursor) if cursor else None
+    rows = pending_due(
+        conn,
+        until=(today + timedelta(days=within)).isoformat(),
+        since=None if include_overdue else today.isoformat(),
+        after=after,
+        limit=limit + 1
+    )
+    page = [due_task(row, today) for row in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        next_cursor = tasks.encode_cursor(page[-1]['due_date'], page[-1]['id'])
+    return page, next_cursor
+
+
+def reminder_times(due, due_soon_days=REMINDER_DUE_SOON_DAYS):
+    """When the ``due_soon`` and ``overdue`` reminders of a due date fire"""
+    return (datetime.combine(due - timedelta(days=due_soon_days), time.min),
+            datetime.combine(due + timedelta(days=1), time.min))
+
+
+class ReminderScheduler(workers.BackgroundWorker):
+    """Background thread that publishes ``reminders`` events to ``broker``.
+
+    The heap holds ``(fire_at, kind, todo_id, due_date)``; only ids and due
+    dates are kept in memory, and the rows of fired reminders are read when
+    the event is built. Task changes are applied from ``todo_changes``
+    (entries made stale by them are skipped when popped); the whole window
+    is reloaded once a day. Each reminder of a due date is published once
+    per process. The thread stops while the tenant has no subscribers and
+    picks up where it left off on the next ``start()``. ``run_once()`` can
+    be called directly (in the tenant's context) with an explicit ``now``.
+    """
+
+    thread_name = 'reminder-scheduler'
+    error_label = 'Reminder Error'
+    run_on_start = True
+
+    def __init__(self, broker, tenant=None, horizon_days=REMINDER_HORIZON_DAYS,
+                 overdue_days=REMINDER_OVERDUE_DAYS, due_soon_days=REMINDER_DUE_SOON_DAYS,
+                 check_interval=REMINDER_CHECK_INTERVAL):
+        super().__init__(check_interval)
+        self.broker = broker
+        self.tenant = tenant
+        self.horizon_days = horizon_days
+        self.overdue_days = overdue_days
+        self.due_soon_days = due_soon_days
+        self.check_interval = max(1.0, check_interval)
+        self._run_lock = threading.Lock()
+        self._heap = []
+        self._due = {}
+        self._sent = set()
+        self._dirty = False
+        self._version = None
+        self._loaded_for = None
+        self._checked_at = None
+        self._stats.update(runs=0, reloads=0, updates=0, events=0, reminders=0)
+
+    def wake(self):
+        """Tasks changed: apply the changes before the next reminder fires"""
+        self._dirty = True
+        self._wake.set()
+
+    def _pending_tenants(self):
+        return (self.tenant,)
+
+    def _finished(self):
+        with self._lock:
+            if not self.broker.has_subscribers(self.tenant):
+                self._thread = None
+                return True
+        return False
+
+    def _timeout(self):
+        """Seconds until the earliest reminder, at most ``check_interval``"""
+        with self._run_lock:
+            wait = self.check_interval
+            if self._heap:
+                wait = min(wait, (self._heap[0][0] - datetime.now()).total_seconds())
+        return max(0.0, wait)
+
+    def run_once(self, now=None):
+        """Bring the heap up to date and publish every reminder that is due"""
+        now = now or datetime.now()
+        with self._run_lock:
+            self._stats['runs'] += 1
+            if self._loaded_for != now.date():
+                self._reload(now)
+            elif self._dirty or (now - self._checked_at).total_seconds() >= self.check_interval:
+                # Also picks up changes committed by other worker processes
+                self._update(now)
+
+            fired = {'overdue': [], 'due_soon': []}
+            while self._heap and self._heap[0][0] <= now:
+                _, kind, todo_id, due_date = heapq.heappop(self._heap)
+                if self._due.get(todo_id) != due_date or (todo_id, due_date, kind) in self._sent:
+                    continue
+                self._sent.add((todo_id, due_date, kind))
+                if kind == 'due_soon' and now >= reminder_times(parse_due(due_date), self.due_soon_days)[1]:
+                    continue
+                fired[kind].append(todo_id)
+        if not (fired['overdue'] or fired['due_soon']):
+            return fired
+
+        total = len(fired['overdue']) + len(fired['due_soon'])
+        shown = {kind: ids[:MAX_EVENT_REMINDERS] for kind, ids in fired.items()}
+        with db.connection() as conn:
+            ids = shown['overdue'] + shown['due_soon']
+            rows = conn.execute(f"""
+                SELECT {DUE_COLUMNS} FROM todos
+                WHERE id IN ({', '.join('?' * len(ids))})
+            """, ids).fetchall()
+        found = {row['id']: due_task(row, now.date()) for row in rows}
+        fired = {kind: [found[i] for i in ids if i in found] for kind, ids in shown.items()}
+        self._stats['events'] += 1
+        self._stats['reminders'] += total
+        self.broker.publish(dict(fired, type='reminders', total=total), self.tenant)
+        return fired
+
+    def _schedule(self, todo_id, due_date, now):
+        due = parse_due(due_date)
+        if due is None:
+            return
+        self._due[todo_id] = due_date
+        due_soon_at, overdue_at = reminder_times(due, self.due_soon_days)
+        heapq.heappush(self._heap, (overdue_at, 'overdue', todo_id, due_date))
+        if now < overdue_at:
+            heapq.heappush(self._heap, (due_soon_at, 'due_soon', todo_id, due_date))
+
+    def window(self, today):
+        return ((today - timedelta(days=self.overdue_days)).isoformat(),
+                (today + timedelta(days=self.horizon_days)).isoformat())
+
+    def _reload(self, now):
+        """Rebuild the heap from the index (at start and once a day)"""
+        self._dirty = False
+        since, until = self.window(now.date())
+        with db.connection() as conn:
+            version = tasks.current_version(conn)
+            rows = pending_due(conn, until, since, columns='id, due_date')
+
+        self._heap = []
+        self._due = {}
+        for todo_id, due_date in rows:
+            self._schedule(todo_id, due_date, now)
+        # Forget reminders of tasks that were completed, deleted or rescheduled
+        self._sent = {key for key in self._sent if self._due.get(key[0]) == key[1]}
+        self._version = version
+        self._loaded_for = now.date()
+        self._checked_at = now
+        self._stats['reloads'] += 1
+
+    def _update(self, now):
+        """Apply the task changes made since the heap was built"""
+        self._dirty = False
+        self._checked_at = now
+        since, until = self.window(now.date())
+        with db.connection() as conn:
+            changed, deleted, version, has_more = tasks.changes_since(
+                conn, self._version, ['id', 'status', 'due_date'])
+        if has_more:
+            self._reload(now)
+            return
+        for todo_id in deleted:
+            self._due.pop(todo_id, None)
+        for task in changed:
+            due_date = task['due_date']
+            if task['status'] != 'pending' or not due_date or not since <= due_date <= until:
+                self._due.pop(task['id'], None)
+            elif self._due.get(task['id']) != due_date:
+                self._schedule(task['id'], due_date, now)
+        self._version = version
+        if changed or deleted:
+            self._stats['updates'] += 1
+
+    def stats(self):
+        stats = super().stats()
+        stats['scheduled'] = len(self._due)
+        return stats
@@ -0,0 +1,217 @@
+"""
+Full-text search backed by the todos_fts and chat_messages_fts FTS5 indexes:
+chat command task lookup and the /api/search endpoint
+"""
+import html
+import os
+import re
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+# Words left out of any-word (OR) queries; they match nearly every task and
+# say nothing about which one is meant
+STOPWORDS = frozenset('''
+    a about all am an and any are as at be been but by can could did do does
+    for from had has have how i if in into is it its just me my no not of on
+    or our please should so some than that the their them then there these
+    they this to up us was we were what when where which who why will with
+    would you your
+'''.split())
+
+# How many bm25-ranked candidates are rescored for the final pick
+CANDIDATE_LIMIT = 20
+# Chat lookups rank at most this many matches, the newest first: bm25 has to
+# score every row it is given, and an OR of common words matches most tasks
+MATCH_LIMIT = int(os.getenv('SEARCH_MATCH_LIMIT', '1000'))
+# Minimum match score for completing a task by name
+COMPLETE_MIN_SCORE = 0.3
+
+# /api/search paging
+SEARCH_PAGE_SIZE = 10
+MAX_SEARCH_PAGE_SIZE = 50
+MAX_SEARCH_OFFSET = 500
+SEARCH_SCOPES = ('tasks', 'chat')
+SNIPPET_TOKENS = 16
+
+# Match markers for highlight()/snippet(); control characters can't come
+# from the tokenizer, so they survive html.escape and are swapped for <mark>
+MARK_START = '\x02'
+MARK_END = '\x03'
+
+
+def fts_query(text, require_all=False, prefix=False):
+    """Turn free text into a safe FTS5 query of quoted terms.
+
+    Any-word queries skip stopwords unless the text has nothing else.
+    """
+    tokens = TOKEN_RE.findall(text.lower())
+    if not tokens:
+        return None
+    if not require_all:
+        tokens = [t for t in tokens if t not in STOPWORDS] or tokens
+    joiner = ' AND ' if require_all else ' OR '
+    suffix = '*' if prefix else ''
+    return joiner.join(f'"{token}"{suffix}' for token in tokens)
+
+
+def match_score(search, title, description):
+    """Score how well a search phrase matches a task.
+
+    A substring hit in the title or description scores by how much of the
+    title it covers; otherwise the share of search words found in the
+    title, weighted down by 0.7.
+    """
+    title_lower = title.lower()
+    desc_lower = (description or '').lower()
+    if search in title_lower or search in desc_lower:
+        return len(search) / max(len(title_lower), 1)
+    words = search.split()
+    if not words:
+        return 0
+    words_matched = sum(1 for word in words if word in title_lower)
+    return words_matched / len(words) * 0.7
+
+
+def find_task(conn, search, pending_only=False, require_all=False, min_score=0):
+    """Best task for a chat command's search phrase, or ``None``.
+
+    Candidates come from the FTS index ranked by bm25 (title weighted over
+    description); the top few are rescored with ``match_score`` and ties
+    keep the bm25 order.
+    """
+    search = search.lower().strip()
+    if not TOKEN_RE.search(search):
+        return None
+
+    # Cheapest and most selective first: every word exactly, then every word
+    # as a prefix ("groc" -> "groceries"), then any word
+    tiers = [(True, False), (True, True)]
+    if not require_all:
+        tiers.append((False, False))
+    candidates = []
+    for all_words, prefix in tiers:
+        candidates = fts_candidates(conn, fts_query(search, all_words, prefix), pending_only)
+        if candidates:
+            break
+
+    best = None
+    best_score = min_score
+    for row in candidates:
+        score = match_score(search, row['title'], row['description'])
+        if score > best_score:
+            best, best_score = row, score
+    return best
+
+
+def recent_matches(pending_only=False):
+    """The newest MATCH_LIMIT matches with their bm25 score. FTS5 walks the
+    index in rowid order and stops at the limit, so only those rows are
+    scored. The status filter applies before the limit, so old pending
+    tasks are not crowded out by newer completed ones."""
+    status = "AND t.status != 'completed'" if pending_only else ''
+    return f'''
+        SELECT t.id, bm25(todos_fts, 10.0, 1.0) AS score
+        FROM todos_fts
+        JOIN todos t ON t.id = todos_fts.rowid
+        WHERE todos_fts MATCH ? {status}
+        ORDER BY todos_fts.rowid DESC
+        LIMIT ?
+    '''
+
+
+def fts_candidates(conn, query, pending_only):
+    return conn.execute(f'''
+        SELECT t.id, t.title, t.description, t.status, t.priority
+        FROM ({recent_matches(pending_only)}) m
+        JOIN todos t ON t.id = m.id
+        ORDER BY m.score
+        LIMIT ?
+    ''', (query, MATCH_LIMIT, CANDIDATE_LIMIT)).fetchall()
+
+
+def search_tasks(conn, text, limit=20):
+    """Tasks matching any word of ``text`` other than stopwords, best bm25
+    match among the newest MATCH_LIMIT matches first"""
+    query = fts_query(text)
+    if not query:
+        return []
+    return conn.execute(f'''
+        SELECT t.id, t.title, t.description, t.priority, t.status, t.due_date, t.created_at
+        FROM ({recent_matches()}) m
+        JOIN todos t ON t.id = m.id
+        ORDER BY m.score
+        LIMIT ?
+    ''', (query, MATCH_LIMIT, limit)).fetchall()
+
+
+def marked_html(text):
+    """Escape FTS highlight output and turn its markers into <mark> tags"""
+    return (html.escape(text or '')
+            .replace(MARK_START, '<mark>')
+            .replace(MARK_END, '</mark>'))
+
+
+def marked_params(query, **params):
+    return dict(params, query=query, start=MARK_START, end=MARK_END, tokens=SNIPPET_TOKENS)
+
+
+def search_todos(conn, text, limit=SEARCH_PAGE_SIZE, offset=0, status=None):
+    """Ranked, highlighted task matches for search-as-you-type.
+
+    Every word must match, as a prefix, in the title or description.
+    Returns ``(results, has_more)``.
+    """
+    query = fts_query(text, require_all=True, prefix=True)
+    if not query:
+        return [], False
+    sql = '''
+        SELECT t.id, t.title, t.description, t.priority, t.status, t.due_date, t.created_at,
+               highlight(todos_fts, 0, :start, :end) AS title_marked,
+               snippet(todos_fts, 1, :start, :end, '…', :tokens) AS description_marked
+        FROM todos_fts
+        JOIN todos t ON t.id = todos_fts.rowid
+        WHERE todos_fts MATCH :query
+    '''
+    if status:
+        sql += ' AND t.status = :status'
+    sql += ' ORDER BY bm25(todos_fts, 10.0, 1.0) LIMIT :limit OFFSET :offset'
+    rows = conn.execute(sql, marked_params(query, status=status, limit=limit + 1, offset=offset)).fetchall()
+
+    results = [{
+        'id': row['id'],
+        'title': row['title'],
+        'description': row['description'],
+        'priority': row['priority'],
+        'status': row['status'],
+        'due_date': row['due_date'],
+        'created_at': row['created_at'],
+        'title_html': marked_html(row['title_marked']),
+        'description_html': marked_html(row['description_marked']) if row['description'] else '',
+    } for row in rows[:limit]]
+    return results, len(rows) > limit
+
+
+def search_chat(conn, text, limit=SEARCH_PAGE_SIZE, offset=0):
+    """Ranked chat messages matching every word of ``text`` (as prefixes),
+    with a highlighted snippet of each side. Returns ``(results, has_more)``."""
+    query = fts_query(text, require_all=True, prefix=True)
+    if not query:
+        return [], False
+    rows = conn.execute('''
+        SELECT m.id, m.created_at,
+               snippet(chat_messages_fts, 0, :start, :end, '…', :tokens) AS user_marked,
+               snippet(chat_messages_fts, 1, :start, :end, '…', :tokens) AS ai_marked
+        FROM chat_messages_fts
+        JOIN chat_messages m ON m.id = chat_messages_fts.rowid
+        WHERE chat_messages_fts MATCH :query
+        ORDER BY bm25(chat_messages_fts, 2.0, 1.0)
+        LIMIT :limit OFFSET :offset
+    ''', marked_params(query, limit=limit + 1, offset=offset)).fetchall()
+
+    results = [{
+        'id': row['id'],
+        'created_at': row['created_at'],
+        'user_message_html': marked_html(row['user_marked']),
+        'ai_response_html': marked_html(row['ai_marked']),
+    } for row in rows[:limit]]
+    return results, len(rows) > limit
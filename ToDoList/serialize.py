@@ -0,0 +1,77 @@
+"""
+JSON encoding for API responses.
+
+Two fast paths, both on by default:
+
+- Task lists are encoded by SQLite: ``json_object()`` turns each row into
+  its JSON text inside the query, and the route joins those texts into the
+  response body, so no ``Row``, ``dict`` or encoder pass per row exists in
+  Python. The JSON lines export streams them in ``fetchmany`` batches.
+- Everything else goes through ``JSONProvider``, the app's ``jsonify``
+  encoder, which uses ``orjson`` when it is installed (optional dependency;
+  JSON_BACKEND=json forces the standard library).
+"""
+import json
+import os
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+JSON_BACKEND = os.getenv('JSON_BACKEND', 'orjson' if orjson else 'json')
+if JSON_BACKEND == 'orjson' and orjson is None:
+    print("Warning: JSON_BACKEND=orjson but orjson is not installed; using json")
+    JSON_BACKEND = 'json'
+
+USE_ORJSON = JSON_BACKEND == 'orjson'
+if USE_ORJSON:
+    # Dates and non-dict objects fall back to Flask's encoder, as with json
+    ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+
+def dumps(obj):
+    """Compact JSON text; non-ASCII characters are written as-is"""
+    if USE_ORJSON:
+        return orjson.dumps(obj, option=ORJSON_OPTIONS).decode()
+    return json.dumps(obj, separators=(',', ':'), ensure_ascii=False)
+
+
+class JSONProvider(DefaultJSONProvider):
+    """Flask's JSON provider with orjson for ``jsonify`` bodies.
+
+    Output matches the default provider apart from non-ASCII characters,
+    which are sent as UTF-8 instead of ``\\u`` escapes. Calls with extra
+    ``json.dumps`` arguments (and pretty-printing in debug mode) keep the
+    standard library.
+    """
+
+    def dumps(self, obj, **kwargs):
+        if not USE_ORJSON or kwargs:
+            return super().dumps(obj, **kwargs)
+        return self._orjson(obj).decode()
+
+    def response(self, *args, **kwargs):
+        if not USE_ORJSON or self.compact is False or (self.compact is None and self._app.debug):
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self._orjson(obj) + b'\n', mimetype=self.mimetype)
+
+    def _orjson(self, obj):
+        option = ORJSON_OPTIONS | (orjson.OPT_SORT_KEYS if self.sort_keys else 0)
+        return orjson.dumps(obj, default=self.default, option=option)
+
+
+def json_object_sql(fields):
+    """``json_object('id', id, 'title', title, ...)`` for trusted column names"""
+    return 'json_object(' + ', '.join(f"'{f}', {f}" for f in fields) + ')'
+
+
+def envelope(fields, key, items):
+    """JSON text of ``fields`` plus ``key`` holding ``items``, a list of
+    already encoded JSON values"""
+    head = dumps(dict(fields, **{key: []}))
+    # dumps() ends a dict whose last key is ``key`` with ``[]}``
+    return f"{head[:-3]}[{','.join(items)}]}}"
@@ -1,11 +1,52 @@
 // AI To-Do App JavaScript
 let currentTasks = [];
 let currentFilter = 'all';
+let nextCursor = null;
+
+// Local cache of the loaded task pages, kept current with ?since= deltas
+const taskCache = new Map();
+let syncVersion = 0;
+
+// Server-pushed task/stats events (/api/events)
+let liveUpdates = null;
+
+// Keyset cursor for older chat history (null once everything is loaded)
+let chatHistoryBefore = null;
+let loadingChatHistory = false;
+const CHAT_HISTORY_PAGE_SIZE = 20;
+
+// Search-as-you-type: wait for a pause in typing, drop superseded requests
+const SEARCH_DEBOUNCE_MS = 250;
+const SEARCH_MIN_LENGTH = 2;
+let searchTimer = null;
+let searchController = null;
+let searchQuery = '';
+const searchTaskResults = new Map();
+
+// Upcoming deadlines card: overdue tasks plus those due within a week
+const DUE_WITHIN_DAYS = 7;
+const DUE_LIST_SIZE = 10;
+let dueTaskIds = new Set();
+
+// Columns the task list needs; the server projects only these
+const TASK_LIST_FIELDS = 'id,title,description,priority,status,due_date,created_at';
+const TASK_PAGE_SIZE = 50;
+
+// Server-side query parameters for each task filter
+const TASK_FILTERS = {
+    all: {},
+    pending: { status: 'pending' },
+    completed: { status: 'completed' },
+    high: { priority: 'high' }
+};
 
 // Initialize the app when DOM is loaded
 document.addEventListener('DOMContentLoaded', function() {
     initializeApp();
-    loadTasks();
+    // Subscribe once the first page (and its version) is in
+    loadTasks().then(connectLiveUpdates);
+    loadDueTasks();
+    loadChatHistory();
     
     // Add event listeners
     document.getElementById('quickAddForm').addEventListener('submit', handleQuickAdd);
@@ -14,6 +55,15 @@ document.addEventListener('DOMContentLoaded', function() {
             sendChatMessage();
         }
     });
+    document.getElementById('searchInput').addEventListener('input', function(e) {
+        clearTimeout(searchTimer);
+        searchTimer = setTimeout(() => runSearch(e.target.value.trim()), SEARCH_DEBOUNCE_MS);
+    });
+    document.getElementById('chatMessages').addEventListener('scroll', function(e) {
+        if (e.target.scrollTop === 0 && chatHistoryBefore) {
+            loadChatHistory(chatHistoryBefore);
+        }
+    });
 });
 
 function initializeApp() {
@@ -23,21 +73,215 @@ function initializeApp() {
     addChatMessage('AI', 'Hello! I\'m your AI assistant. I can help you manage your tasks using natural language! Try commands like:\n\n• "Create a new task: Buy groceries"\n• "Add task: Call dentist with high priority"\n• "Mark shopping as completed"\n• "Delete task about meeting"\n\nI can also provide productivity insights and chat about your goals. How can I help you today?', true);
 }
 
+function buildTaskQuery(cursor = null) {
+    const params = new URLSearchParams({
+        ...(TASK_FILTERS[currentFilter] || {}),
+        fields: TASK_LIST_FIELDS,
+        limit: TASK_PAGE_SIZE
+    });
+    if (cursor) {
+        params.set('cursor', cursor);
+    }
+    return params.toString();
+}
+
+async function fetchTaskPage(cursor = null) {
+    const response = await fetch(`/api/todos?${buildTaskQuery(cursor)}`);
+    const result = await response.json();
+    if (!result.success) {
+        throw new Error(result.error || 'Error loading tasks');
+    }
+    return result;
+}
+
 async function loadTasks() {
     try {
-        const response = await fetch('/api/todos');
-        const tasks = await response.json();
-        currentTasks = tasks;
-        renderTasks(tasks);
-        updateStats();
+        const page = await fetchTaskPage();
+        taskCache.clear();
+        page.todos.forEach(task => taskCache.set(task.id, task));
+        currentTasks = page.todos;
+        nextCursor = page.next_cursor;
+        syncVersion = page.version;
+        renderTasks(currentTasks);
+        forceRefreshStats();
     } catch (error) {
         console.error('Error loading tasks:', error);
         showNotification('Error loading tasks', 'error');
     }
 }
 
+async function loadMoreTasks() {
+    if (!nextCursor) return;
+    
+    try {
+        const page = await fetchTaskPage(nextCursor);
+        page.todos.forEach(task => taskCache.set(task.id, task));
+        currentTasks = currentTasks.concat(page.todos);
+        nextCursor = page.next_cursor;
+        renderTasks(currentTasks);
+    } catch (error) {
+        console.error('Error loading more tasks:', error);
+        showNotification('Error loading tasks', 'error');
+    }
+}
+
+// Fetch only what changed since the last sync and patch the local cache
+async function syncTasks() {
+    try {
+        let hasMore = true;
+        while (hasMore) {
+            const params = new URLSearchParams({ since: syncVersion, fields: TASK_LIST_FIELDS });
+            const response = await fetch(`/api/todos?${params}`);
+            const delta = await response.json();
+            if (!delta.success) {
+                throw new Error(delta.error || 'Error syncing tasks');
+            }
+            applyTaskDelta(delta);
+            syncVersion = delta.version;
+            hasMore = delta.has_more;
+        }
+        renderTasks(currentTasks);
+        forceRefreshStats();
+    } catch (error) {
+        console.error('Error syncing tasks:', error);
+        loadTasks();
+    }
+}
+
+function connectLiveUpdates() {
+    if (!window.EventSource || liveUpdates) return;
+    
+    // EventSource reconnects by itself; each connection starts with hello
+    liveUpdates = new EventSource('/api/events');
+    liveUpdates.onmessage = function(e) {
+        const event = JSON.parse(e.data);
+        if (event.type === 'hello' || event.type === 'resync') {
+            if (event.type === 'resync' || event.version > syncVersion) {
+                syncTasks();
+                loadDueTasks();
+            }
+        } else if (event.type === 'tasks') {
+            if (affectsDueTasks(event)) {
+                loadDueTasks();
+            }
+            if (event.version <= syncVersion) return;
+            if (event.since > syncVersion) {
+                // Missed events in between; fetch the gap
+                syncTasks();
+                return;
+            }
+            // Rows carry their current contents, so overlapping deltas are safe
+            applyTaskDelta(event);
+            syncVersion = event.version;
+            renderTasks(currentTasks);
+        } else if (event.type === 'stats') {
+            updateStats(event.stats);
+        } else if (event.type === 'reminders') {
+            showNotification(reminderMessage(event), 'warning');
+            loadDueTasks();
+        }
+    };
+}
+
+// After this tab changes something: the event stream brings the change
+// (to every open tab); without it, fetch the delta directly
+function refreshAfterMutation() {
+    if (!liveUpdates || liveUpdates.readyState !== EventSource.OPEN) {
+        syncTasks();
+        loadDueTasks();
+    }
+}
+
+async function loadDueTasks() {
+    try {
+        const response = await fetch(`/api/todos/due?within=${DUE_WITHIN_DAYS}&limit=${DUE_LIST_SIZE}`);
+        const result = await response.json();
+        if (result.success) {
+            renderDueTasks(result.todos, result.next_cursor);
+        }
+    } catch (error) {
+        console.error('Error loading due tasks:', error);
+    }
+}
+
+function renderDueTasks(tasks, hasMore) {
+    dueTaskIds = new Set(tasks.map(task => task.id));
+    document.getElementById('dueTasksCard').classList.toggle('d-none', tasks.length === 0);
+    document.getElementById('dueTasksList').innerHTML = tasks.map(task => `
+        <div class="due-item due-${task.state} d-flex justify-content-between align-items-center">
+            <span>${escapeHtml(task.title)}</span>
+            <small class="due-label">${dueLabel(task.days_left)}</small>
+        </div>
+    `).join('') + (hasMore ? '<small class="text-muted">More deadlines coming up...</small>' : '');
+}
+
+function dueLabel(daysLeft) {
+    if (daysLeft < 0) return `${-daysLeft} day${daysLeft === -1 ? '' : 's'} overdue`;
+    if (daysLeft === 0) return 'Due today';
+    if (daysLeft === 1) return 'Due tomorrow';
+    return `Due in ${daysLeft} days`;
+}
+
+// Only deltas touching a dated task (or one on the card) change the card
+function affectsDueTasks(delta) {
+    return delta.changed.some(task => task.due_date || dueTaskIds.has(task.id)) ||
+        delta.deleted.some(id => dueTaskIds.has(id));
+}
+
+function reminderMessage(event) {
+    const parts = [];
+    if (event.overdue.length) {
+        parts.push(`Overdue: ${event.overdue.map(task => escapeHtml(task.title)).join(', ')}`);
+    }
+    if (event.due_soon.length) {
+        parts.push(`Due soon: ${event.due_soon.map(task => escapeHtml(task.title)).join(', ')}`);
+    }
+    return `<i class="fas fa-clock"></i> ${parts.join('<br>')}`;
+}
+
+function applyTaskDelta(delta) {
+    delta.deleted.forEach(id => taskCache.delete(id));
+    delta.changed.forEach(task => {
+        if (matchesCurrentFilter(task) && isWithinLoadedPages(task)) {
+            taskCache.set(task.id, task);
+        } else {
+            taskCache.delete(task.id);
+        }
+    });
+    currentTasks = Array.from(taskCache.values()).sort(compareTasks);
+}
+
+// Same order as the server: newest first, ties broken by id
+function compareTasks(a, b) {
+    if (a.created_at !== b.created_at) {
+        return a.created_at < b.created_at ? 1 : -1;
+    }
+    return b.id - a.id;
+}
+
+function matchesCurrentFilter(task) {
+    const filter = TASK_FILTERS[currentFilter] || {};
+    return Object.entries(filter).every(([key, value]) => task[key] === value);
+}
+
+// Tasks older than the last loaded row belong to a page not fetched yet
+function isWithinLoadedPages(task) {
+    if (!nextCursor || currentTasks.length === 0) {
+        return true;
+    }
+    return compareTasks(task, currentTasks[currentTasks.length - 1]) <= 0;
+}
+
+function updateLoadMoreButton() {
+    const loadMore = document.getElementById('loadMoreTasks');
+    if (loadMore) {
+        loadMore.classList.toggle('d-none', !nextCursor);
+    }
+}
+
 function renderTasks(tasks) {
     const tasksList = document.getElementById('tasksList');
+    updateLoadMoreButton();
     
     if (!tasks || tasks.length === 0) {
         tasksList.innerHTML = `
@@ -91,11 +335,79 @@ function renderTasks(tasks) {
     `).join('');
 }
 
-function updateStats() {
-    const totalTasks = currentTasks.length;
-    const completedTasks = currentTasks.filter(t => t.status === 'completed').length;
-    const pendingTasks = totalTasks - completedTasks;
-    const completionRate = totalTasks > 0 ? Math.round((completedTasks / totalTasks) * 100) : 0;
+async function runSearch(query, scope = null, offset = 0) {
+    const resultsDiv = document.getElementById('searchResults');
+    if (query.length < SEARCH_MIN_LENGTH) {
+        if (searchController) searchController.abort();
+        resultsDiv.classList.add('d-none');
+        resultsDiv.innerHTML = '';
+        return;
+    }
+    
+    if (searchController) searchController.abort();
+    searchController = new AbortController();
+    searchQuery = query;
+    
+    try {
+        const params = new URLSearchParams({ q: query });
+        if (scope) {
+            params.set('scope', scope);
+            params.set('offset', offset);
+        }
+        const response = await fetch(`/api/search?${params}`, { signal: searchController.signal });
+        const result = await response.json();
+        if (!result.success) return;
+        
+        if (offset === 0) {
+            searchTaskResults.clear();
+            resultsDiv.innerHTML = renderSearchSection('tasks', 'Tasks', result.tasks) +
+                renderSearchSection('chat', 'Chat history', result.chat);
+        } else {
+            const section = resultsDiv.querySelector(`[data-scope="${scope}"]`);
+            section.querySelector('.search-more')?.remove();
+            section.insertAdjacentHTML('beforeend', renderSearchItems(scope, result[scope]));
+        }
+        resultsDiv.classList.remove('d-none');
+    } catch (error) {
+        if (error.name !== 'AbortError') {
+            console.error('Error searching:', error);
+        }
+    }
+}
+
+function renderSearchSection(scope, label, page) {
+    if (!page) return '';
+    const items = page.results.length ? renderSearchItems(scope, page)
+        : '<div class="search-result text-muted small">No matches</div>';
+    return `<div data-scope="${scope}"><h6 class="text-muted small text-uppercase mt-2">${label}</h6>${items}</div>`;
+}
+
+// The *_html fields are escaped on the server, apart from the <mark> tags
+function renderSearchItems(scope, page) {
+    if (scope === 'tasks') {
+        page.results.forEach(task => searchTaskResults.set(task.id, task));
+    }
+    const items = page.results.map(item => scope === 'tasks' ? `
+        <div class="search-result" onclick="editTask(${item.id})">
+            <span class="badge priority-${item.priority} mr-2">${item.priority}</span>
+            <span class="${item.status === 'completed' ? 'text-muted text-decoration-line-through' : ''}">${item.title_html}</span>
+            ${item.description_html ? `<div class="small text-muted">${item.description_html}</div>` : ''}
+        </div>` : `
+        <div class="search-result small">
+            <div><strong>You:</strong> ${item.user_message_html}</div>
+            <div class="text-muted"><strong>AI:</strong> ${item.ai_response_html}</div>
+        </div>`).join('');
+    const more = page.next_offset === null ? '' : `
+        <button type="button" class="btn btn-sm btn-link search-more"
+                onclick="runSearch(searchQuery, '${scope}', ${page.next_offset})">More</button>`;
+    return items + more;
+}
+
+function updateStats(stats) {
+    const totalTasks = stats.total_tasks;
+    const completedTasks = stats.completed_tasks;
+    const pendingTasks = stats.pending_tasks;
+    const completionRate = Math.round(stats.completion_rate);
     
     console.log(`Stats: Total: ${totalTasks}, Completed: ${completedTasks}, Rate: ${completionRate}%`);
     
@@ -125,24 +437,17 @@ function updateStats() {
     });
 }
 
-// Force refresh stats from server
+// Force refresh stats from server (aggregated server-side, not from the task list)
 async function forceRefreshStats() {
     try {
-        const response = await fetch('/api/todos');
-        const tasks = await response.json();
-        
-        const totalTasks = tasks.length;
-        const completedTasks = tasks.filter(t => t.status === 'completed').length;
-        const pendingTasks = totalTasks - completedTasks;
-        const completionRate = totalTasks > 0 ? Math.round((completedTasks / totalTasks) * 100) : 0;
-        
-        console.log('Force refresh stats:', { totalTasks, completedTasks, pendingTasks, completionRate });
+        const response = await fetch('/api/stats');
+        const result = await response.json();
         
-        // Update the global currentTasks and call updateStats
-        currentTasks = tasks;
-        updateStats();
+        if (result.success) {
+            updateStats(result.stats);
+        }
         
-        return { totalTasks, completedTasks, pendingTasks, completionRate };
+        return result.stats;
     } catch (error) {
         console.error('Error force refreshing stats:', error);
     }
@@ -178,7 +483,7 @@ async function handleQuickAdd(e) {
         if (result.success) {
             document.getElementById('quickAddForm').reset();
             showNotification('Task added successfully!', 'success');
-            loadTasks();
+            refreshAfterMutation();
         } else {
             showNotification('Error adding task', 'error');
         }
@@ -189,7 +494,8 @@ async function handleQuickAdd(e) {
 }
 
 async function toggleTaskStatus(taskId, isCompleted) {
-    const task = currentTasks.find(t => t.id === taskId);
+    // Search results can point at tasks outside the loaded pages
+    const task = currentTasks.find(t => t.id === taskId) || searchTaskResults.get(taskId);
     if (!task) return;
     
     const newStatus = isCompleted ? 'completed' : 'pending';
@@ -210,7 +516,7 @@ async function toggleTaskStatus(taskId, isCompleted) {
         
         if (result.success) {
             showNotification(isCompleted ? 'Task completed!' : 'Task reopened!', 'success');
-            loadTasks();
+            refreshAfterMutation();
         } else {
             showNotification('Error updating task', 'error');
         }
@@ -248,7 +554,7 @@ async function saveTaskEdit() {
         return;
     }
     
-    const task = currentTasks.find(t => t.id == taskId);
+    const task = currentTasks.find(t => t.id == taskId) || searchTaskResults.get(Number(taskId));
     if (!task) return;
     
     try {
@@ -270,7 +576,7 @@ async function saveTaskEdit() {
         
         if (result.success) {
             showNotification('Task updated successfully!', 'success');
-            loadTasks();
+            refreshAfterMutation();
             
             // Hide the modal
             const modal = bootstrap.Modal.getInstance(document.getElementById('editTaskModal'));
@@ -298,7 +604,7 @@ async function deleteTask(taskId) {
         
         if (result.success) {
             showNotification('Task deleted successfully!', 'success');
-            loadTasks();
+            refreshAfterMutation();
         } else {
             showNotification('Error deleting task', 'error');
         }
@@ -322,7 +628,7 @@ async function sendChatMessage() {
     addChatMessage('AI', 'Thinking...', true, true);
     
     try {
-        const response = await fetch('/api/chat', {
+        const response = await fetch('/api/chat/stream', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
@@ -332,31 +638,42 @@ async function sendChatMessage() {
             })
         });
         
-        const result = await response.json();
+        if (response.status === 429) {
+            // Model workers are saturated; the server says when to retry
+            const result = await response.json();
+            removeLoadingMessage();
+            addChatMessage('AI', result.error, true);
+            return;
+        }
         
-        // Remove loading message
-        removeLoadingMessage();
+        if (!response.ok || !response.body) {
+            removeLoadingMessage();
+            addChatMessage('AI', 'Sorry, I encountered an error. Please try again.', true);
+            return;
+        }
         
-        if (result.success) {
-            addChatMessage('AI', result.response, true);
-            
-            // If an action was performed, refresh the task list
-            if (result.action_performed) {
-                setTimeout(() => {
-                    loadTasks();
-                    updateStats();
-                }, 500); // Small delay to ensure UI updates smoothly
-                
-                // Add action feedback
-                if (result.action_type === 'create_task') {
-                    showNotification('New task created via AI!', 'success');
-                } else if (result.action_type === 'complete_task') {
-                    showNotification('Task marked as completed via AI!', 'success');
-                } else if (result.action_type === 'delete_task') {
-                    showNotification('Task deleted via AI!', 'success');
+        // Render the reply as it streams in
+        let messageDiv = null;
+        let text = '';
+        await readEventStream(response, event => {
+            if (event.type === 'chunk') {
+                text += event.text;
+            } else if (event.type === 'done') {
+                text = event.response;
+                if (event.action_performed) {
+                    handleChatAction(event.action_type, event.actions);
                 }
             }
-        } else {
+            if (!messageDiv) {
+                removeLoadingMessage();
+                messageDiv = addChatMessage('AI', text, true);
+            } else {
+                setChatMessageText(messageDiv, 'AI', text);
+            }
+        });
+        
+        if (!messageDiv) {
+            removeLoadingMessage();
             addChatMessage('AI', 'Sorry, I encountered an error. Please try again.', true);
         }
     } catch (error) {
@@ -366,6 +683,51 @@ async function sendChatMessage() {
     }
 }
 
+async function readEventStream(response, onEvent) {
+    // Minimal Server-Sent Events parser over a fetch() body (EventSource
+    // cannot send POST requests)
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const frame = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+            const data = frame.split('\n')
+                .filter(line => line.startsWith('data:'))
+                .map(line => line.slice(5).trimStart())
+                .join('\n');
+            if (data) {
+                onEvent(JSON.parse(data));
+            }
+        }
+    }
+}
+
+function handleChatAction(actionType, actions = []) {
+    // An action was performed; the event stream delivers it, otherwise
+    // refresh the task list
+    refreshAfterMutation();
+    
+    // Add action feedback
+    if (actionType === 'multiple') {
+        const done = actions.filter(action => action.action_type !== 'task_not_found').length;
+        showNotification(`${done} of ${actions.length} task commands applied via AI!`, done ? 'success' : 'error');
+    } else if (actionType === 'create_task') {
+        showNotification('New task created via AI!', 'success');
+    } else if (actionType === 'complete_task') {
+        showNotification('Task marked as completed via AI!', 'success');
+    } else if (actionType === 'delete_task') {
+        showNotification('Task deleted via AI!', 'success');
+    }
+}
+
 async function getAIInsights() {
     addChatMessage('AI', 'Let me analyze your tasks and provide some insights...', true, true);
     
@@ -437,11 +799,58 @@ function addChatMessage(sender, message, isAI, isLoading = false) {
         messageDiv.classList.add('loading-message');
         messageDiv.innerHTML = `<strong>${sender}:</strong> <i class="fas fa-spinner fa-spin"></i> ${message}`;
     } else {
-        messageDiv.innerHTML = `<strong>${sender}:</strong> ${escapeHtml(message).replace(/\n/g, '<br>')}`;
+        setChatMessageText(messageDiv, sender, message);
     }
     
     chatMessages.appendChild(messageDiv);
     chatMessages.scrollTop = chatMessages.scrollHeight;
+    return messageDiv;
+}
+
+function setChatMessageText(messageDiv, sender, message) {
+    messageDiv.innerHTML = `<strong>${sender}:</strong> ${escapeHtml(message).replace(/\n/g, '<br>')}`;
+    const chatMessages = messageDiv.parentElement;
+    if (chatMessages) {
+        chatMessages.scrollTop = chatMessages.scrollHeight;
+    }
+}
+
+// Show earlier conversations above the welcome message; older pages load
+// when the chat is scrolled to the top
+async function loadChatHistory(before = null) {
+    if (loadingChatHistory) return;
+    loadingChatHistory = true;
+    
+    try {
+        const params = new URLSearchParams({ limit: CHAT_HISTORY_PAGE_SIZE });
+        if (before) {
+            params.set('before', before);
+        }
+        const response = await fetch(`/api/chat/history?${params}`);
+        const result = await response.json();
+        if (!result.success) return;
+        
+        const chatMessages = document.getElementById('chatMessages');
+        const previousHeight = chatMessages.scrollHeight;
+        const fragment = document.createDocumentFragment();
+        result.messages.slice().reverse().forEach(message => {
+            [['You', message.user_message, 'user-message'], ['AI', message.ai_response, 'ai-message']].forEach(([sender, text, className]) => {
+                const messageDiv = document.createElement('div');
+                messageDiv.className = className;
+                messageDiv.innerHTML = `<strong>${sender}:</strong> ${escapeHtml(text).replace(/\n/g, '<br>')}`;
+                fragment.appendChild(messageDiv);
+            });
+        });
+        chatMessages.insertBefore(fragment, chatMessages.firstChild);
+        chatHistoryBefore = result.next_before;
+        
+        // Keep the view where it was (the bottom on the first load)
+        chatMessages.scrollTop = before ? chatMessages.scrollHeight - previousHeight : chatMessages.scrollHeight;
+    } catch (error) {
+        console.error('Error loading chat history:', error);
+    } finally {
+        loadingChatHistory = false;
+    }
 }
 
 function removeLoadingMessage() {
@@ -452,26 +861,9 @@ function removeLoadingMessage() {
 }
 
 function filterTasks(filter) {
-    currentFilter = filter;
-    let filteredTasks = currentTasks;
-    
-    switch(filter) {
-        case 'pending':
-            filteredTasks = currentTasks.filter(t => t.status === 'pending');
-            break;
-        case 'completed':
-            filteredTasks = currentTasks.filter(t => t.status === 'completed');
-            break;
-        case 'high':
-            filteredTasks = currentTasks.filter(t => t.priority === 'high');
-            break;
-        case 'all':
-        default:
-            filteredTasks = currentTasks;
-            break;
-    }
-    
-    renderTasks(filteredTasks);
+    // Filtering happens server-side so only matching rows are transferred
+    currentFilter = TASK_FILTERS[filter] ? filter : 'all';
+    loadTasks();
 }
 
 function refreshData() {
@@ -0,0 +1,114 @@
+"""
+Task suggestions from the model, for one input or several per call.
+
+A batch prompt numbers its inputs and asks for a single JSON array with one
+``{"input": n, "suggestions": [...]}`` entry per input, so N inputs cost one
+model round trip instead of N. The reply is validated entry by entry:
+inputs the model skipped or answered malformed get FALLBACK_SUGGESTIONS
+instead of failing the whole batch.
+"""
+import json
+import os
+
+SUGGESTIONS_MAX_BATCH = int(os.getenv('SUGGESTIONS_MAX_BATCH', '10'))
+SUGGESTION_TOKENS = 800
+# Output budget of a batch call: per input, capped for large batches
+BATCH_TOKENS_PER_INPUT = 300
+MAX_BATCH_TOKENS = 2048
+MAX_INPUT_CHARS = 500
+
+FALLBACK_SUGGESTIONS = [
+    {'task': 'Break down your goal into smaller, manageable steps', 'priority': 'medium'},
+    {'task': 'Set a specific deadline for completion', 'priority': 'high'},
+    {'task': 'Gather necessary resources and materials', 'priority': 'medium'},
+    {'task': 'Create a detailed action plan', 'priority': 'high'},
+    {'task': 'Schedule regular progress reviews', 'priority': 'low'},
+]
+
+
+def build_prompt(user_input):
+    return f"""The user said: "{user_input}"
+
+Based on this input, suggest 3-5 specific, actionable to-do tasks.
+For each task, also suggest an appropriate priority level (high, medium, low).
+
+Format your response as a JSON array like this:
+[
+    {{"task": "Task description", "priority": "high"}},
+    {{"task": "Another task", "priority": "medium"}}
+]
+
+Only return the JSON array, no other text."""
+
+
+def build_batch_prompt(inputs):
+    numbered = '\n'.join(f'{number}. "{text}"' for number, text in enumerate(inputs, start=1))
+    return f"""The user gave these {len(inputs)} numbered inputs:
+
+{numbered}
+
+For each input, suggest 3-5 specific, actionable to-do tasks, each with an appropriate priority level (high, medium, low).
+
+Format your response as one JSON object per input, in a single list like this:
+[
+    {{"input": 1, "suggestions": [{{"task": "Task description", "priority": "high"}}, {{"task": "Another task", "priority": "medium"}}]}},
+    {{"input": 2, "suggestions": [{{"task": "Task description", "priority": "low"}}]}}
+]
+
+Only return the list, no other text."""
+
+
+def batch_tokens(count):
+    return min(MAX_BATCH_TOKENS, BATCH_TOKENS_PER_INPUT * count)
+
+
+def load_json(response_text):
+    """Decode model output, tolerating a markdown code fence"""
+    text = response_text.strip()
+    if text.startswith('```'):
+        text = text.split('\n', 1)[-1] if '\n' in text else ''
+        text = text.rsplit('```', 1)[0]
+    return json.loads(text)
+
+
+def check_suggestions(suggestions):
+    if isinstance(suggestions, list) and suggestions and all(
+            isinstance(s, dict) and 'task' in s and 'priority' in s for s in suggestions):
+        return suggestions
+    raise ValueError('Invalid suggestions format')
+
+
+def parse_suggestions(response_text):
+    """Parse the model's JSON suggestions, raising ValueError if malformed"""
+    return check_suggestions(load_json(response_text))
+
+
+def is_valid_suggestions(response_text):
+    try:
+        parse_suggestions(response_text)
+        return True
+    except ValueError:
+        return False
+
+
+def parse_batch(response_text, count):
+    """Suggestions per input of a batch reply, in input order.
+
+    Entries are matched by their ``input`` number; an input without a valid
+    entry maps to ``None``. Raises ValueError if the reply is not a list.
+    """
+    entries = load_json(response_text)
+    if not isinstance(entries, list):
+        raise ValueError('Invalid batch suggestions format')
+    results = [None] * count
+    for entry in entries:
+        if not isinstance(entry, dict):
+            continue
+        number = entry.get('input')
+        if not isinstance(number, int) or not 1 <= number <= count or results[number - 1] is not None:
+            continue
+        try:
+            results[number - 1] = check_suggestions(entry.get('suggestions'))
+        except ValueError:
+            pass
+    return results
@@ -0,0 +1,388 @@
+"""
+Task queries shared by the dashboard and the JSON API
+"""
+import base64
+import json
+from datetime import datetime
+from itertools import groupby
+
+import serialize
+
+DASHBOARD_TASK_LIMIT = 10
+
+
+def get_stats(conn):
+    """Dashboard statistics read from the trigger-maintained counters table.
+
+    Costs the same regardless of how many tasks exist.
+    """
+    counters = dict(conn.execute('SELECT name, count FROM todo_counters').fetchall())
+    return build_stats(
+        total=counters.get('total', 0),
+        completed=counters.get('status:completed', 0),
+        high=counters.get('priority:high', 0),
+        medium=counters.get('priority:medium', 0),
+        low=counters.get('priority:low', 0),
+    )
+
+
+def compute_stats(conn):
+    """Same statistics computed with one grouped aggregate over the
+    (status, priority) index; ``repair_counters()`` checks the counters
+    against it"""
+    total = completed = high = medium = low = 0
+    rows = conn.execute('''
+        SELECT status, priority, COUNT(*) AS count
+        FROM todos
+        GROUP BY status, priority
+    ''').fetchall()
+    for row in rows:
+        total += row['count']
+        if row['status'] == 'completed':
+            completed += row['count']
+        if row['priority'] == 'high':
+            high += row['count']
+        elif row['priority'] == 'medium':
+            medium += row['count']
+        elif row['priority'] == 'low':
+            low += row['count']
+    return build_stats(total, completed, high, medium, low)
+
+
+def repair_counters(conn):
+    """Rewrite todo_counters from the todos table if they disagree with
+    ``compute_stats()`` (e.g. rows changed with the triggers dropped);
+    returns whether they had to be rebuilt"""
+    if get_stats(conn) == compute_stats(conn):
+        return False
+    conn.execute('DELETE FROM todo_counters')
+    conn.execute('''
+        INSERT INTO todo_counters (name, count)
+            SELECT 'total', COUNT(*) FROM todos
+            UNION ALL
+            SELECT 'status:' || ifnull(status, ''), COUNT(*) FROM todos GROUP BY status
+            UNION ALL
+            SELECT 'priority:' || ifnull(priority, ''), COUNT(*) FROM todos GROUP BY priority
+    ''')
+    return True
+
+
+def build_stats(total, completed, high, medium, low):
+    return {
+        'total_tasks': total,
+        'completed_tasks': completed,
+        'pending_tasks': total - completed,
+        'completion_rate': round((completed / total * 100) if total > 0 else 0, 1),
+        'high_priority': high,
+        'medium_priority': medium,
+        'low_priority': low
+    }
+
+
+def recent_todos(conn, limit=DASHBOARD_TASK_LIMIT):
+    return conn.execute('''
+        SELECT * FROM todos
+        ORDER BY created_at DESC, id DESC
+        LIMIT ?
+    ''', (limit,)).fetchall()
+
+
+# Keyset pagination for GET /api/todos
+TODO_FIELDS = (
+    'id', 'title', 'description', 'priority', 'status',
+    'created_at', 'updated_at', 'due_date', 'completed_at',
+)
+STATUSES = ('pending', 'completed')
+PRIORITIES = ('high', 'medium', 'low')
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def encode_cursor(created_at, todo_id):
+    raw = json.dumps([created_at, todo_id], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, todo_id = json.loads(base64.urlsafe_b64decode(padded))
+        return str(created_at), int(todo_id)
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+
+
+def parse_fields(value):
+    """Validate a ``fields=`` projection; ``None`` means every column"""
+    if not value:
+        return None
+    fields = list(dict.fromkeys(f.strip() for f in value.split(',') if f.strip()))
+    unknown = [f for f in fields if f not in TODO_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)}")
+    return fields
+
+
+def parse_choices(value, allowed, name):
+    if not value:
+        return None
+    choices = [v.strip() for v in value.split(',') if v.strip()]
+    invalid = [v for v in choices if v not in allowed]
+    if invalid:
+        raise ValueError(f"Invalid {name}: {', '.join(invalid)}")
+    return choices
+
+
+def list_todos(conn, status=None, priority=None, due_after=None, due_before=None,
+               cursor=None, limit=DEFAULT_PAGE_SIZE, fields=None):
+    """One page of todos, newest first, keyed on (created_at, id).
+
+    Returns ``(rows, next_cursor)``; ``next_cursor`` is ``None`` on the last
+    page. Each page is a bounded index range scan regardless of table size.
+    """
+    fields = fields or list(TODO_FIELDS)
+    # The cursor columns are always read even if not projected
+    columns = list(dict.fromkeys(['id', 'created_at'] + fields))
+    rows, next_cursor = _list_page(conn, ', '.join(columns), status, priority, due_after,
+                                   due_before, cursor, limit)
+    return [{f: row[f] for f in fields} for row in rows], next_cursor
+
+
+def list_todos_json(conn, status=None, priority=None, due_after=None, due_before=None,
+                    cursor=None, limit=DEFAULT_PAGE_SIZE, fields=None):
+    """``list_todos`` with each task returned as JSON text built by SQLite"""
+    fields = fields or list(TODO_FIELDS)
+    columns = f'{serialize.json_object_sql(fields)} AS doc, id, created_at'
+    rows, next_cursor = _list_page(conn, columns, status, priority, due_after,
+                                   due_before, cursor, limit)
+    return [row[0] for row in rows], next_cursor
+
+
+def _list_page(conn, columns, status, priority, due_after, due_before, cursor, limit):
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    where = []
+    params = []
+    if status:
+        where.append(f"status IN ({', '.join('?' * len(status))})")
+        params.extend(status)
+    if priority:
+        where.append(f"priority IN ({', '.join('?' * len(priority))})")
+        params.extend(priority)
+    if due_after:
+        where.append('due_date >= ?')
+        params.append(due_after)
+    if due_before:
+        where.append('due_date <= ?')
+        params.append(due_before)
+    if cursor:
+        where.append('(created_at, id) < (?, ?)')
+        params.extend(decode_cursor(cursor))
+
+    sql = f"SELECT {columns} FROM todos"
+    if where:
+        sql += ' WHERE ' + ' AND '.join(where)
+    sql += ' ORDER BY created_at DESC, id DESC LIMIT ?'
+    params.append(limit + 1)
+
+    rows = conn.execute(sql, params).fetchall()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]['created_at'], rows[-1]['id'])
+    return rows, next_cursor
+
+
+# Delta sync: every insert/update/delete bumps the change version
+MAX_CHANGES = 1000
+
+
+def current_version(conn):
+    """Latest change version; 0 for a database that has never changed"""
+    return conn.execute('SELECT ifnull(MAX(version), 0) FROM todo_changes').fetchone()[0]
+
+
+def changes_since(conn, since, fields=None, limit=MAX_CHANGES):
+    """Rows upserted and ids deleted after ``since``.
+
+    Returns ``(changed, deleted, version, has_more)``; pass ``version`` back
+    as the next ``since``. Changed rows carry their current contents.
+    """
+    fields = fields or list(TODO_FIELDS)
+    columns = ', '.join(f't.{f}' for f in dict.fromkeys(['id'] + fields))
+    rows = conn.execute(f'''
+        SELECT c.version AS _version, c.todo_id AS _todo_id, c.op AS _op, {columns}
+        FROM todo_changes c
+        LEFT JOIN todos t ON t.id = c.todo_id
+        WHERE c.version > ?
+        ORDER BY c.version
+        LIMIT ?
+    ''', (since, limit + 1)).fetchall()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    changed = []
+    deleted = []
+    for row in rows:
+        if row['_op'] == 'delete' or row['id'] is None:
+            deleted.append(row['_todo_id'])
+        else:
+            changed.append({f: row[f] for f in fields})
+
+    version = rows[-1]['_version'] if rows else since
+    return changed, deleted, version, has_more
+
+
+# Bulk mutations for POST /api/todos/bulk
+MAX_BULK_OPERATIONS = 1000
+BULK_OPS = ('create', 'update', 'delete')
+
+INSERT_TODO_SQL = '''
+    INSERT INTO todos (title, description, priority, due_date)
+    VALUES (:title, :description, :priority, :due_date)
+'''
+
+# Partial update: omitted fields keep their value, status changes maintain
+# completed_at the same way PUT /api/todos/<id> does
+PATCH_TODO_SQL = '''
+    UPDATE todos
+    SET title = coalesce(:title, title),
+        description = coalesce(:description, description),
+        priority = coalesce(:priority, priority),
+        due_date = CASE WHEN :set_due_date THEN :due_date ELSE due_date END,
+        status = coalesce(:status, status),
+        completed_at = CASE
+            WHEN :status IS NULL THEN completed_at
+            WHEN :status = 'completed' THEN CURRENT_TIMESTAMP
+            ELSE NULL
+        END,
+        updated_at = CURRENT_TIMESTAMP
+    WHERE id = :id
+'''
+
+DELETE_TODO_SQL = 'DELETE FROM todos WHERE id = :id'
+# Operations on an existing task, by kind
+TARGETED_SQL = {'update': PATCH_TODO_SQL, 'delete': DELETE_TODO_SQL}
+
+
+def parse_due_date(value):
+    """A due date as YYYY-MM-DD, or None for an empty value; raises ValueError"""
+    if value is None or value == '':
+        return None
+    try:
+        if not isinstance(value, str):
+            raise ValueError
+        return datetime.strptime(value, '%Y-%m-%d').strftime('%Y-%m-%d')
+    except ValueError:
+        raise ValueError(f'Invalid due_date: {value} (expected YYYY-MM-DD)')
+
+
+def optional_text(op, name):
+    value = op.get(name)
+    if value is not None and not isinstance(value, str):
+        raise ValueError(f'{name} must be a string')
+    return value
+
+
+def validate_bulk_operation(op):
+    """Normalize one bulk operation into SQL parameters or raise ValueError"""
+    if not isinstance(op, dict):
+        raise ValueError('Operation must be an object')
+    kind = op.get('op')
+    if kind not in BULK_OPS:
+        raise ValueError(f"op must be one of: {', '.join(BULK_OPS)}")
+
+    priority = op.get('priority')
+    if priority is not None and priority not in PRIORITIES:
+        raise ValueError(f'Invalid priority: {priority}')
+    status = op.get('status')
+    if status is not None and status not in STATUSES:
+        raise ValueError(f'Invalid status: {status}')
+
+    if kind == 'create':
+        title = (optional_text(op, 'title') or '').strip()
+        if not title:
+            raise ValueError('title is required')
+        return kind, {
+            'title': title,
+            'description': optional_text(op, 'description') or '',
+            'priority': priority or 'medium',
+            'due_date': parse_due_date(op.get('due_date')),
+        }
+
+    todo_id = op.get('id')
+    if not isinstance(todo_id, int) or isinstance(todo_id, bool):
+        raise ValueError('id must be an integer')
+    if kind == 'delete':
+        return kind, {'id': todo_id}
+
+    title = optional_text(op, 'title')
+    if title is not None and not title.strip():
+        raise ValueError('title cannot be empty')
+    return kind, {
+        'id': todo_id,
+        'title': title,
+        'description': optional_text(op, 'description'),
+        'priority': priority,
+        'status': status,
+        'set_due_date': 'due_date' in op,
+        'due_date': parse_due_date(op.get('due_date')),
+    }
+
+
+def existing_ids(conn, ids, chunk_size=500):
+    found = set()
+    ids = list(set(ids))
+    for start in range(0, len(ids), chunk_size):
+        chunk = ids[start:start + chunk_size]
+        rows = conn.execute(
+            f"SELECT id FROM todos WHERE id IN ({', '.join('?' * len(chunk))})", chunk
+        ).fetchall()
+        found.update(row['id'] for row in rows)
+    return found
+
+
+def apply_bulk(conn, operations):
+    """Apply validated bulk operations in one write transaction.
+
+    ``operations`` is a list of ``(index, kind, params)`` in request order.
+    They are applied in that order, one executemany per run of consecutive
+    operations of the same kind. Returns a result dict per operation, keyed
+    by index.
+    """
+    results = {}
+
+    # Take the write lock up front so the id range below cannot interleave
+    # with another writer
+    if not conn.in_transaction:
+        conn.execute('BEGIN IMMEDIATE')
+
+    for kind, run in groupby(operations, key=lambda op: op[1]):
+        items = [(index, params) for index, _, params in run]
+        if kind == 'create':
+            # AUTOINCREMENT ids are assigned consecutively inside the transaction
+            last_id = conn.execute('''
+                SELECT max(
+                    ifnull((SELECT seq FROM sqlite_sequence WHERE name = 'todos'), 0),
+                    ifnull((SELECT MAX(id) FROM todos), 0)
+                )
+            ''').fetchone()[0]
+            conn.executemany(INSERT_TODO_SQL, [p for _, p in items])
+            for offset, (index, _) in enumerate(items, start=1):
+                results[index] = {'op': 'create', 'success': True, 'id': last_id + offset}
+            continue
+
+        found = existing_ids(conn, [p['id'] for _, p in items])
+        applied = []
+        for index, params in items:
+            if params['id'] in found:
+                applied.append(params)
+                results[index] = {'op': kind, 'success': True, 'id': params['id']}
+                if kind == 'delete':
+                    # A second delete of the same id in this run finds nothing
+                    found.discard(params['id'])
+            else:
+                results[index] = {'op': kind, 'success': False, 'id': params['id'],
+                                  'error': 'Todo not found'}
+        conn.executemany(TARGETED_SQL[kind], applied)
+
+    return results
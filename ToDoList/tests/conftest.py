@@ -0,0 +1,67 @@
+"""
+Shared fixtures: the app runs against a fresh SQLite file per test, with the
+fake model backend and no model latency.
+"""
+import os
+import sys
+import tempfile
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if APP_DIR not in sys.path:
+    sys.path.insert(0, APP_DIR)
+
+# The app reads its configuration at import time
+_scratch = tempfile.mkdtemp(prefix='todo-tests-')
+os.environ['DATABASE_PATH'] = os.path.join(_scratch, 'import.db')
+os.environ['CHAT_ARCHIVE_DIR'] = os.path.join(_scratch, 'chat_archive')
+os.environ['AI_BACKEND'] = 'fake'
+os.environ['FAKE_MODEL_LATENCY'] = '0'
+os.environ['FAKE_MODEL_JITTER'] = '0'
+os.environ['DB_TRACE_QUERIES'] = '1'
+
+import pytest
+
+import app as app_module
+import db
+import events
+import llm_cache
+import pages
+import reminders
+
+
+@pytest.fixture
+def appmod(tmp_path, monkeypatch):
+    """The app module bound to an empty database in ``tmp_path``"""
+    pool = db.ConnectionPool(str(tmp_path / 'todos.db'))
+    monkeypatch.setattr(db, 'pool', pool)
+    # Caches keyed on the task revision must not outlive the database
+    monkeypatch.setattr(app_module, 'response_cache', llm_cache.ResponseCache())
+    monkeypatch.setattr(app_module, 'dashboard_fragments', pages.FragmentCache())
+    broker = events.EventBroker()
+    monkeypatch.setattr(app_module, 'event_broker', broker)
+    monkeypatch.setattr(app_module, 'live_channels', {
+        None: (events.TaskChangeFeed(broker, poll_interval=0), reminders.ReminderScheduler(broker))
+    })
+    db.init_db()
+    yield app_module
+    pool.close()
+
+
+@pytest.fixture
+def client(appmod):
+    return appmod.app.test_client()
+
+
+def create_todo(client, title='Task', **fields):
+    """POST /api/todos and return the new task's id"""
+    response = client.post('/api/todos', json=dict(fields, title=title))
+    assert response.status_code == 200, response.get_data(as_text=True)
+    with db.connection() as conn:
+        return conn.execute('SELECT MAX(id) FROM todos').fetchone()[0]
+
+
+def query(sql, params=()):
+    """Rows of one statement, on a connection of its own (not held across
+    requests, which would share the request's transaction)"""
+    with db.connection() as conn:
+        return [tuple(row) for row in conn.execute(sql, params).fetchall()]
@@ -0,0 +1,83 @@
+import pytest
+
+from conftest import create_todo, query
+
+
+def bulk(client, operations, atomic=False):
+    return client.post('/api/todos/bulk', json={'operations': operations, 'atomic': atomic})
+
+
+def test_bulk_applies_every_kind_and_reports_per_item(client):
+    keep = create_todo(client, 'Keep')
+    drop = create_todo(client, 'Drop')
+    response = bulk(client, [
+        {'op': 'create', 'title': 'New', 'priority': 'high', 'due_date': '2030-05-06'},
+        {'op': 'update', 'id': keep, 'status': 'completed'},
+        {'op': 'delete', 'id': drop},
+        {'op': 'delete', 'id': 999},
+    ]).get_json()
+    assert response['applied'] == 3
+    assert response['success'] is False
+    assert response['results'][3] == {'op': 'delete', 'success': False, 'id': 999,
+                                      'error': 'Todo not found', 'index': 3}
+    assert query('SELECT title, status, due_date FROM todos ORDER BY id') == [
+        ('Keep', 'completed', None), ('New', 'pending', '2030-05-06')]
+
+
+def test_atomic_bulk_rolls_back_when_a_target_is_missing(client):
+    response = bulk(client, [
+        {'op': 'create', 'title': 'Should not stay'},
+        {'op': 'delete', 'id': 999},
+    ], atomic=True)
+    assert response.status_code == 400
+    body = response.get_json()
+    assert body['success'] is False
+    assert body['results'][0]['skipped'] is True
+    assert body['results'][1]['error'] == 'Todo not found'
+    assert query('SELECT COUNT(*) FROM todos') == [(0,)]
+    assert query("SELECT count FROM todo_counters WHERE name = 'total'") in ([], [(0,)])
+
+
+def test_atomic_bulk_applies_nothing_when_an_operation_is_invalid(client):
+    response = bulk(client, [{'op': 'create', 'title': 'ok'}, {'op': 'create'}], atomic=True)
+    assert response.status_code == 400
+    assert query('SELECT COUNT(*) FROM todos') == [(0,)]
+
+
+@pytest.mark.parametrize('operation, error', [
+    ({'op': 'create', 'title': 42}, 'title must be a string'),
+    ({'op': 'create', 'title': 'x', 'description': {'a': 1}}, 'description must be a string'),
+    ({'op': 'create', 'title': 'x', 'due_date': ['2030-01-01']}, 'Invalid due_date'),
+    ({'op': 'create', 'title': 'x', 'due_date': 'garbage'}, 'Invalid due_date'),
+    ({'op': 'update', 'id': 1, 'title': 7}, 'title must be a string'),
+    ({'op': 'update', 'id': 1, 'due_date': {'day': 1}}, 'Invalid due_date'),
+    ({'op': 'update', 'id': '1'}, 'id must be an integer'),
+    ({'op': 'archive'}, 'op must be one of'),
+])
+def test_bad_field_types_are_per_item_errors(client, operation, error):
+    response = bulk(client, [operation, {'op': 'create', 'title': 'fine'}])
+    assert response.status_code == 200
+    results = response.get_json()['results']
+    assert results[0]['success'] is False
+    assert error in results[0]['error']
+    assert results[1]['success'] is True
+
+
+def test_update_can_clear_the_due_date(client):
+    todo = create_todo(client, 'Dated', due_date='2030-01-01')
+    bulk(client, [{'op': 'update', 'id': todo, 'due_date': None}])
+    assert query('SELECT due_date FROM todos') == [(None,)]
+
+
+def test_operations_apply_in_request_order(client):
+    todo = create_todo(client, 'Gone soon')
+    results = bulk(client, [
+        {'op': 'delete', 'id': todo},
+        {'op': 'update', 'id': todo, 'title': 'Too late'},
+        {'op': 'delete', 'id': todo},
+        {'op': 'create', 'title': 'New'},
+        {'op': 'update', 'id': todo + 1, 'status': 'completed'},
+    ]).get_json()['results']
+    assert [r['success'] for r in results] == [True, False, False, True, True]
+    assert results[3]['id'] == todo + 1
+    assert query('SELECT title, status FROM todos') == [('New', 'completed')]
@@ -0,0 +1,73 @@
+import json
+
+import model_client
+
+from conftest import create_todo, query
+
+
+def chat(client, message):
+    return client.post('/api/chat', json={'message': message}).get_json()
+
+
+def test_complete_finds_the_task_by_a_word(client):
+    create_todo(client, 'Buy groceries for the week')
+    create_todo(client, 'Call the plumber')
+    assert chat(client, 'mark groceries as done')['action_type'] == 'complete_task'
+    assert query("SELECT title FROM todos WHERE status = 'completed'") == [('Buy groceries for the week',)]
+
+
+def test_complete_skips_finished_tasks(client):
+    create_todo(client, 'Call the dentist')
+    assert chat(client, 'mark dentist as done')['action_type'] == 'complete_task'
+    assert chat(client, 'mark dentist as done')['action_type'] == 'task_not_found'
+
+
+def test_delete_needs_every_word(client):
+    create_todo(client, 'Old draft')
+    assert chat(client, 'delete task old budget')['action_type'] == 'task_not_found'
+    assert chat(client, 'delete task old draft')['action_type'] == 'delete_task'
+    assert query('SELECT COUNT(*) FROM todos') == [(0,)]
+
+
+def sse_events(response):
+    return [json.loads(line[len('data: '):]) for line in response.get_data(as_text=True).splitlines()
+            if line.startswith('data: ')]
+
+
+def test_stream_sends_chunks_then_done_and_saves_the_answer(client):
+    response = client.post('/api/chat/stream', json={'message': 'any tips for today?'})
+    assert response.mimetype == 'text/event-stream'
+    events = sse_events(response)
+    chunks = [e['text'] for e in events if e['type'] == 'chunk']
+    assert len(chunks) > 1
+    assert events[-1]['type'] == 'done'
+    assert events[-1]['response'] == ''.join(chunks).strip()
+    assert query('SELECT user_message, ai_response FROM chat_messages') == [
+        ('any tips for today?', events[-1]['response'])]
+
+
+def test_stream_runs_commands_as_one_event(client):
+    events = sse_events(client.post('/api/chat/stream', json={'message': 'add water the plants'}))
+    assert [e['type'] for e in events] == ['done']
+    assert events[0]['action_type'] == 'create_task'
+
+
+def test_stream_falls_back_when_the_model_is_down(appmod, client, monkeypatch):
+    def unavailable(*args, **kwargs):
+        raise appmod.model_client.CircuitOpen('open')
+    monkeypatch.setattr(appmod.ai_client, 'stream', unavailable)
+    events = sse_events(client.post('/api/chat/stream', json={'message': 'hello there'}))
+    assert [e['type'] for e in events] == ['chunk', 'done']
+    assert 'trouble connecting' in events[-1]['response']
+
+
+def test_unread_stream_still_frees_the_probe(appmod, monkeypatch):
+    breaker = model_client.CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    monkeypatch.setattr(appmod.ai_client, 'breaker', breaker)
+    breaker.record_failure()
+    # Called directly: the test client always reads the first chunk
+    with appmod.app.test_request_context('/api/chat/stream', method='POST', json={'message': 'hello there'}):
+        response = appmod.chat_with_ai_stream()
+    assert not breaker.allow()
+    response.close()
+    assert breaker.allow()
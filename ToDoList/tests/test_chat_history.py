@@ -0,0 +1,100 @@
+import threading
+import time
+
+import chat_history
+import context
+import db
+import workers
+
+from conftest import query
+
+
+def save_turns(count, prefix='message'):
+    with db.connection() as conn:
+        return [chat_history.save(conn, f'{prefix} {n}', f'answer {n}') for n in range(count)]
+
+
+def test_history_pages_newest_first(client):
+    ids = save_turns(5)
+    body = client.get('/api/chat/history?limit=2').get_json()
+    assert [m['id'] for m in body['messages']] == ids[:-3:-1]
+    seen = [m['id'] for m in body['messages']]
+    while body['next_before']:
+        body = client.get(f"/api/chat/history?limit=2&before={body['next_before']}").get_json()
+        seen += [m['id'] for m in body['messages']]
+    assert seen == ids[::-1]
+
+
+def test_compaction_folds_old_turns_and_keeps_recent_ones(appmod):
+    save_turns(9)
+    prompts = []
+    compactor = chat_history.ChatCompactor(lambda p: prompts.append(p) or 'They planned a trip.',
+                                           interval=0, batch=3, keep_turns=2, retention_days=0)
+    compactor.run_once()
+    with db.connection() as conn:
+        summary = chat_history.latest_summary(conn)
+    # 9 turns, 2 kept verbatim: two batches of 3 fit
+    assert len(prompts) == 2
+    assert summary['message_count'] == 6
+    assert summary['source'] == 'model'
+    assert compactor.stats()['summaries'] == 2
+
+    with db.connection() as conn:
+        memory = chat_history.build_history_context(conn)
+    assert memory.startswith('Summary of the earlier conversation: They planned a trip.')
+    assert 'message 8' in memory and 'message 5' not in memory
+
+
+def test_compaction_without_the_model_extracts_user_messages(appmod):
+    save_turns(4)
+
+    def failing(prompt):
+        raise RuntimeError('model down')
+    compactor = chat_history.ChatCompactor(failing, interval=0, batch=4, keep_turns=0, retention_days=0)
+    compactor.run_once()
+    assert query('SELECT source FROM chat_summaries') == [('extract',)]
+    assert compactor.stats()['model_errors'] == 1
+
+
+def test_history_context_stays_within_budget(appmod):
+    save_turns(6, prefix='x' * 300)
+    with db.connection() as conn:
+        memory = chat_history.build_history_context(conn, budget=200)
+    assert context.estimate_tokens(memory) <= 200
+    assert memory.endswith('answer 5')
+
+
+class Recorder(workers.BackgroundWorker):
+    thread_name = 'test-worker'
+
+    def __init__(self):
+        super().__init__(interval=0)
+        self.tenants = []
+        self.done = threading.Event()
+
+    def run_once(self):
+        self.tenants.append(db.current_tenant())
+        self.done.set()
+        if db.current_tenant() == 'broken':
+            raise RuntimeError('boom')
+
+
+def test_worker_runs_a_pass_for_the_tenant_that_woke_it(appmod):
+    worker = Recorder()
+    worker.start()
+    worker.start()
+    with db.tenant('acme'):
+        worker.wake()
+    assert worker.done.wait(5)
+    assert worker.tenants == ['acme']
+    assert worker.stats() == {'errors': 0, 'running': True}
+
+    worker.done.clear()
+    with db.tenant('broken'):
+        worker.wake()
+    assert worker.done.wait(5)
+    for _ in range(100):
+        if worker.stats()['errors']:
+            break
+        time.sleep(0.01)
+    assert worker.stats()['errors'] == 1
@@ -0,0 +1,127 @@
+import sqlite3
+import sys
+import threading
+
+import pytest
+
+import db
+
+
+def test_connections_run_in_wal_mode(appmod):
+    with db.connection() as conn:
+        assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+
+
+def test_connection_is_reused_by_its_thread(appmod):
+    with db.connection() as first:
+        pass
+    with db.connection() as second:
+        pass
+    assert first is second
+    assert db.pool.stats()['thread_hits'] >= 1
+
+
+def test_nested_blocks_share_one_transaction(appmod):
+    with pytest.raises(RuntimeError):
+        with db.connection() as outer:
+            outer.execute("INSERT INTO todos (title) VALUES ('outer')")
+            with db.connection() as inner:
+                assert inner is outer
+                inner.execute("INSERT INTO todos (title) VALUES ('inner')")
+            raise RuntimeError('roll back both')
+    with db.connection() as conn:
+        assert conn.execute('SELECT COUNT(*) FROM todos').fetchone()[0] == 0
+
+
+def test_checkout_times_out_when_pool_is_exhausted(tmp_path):
+    pool = db.ConnectionPool(str(tmp_path / 'small.db'), size=1, timeout=0.05)
+    held = threading.Event()
+    release = threading.Event()
+
+    def hold():
+        with pool.connection():
+            held.set()
+            release.wait(5)
+
+    worker = threading.Thread(target=hold)
+    worker.start()
+    held.wait(5)
+    try:
+        with pytest.raises(db.PoolTimeout):
+            with pool.connection():
+                pass
+    finally:
+        release.set()
+        worker.join()
+    assert pool.stats()['timeouts'] == 1
+    pool.close()
+
+
+def test_closed_pool_closes_returned_connections(tmp_path):
+    pool = db.ConnectionPool(str(tmp_path / 'closing.db'))
+    with pool.connection() as conn:
+        pool.close()
+    with pytest.raises(sqlite3.ProgrammingError):
+        conn.execute('SELECT 1')
+
+
+def legacy_database(path):
+    """A database as the app created it before schema migrations"""
+    conn = sqlite3.connect(path)
+    conn.executescript('''
+        CREATE TABLE todos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            description TEXT,
+            priority TEXT DEFAULT 'medium',
+            status TEXT DEFAULT 'pending',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            due_date DATE,
+            completed_at TIMESTAMP
+        );
+        CREATE TABLE chat_messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_message TEXT NOT NULL,
+            ai_response TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        INSERT INTO todos (title, priority, status) VALUES
+            ('Renew passport', 'high', 'pending'),
+            ('File taxes', 'high', 'completed'),
+            ('Water plants', 'low', 'pending');
+    ''')
+    conn.close()
+
+
+def test_new_database_is_at_the_latest_version(appmod):
+    assert db.schema_version(db.pool.path) == len(db.MIGRATIONS)
+
+
+def test_migrations_upgrade_an_existing_database(tmp_path):
+    path = str(tmp_path / 'legacy.db')
+    legacy_database(path)
+    assert db.schema_version(path) == 0
+    pool = db.ConnectionPool(path)
+    try:
+        db.init_pool(pool)
+        assert db.schema_version(path) == len(db.MIGRATIONS)
+        with pool.connection() as conn:
+            counters = dict(conn.execute('SELECT name, count FROM todo_counters').fetchall())
+            found = conn.execute("SELECT rowid FROM todos_fts WHERE todos_fts MATCH 'passport'").fetchall()
+            # Running them again changes nothing
+            db.migrate(conn)
+        assert counters['total'] == 3
+        assert counters['priority:high'] == 2
+        assert counters['status:completed'] == 1
+        assert [row[0] for row in found] == [1]
+    finally:
+        pool.close()
+
+
+def test_missing_database_has_no_version(tmp_path):
+    assert db.schema_version(str(tmp_path / 'missing.db')) is None
+
+
+def test_gemini_sdk_is_not_imported_with_the_fake_backend(appmod):
+    assert 'google.generativeai' not in sys.modules
@@ -0,0 +1,41 @@
+import json
+
+from conftest import create_todo
+
+
+def frames(response):
+    """Parsed ``data:`` frames of an SSE body, read as they arrive"""
+    for chunk in response.response:
+        text = chunk.decode() if isinstance(chunk, bytes) else chunk
+        if text.startswith('data: '):
+            yield json.loads(text[len('data: '):])
+
+
+def test_stream_starts_with_hello_and_pushes_task_changes(appmod, client):
+    with client.get('/api/events', buffered=False) as response:
+        assert response.mimetype == 'text/event-stream'
+        stream = frames(response)
+        assert next(stream) == {'type': 'hello', 'version': 0}
+        create_todo(client, 'Pushed')
+        event = next(stream)
+        assert event['type'] == 'tasks'
+        assert [t['title'] for t in event['changed']] == ['Pushed']
+    assert appmod.event_broker.stats()['subscribers'] == 0
+
+
+def test_subscriber_limit_returns_503(appmod, client):
+    appmod.event_broker.max_subscribers = 1
+    with client.get('/api/events', buffered=False):
+        response = client.get('/api/events')
+        assert response.status_code == 503
+        assert response.headers['Retry-After']
+
+
+def test_unread_streams_give_back_their_subscription(appmod, client):
+    appmod.event_broker.max_subscribers = 3
+    for _ in range(5):
+        with client.head('/api/events') as response:
+            assert response.status_code == 200
+    assert appmod.event_broker.stats()['subscribers'] == 0
+    with client.get('/api/events', buffered=False) as response:
+        assert response.status_code == 200
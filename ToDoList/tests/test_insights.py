@@ -0,0 +1,71 @@
+import pytest
+
+import db
+import insights
+
+from conftest import create_todo
+
+
+class Refresher(insights.InsightsRefresher):
+    """Refreshes only when the test says so"""
+
+    def __init__(self, generate):
+        super().__init__(generate, interval=0)
+        self.woken = 0
+
+    def start(self):
+        pass
+
+    def wake(self):
+        self.woken += 1
+
+
+@pytest.fixture
+def refresher(appmod, monkeypatch):
+    refresher = Refresher(lambda prompt: 'Finish the high priority tasks first.')
+    monkeypatch.setattr(appmod, 'insights_refresher', refresher)
+    return refresher
+
+
+def test_no_tasks_needs_no_analysis(client, refresher):
+    body = client.get('/api/productivity-insights').get_json()
+    assert 'adding some tasks' in body['insights']
+    assert refresher.woken == 0
+
+
+def test_first_request_answers_from_metrics_and_wakes_the_refresher(client, refresher):
+    create_todo(client, 'Plan', priority='high')
+    body = client.get('/api/productivity-insights').get_json()
+    assert (body['source'], body['stale']) == ('metrics', True)
+    assert body['metrics']['totals']['total_tasks'] == 1
+    assert refresher.woken == 1
+
+    refresher.refresh()
+    body = client.get('/api/productivity-insights').get_json()
+    assert (body['source'], body['stale']) == ('model', False)
+    assert body['insights'] == 'Finish the high priority tasks first.'
+    assert refresher.woken == 1
+
+
+def test_enough_changes_make_the_analysis_stale(client, refresher):
+    create_todo(client)
+    refresher.refresh()
+    for n in range(insights.INSIGHTS_MIN_CHANGES - 1):
+        create_todo(client, f'More {n}')
+    with db.connection() as conn:
+        assert not insights.needs_refresh(conn, insights.load(conn))
+    create_todo(client, 'One too many')
+    with db.connection() as conn:
+        assert insights.needs_refresh(conn, insights.load(conn))
+
+
+def test_model_failure_stores_metrics_and_retries_later(client, appmod):
+    def failing(prompt):
+        raise RuntimeError('model down')
+    refresher = insights.InsightsRefresher(failing, interval=0)
+    create_todo(client)
+    stored = refresher.refresh()
+    assert stored['source'] == 'metrics'
+    assert refresher.stats()['model_errors'] == 1
+    with db.connection() as conn:
+        assert insights.needs_refresh(conn, stored)
@@ -0,0 +1,80 @@
+from datetime import date
+
+import pytest
+
+import intents
+from conftest import query
+
+
+def commands(message):
+    return [(c.intent, c.target) for c in intents.parse_commands(message)]
+
+
+@pytest.mark.parametrize('message, expected', [
+    ('add buy groceries and make dinner', 'buy groceries and make dinner'),
+    ('add call mom and set up the meeting', 'call mom and set up the meeting'),
+    ('i need to write tests and finish the docs', 'write tests and finish the docs'),
+    ('add buy milk, eggs and bread', 'buy milk, eggs and bread'),
+])
+def test_clause_that_is_not_a_command_keeps_the_message_whole(message, expected):
+    assert commands(message) == [('create_task', expected)]
+    assert intents.parse_commands(message) == [intents.parse_command(message)]
+
+
+def test_every_clause_a_command_splits():
+    assert commands('add milk, add eggs and mark bread as done') == [
+        ('create_task', 'milk'),
+        ('create_task', 'eggs'),
+        ('complete_task', 'bread'),
+    ]
+    assert commands('mark report as done then delete task draft') == [
+        ('complete_task', 'report'),
+        ('delete_task', 'draft'),
+    ]
+
+
+def test_plain_chat_has_no_commands():
+    assert commands('how am I doing this week?') == []
+
+
+def test_commands_are_capped():
+    message = ', '.join(f'add item {n}' for n in range(intents.MAX_COMMANDS + 5))
+    assert len(intents.parse_commands(message)) == intents.MAX_COMMANDS
+
+
+# A Wednesday
+TODAY = date(2030, 1, 2)
+
+
+@pytest.mark.parametrize('message, expected', [
+    ('add call the dentist with high priority due tomorrow',
+     ('create_task', 'call the dentist', 'high', '2030-01-03')),
+    ('create task file taxes in 3 days', ('create_task', 'file taxes', 'medium', '2030-01-05')),
+    ('add water plants minor', ('create_task', 'water plants', 'low', None)),
+    ('i need to renew passport by friday', ('create_task', 'renew passport', 'medium', '2030-01-04')),
+    ('add buy milk urgent on 2030-02-01', ('create_task', 'buy milk', 'high', '2030-02-01')),
+    ('mark the report as done', ('complete_task', 'the report', None, None)),
+    ('finish task budget review', ('complete_task', 'budget review', None, None)),
+    ('delete task old draft', ('delete_task', 'old draft', None, None)),
+    ('get rid of task spam', ('delete_task', 'spam', None, None)),
+])
+def test_command_slots(message, expected):
+    assert tuple(intents.parse_command(message, TODAY)) == expected
+
+
+@pytest.mark.parametrize('message', ['how are you', 'what is on my plate this week?', 'add it'])
+def test_not_a_command(message):
+    assert intents.parse_command(message, TODAY) is None
+
+
+def test_chat_runs_every_command_of_a_message(client):
+    response = client.post('/api/chat', json={'message': 'add milk, add eggs and mark milk as done'}).get_json()
+    assert response['action_type'] == 'multiple'
+    assert [a['action_type'] for a in response['actions']] == ['create_task', 'create_task', 'complete_task']
+    assert query('SELECT title, status FROM todos ORDER BY id') == [('milk', 'completed'), ('eggs', 'pending')]
+
+
+def test_chat_creates_one_task_when_a_clause_is_not_a_command(client):
+    response = client.post('/api/chat', json={'message': 'add buy groceries and make dinner'}).get_json()
+    assert response['action_type'] == 'create_task'
+    assert query('SELECT title FROM todos') == [('buy groceries and make dinner',)]
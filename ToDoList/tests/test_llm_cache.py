@@ -0,0 +1,43 @@
+import time
+
+import llm_cache
+
+
+def test_keys_ignore_case_and_whitespace_but_not_revision():
+    key = llm_cache.ResponseCache.make_key('chat', 'What  should I do?', revision=3, max_tokens=200)
+    assert key == llm_cache.ResponseCache.make_key('chat', ' what should i DO?\n', revision=3, max_tokens=200)
+    assert key != llm_cache.ResponseCache.make_key('chat', 'What should I do?', revision=4, max_tokens=200)
+    assert key != llm_cache.ResponseCache.make_key('insights', 'What should I do?', revision=3, max_tokens=200)
+    assert key != llm_cache.ResponseCache.make_key('chat', 'What should I do?', revision=3, max_tokens=300)
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = llm_cache.ResponseCache(max_entries=2, ttl=60, persist_path=None)
+    cache.set('a', 'A')
+    cache.set('b', 'B')
+    assert cache.get('a') == 'A'
+    cache.set('c', 'C')
+    assert cache.get('b') is None
+    assert (cache.get('a'), cache.get('c')) == ('A', 'C')
+    stats = cache.stats()
+    assert stats['evictions'] == 1
+    assert stats['entries'] == 2
+
+
+def test_entries_expire():
+    cache = llm_cache.ResponseCache(max_entries=10, ttl=0.01, persist_path=None)
+    cache.set('a', 'A')
+    time.sleep(0.02)
+    assert cache.get('a') is None
+    assert cache.stats()['expirations'] == 1
+
+
+def test_persistent_tier_survives_a_restart(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    llm_cache.ResponseCache(ttl=60, persist_path=path).set('a', 'A')
+    restarted = llm_cache.ResponseCache(ttl=60, persist_path=path)
+    assert restarted.get('a') == 'A'
+    # Now also in memory
+    assert restarted.get('a') == 'A'
+    stats = restarted.stats()
+    assert (stats['persistent_hits'], stats['hits']) == (1, 1)
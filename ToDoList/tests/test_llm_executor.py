@@ -0,0 +1,69 @@
+import threading
+import time
+
+import pytest
+
+import llm_executor
+
+
+@pytest.fixture
+def gate():
+    gate = threading.Event()
+    yield gate
+    gate.set()
+
+
+def call_when_free(executor, fn):
+    """``executor.call(fn)`` once the slots of finished work are back"""
+    deadline = time.monotonic() + 5
+    while True:
+        try:
+            return executor.call(fn)
+        except llm_executor.ExecutorBusy:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.01)
+
+
+def test_full_pool_rejects_instead_of_queueing(gate):
+    executor = llm_executor.LLMExecutor(workers=1, queue_size=1, timeout=5, retry_after=7)
+    executor.submit(gate.wait, 5)
+    executor.submit(gate.wait, 5)
+    with pytest.raises(llm_executor.ExecutorBusy) as busy:
+        executor.submit(gate.wait, 5)
+    assert busy.value.retry_after == 7
+    assert executor.stats()['rejected'] == 1
+    gate.set()
+    assert call_when_free(executor, lambda: 'free again') == 'free again'
+
+
+def test_call_times_out_and_keeps_the_slot_until_the_work_ends(gate):
+    executor = llm_executor.LLMExecutor(workers=1, queue_size=0, timeout=5)
+    with pytest.raises(llm_executor.ExecutorTimeout):
+        executor.call(gate.wait, 5, timeout=0.05)
+    with pytest.raises(llm_executor.ExecutorBusy):
+        executor.submit(gate.wait, 5)
+    gate.set()
+    assert call_when_free(executor, lambda: 'ok') == 'ok'
+
+
+def test_stream_hands_over_items_as_they_come():
+    executor = llm_executor.LLMExecutor(workers=1, queue_size=0, timeout=5)
+    assert list(executor.stream(lambda n: iter(range(n)), 3)) == [0, 1, 2]
+
+    def broken():
+        yield 'first'
+        raise ValueError('mid-stream')
+    items = executor.stream(broken)
+    assert next(items) == 'first'
+    with pytest.raises(ValueError):
+        next(items)
+
+
+def test_busy_model_pool_answers_429(appmod, client, monkeypatch):
+    def busy(*args, **kwargs):
+        raise llm_executor.ExecutorBusy(3)
+    monkeypatch.setattr(appmod.ai_client, 'call', busy)
+    response = client.post('/api/chat', json={'message': 'any advice?'})
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == '3'
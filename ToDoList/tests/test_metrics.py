@@ -0,0 +1,47 @@
+import re
+
+import pytest
+
+import metrics
+
+
+def sample(text, name):
+    match = re.search(rf'^{re.escape(name)} (\S+)$', text, re.MULTILINE)
+    return float(match.group(1)) if match else 0.0
+
+
+@pytest.mark.parametrize('sql, labels', [
+    ('SELECT id FROM todos WHERE id = ?', ('SELECT', 'todos')),
+    ('\n    INSERT INTO chat_messages (user_message) VALUES (?)', ('INSERT', 'chat_messages')),
+    ('UPDATE todos SET status = ?', ('UPDATE', 'todos')),
+    ('INSERT OR REPLACE INTO llm_cache VALUES (?, ?, ?)', ('INSERT', 'llm_cache')),
+    ('BEGIN IMMEDIATE', ('BEGIN', '')),
+])
+def test_statements_are_labelled_by_operation_and_table(sql, labels):
+    assert metrics.statement_labels(sql) == labels
+
+
+def test_histogram_buckets_are_cumulative(monkeypatch):
+    # Keep the test histogram out of /metrics
+    monkeypatch.setattr(metrics, '_registry', [])
+    histogram = metrics.Histogram('test_seconds', 'Test', labels=('route',), buckets=(0.1, 1))
+    for value in (0.05, 0.5, 5):
+        histogram.observe(value, '/x')
+    lines = histogram.render()
+    assert 'test_seconds_bucket{route="/x",le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{route="/x",le="1"} 2' in lines
+    assert 'test_seconds_bucket{route="/x",le="+Inf"} 3' in lines
+    assert 'test_seconds_count{route="/x"} 3' in lines
+
+
+def test_requests_are_counted_per_route_template(client):
+    name = 'todo_http_request_duration_seconds_count{method="PUT",route="/api/todos/<int:todo_id>",status="200"}'
+    before = sample(client.get('/metrics').get_data(as_text=True), name)
+    client.post('/api/todos', json={'title': 'Measured'})
+    for _ in range(2):
+        client.put('/api/todos/1', json={'title': 'Measured', 'priority': 'low', 'status': 'pending'})
+    response = client.get('/metrics')
+    assert response.content_type == metrics.CONTENT_TYPE
+    text = response.get_data(as_text=True)
+    assert sample(text, name) == before + 2
+    assert '# TYPE todo_sqlite_query_duration_seconds histogram' in text
@@ -0,0 +1,34 @@
+import json
+
+import pytest
+
+import model_backends
+import model_client
+
+
+def fake(**options):
+    return model_backends.FakeModel(**{'latency': 0, 'jitter': 0, 'error_rate': 0, 'chunks': 4, 'seed': 1, **options})
+
+
+def test_stream_pieces_join_to_the_full_answer():
+    model = fake()
+    text = model.generate_content('Any tips?').text
+    pieces = [chunk.text for chunk in model.generate_content('Any tips?', stream=True)]
+    assert len(pieces) == 4
+    assert ''.join(pieces) == text
+
+
+def test_suggestion_prompts_get_valid_json():
+    answer = fake().generate_content('Return a JSON array of tasks for "plan a trip"').text
+    assert [item['priority'] for item in json.loads(answer)] == ['high', 'medium', 'low']
+
+
+def test_injected_failures_look_transient():
+    with pytest.raises(Exception) as failure:
+        fake(error_rate=1).generate_content('hi')
+    assert model_client.is_transient(failure.value)
+
+
+def test_slow_calls_time_out_like_the_sdk():
+    with pytest.raises(TimeoutError):
+        fake(latency=0.05).generate_content('hi', request_options={'timeout': 0.01})
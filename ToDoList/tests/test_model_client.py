@@ -0,0 +1,85 @@
+import time
+
+import pytest
+
+import llm_executor
+import model_client
+
+
+class Flaky:
+    """Fails with ``error`` the first ``failures`` calls, then answers"""
+
+    def __init__(self, failures, error=TimeoutError):
+        self.failures = failures
+        self.error = error
+        self.calls = 0
+
+    def __call__(self, prompt, request_timeout=None):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise self.error('nope')
+        return f'answer to {prompt}'
+
+
+@pytest.fixture
+def executor():
+    return llm_executor.LLMExecutor(workers=2, queue_size=2, timeout=5)
+
+
+def client_for(executor, **options):
+    return model_client.ModelClient(executor, **{'retries': 2, 'backoff': 0, 'deadline': 5, **options})
+
+
+def test_transient_errors_are_retried(executor):
+    fn = Flaky(2)
+    client = client_for(executor)
+    assert client.call(fn, 'hi') == 'answer to hi'
+    assert fn.calls == 3
+    assert client.stats()['retries'] == 2
+
+
+def test_other_errors_fail_at_once_without_opening_the_breaker(executor):
+    breaker = model_client.CircuitBreaker(failure_threshold=1)
+    client = client_for(executor, breaker=breaker)
+    fn = Flaky(1, error=ValueError)
+    with pytest.raises(model_client.ModelUnavailable):
+        client.call(fn, 'blocked')
+    assert fn.calls == 1
+    assert breaker.stats()['state'] == 'closed'
+
+
+def test_breaker_opens_then_lets_one_probe_through(executor):
+    breaker = model_client.CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    client = client_for(executor, breaker=breaker, retries=0)
+    down = Flaky(100)
+    for _ in range(2):
+        with pytest.raises(model_client.ModelUnavailable):
+            client.call(down, 'x')
+    with pytest.raises(model_client.CircuitOpen):
+        client.call(down, 'x')
+    assert down.calls == 2
+
+    time.sleep(0.06)
+    assert client.call(Flaky(0), 'probe') == 'answer to probe'
+    assert breaker.stats()['state'] == 'closed'
+    assert breaker.stats()['opened'] == 1
+
+
+def test_failed_probe_opens_the_breaker_again():
+    breaker = model_client.CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.allow()
+    # Only one probe at a time
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert breaker.stats()['state'] == 'open'
+
+
+def test_unread_stream_frees_the_probe_when_closed(executor):
+    breaker = model_client.CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    client = client_for(executor, breaker=breaker)
+    items = client.stream(lambda request_timeout=None: iter(['never', 'read']))
+    assert not breaker.allow()
+    items.close()
+    assert breaker.allow()
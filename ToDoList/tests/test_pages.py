@@ -0,0 +1,55 @@
+import gzip
+import re
+
+import pages
+
+from conftest import create_todo
+
+
+def test_dashboard_revalidates_until_tasks_change(client):
+    first = client.get('/')
+    assert first.status_code == 200
+    etag = first.headers['ETag']
+    assert client.get('/', headers={'If-None-Match': etag}).status_code == 304
+
+    create_todo(client, 'Fresh task')
+    changed = client.get('/', headers={'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert 'Fresh task' in changed.get_data(as_text=True)
+
+
+def test_dashboard_links_fingerprinted_assets(client):
+    html = client.get('/').get_data(as_text=True)
+    url = re.search(r'/assets/css/[^"]+\.[0-9a-f]{12}\.css', html).group(0)
+
+    response = client.get(url, headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'immutable' in response.headers['Cache-Control']
+    assert 'Accept-Encoding' in response.headers['Vary']
+
+    plain = client.get(url, headers={'Accept-Encoding': 'identity'})
+    assert 'Content-Encoding' not in plain.headers
+    assert gzip.decompress(response.get_data()) == plain.get_data()
+
+    cached = client.get(url, headers={'Accept-Encoding': 'gzip', 'If-None-Match': response.headers['ETag']})
+    assert cached.status_code == 304
+
+
+def test_unknown_asset_is_404(client):
+    assert client.get('/assets/css/style.000000000000.css').status_code == 404
+
+
+def test_fragments_render_again_only_for_a_newer_version(appmod):
+    cache = pages.FragmentCache(max_entries=1)
+    renders = []
+
+    def render(text):
+        return lambda: renders.append(text) or text
+    assert cache.get('stats', 1, render('v1')) == 'v1'
+    assert cache.get('stats', 1, render('unused')) == 'v1'
+    assert cache.get('stats', 2, render('v2')) == 'v2'
+    # One entry: another fragment evicts it
+    cache.get('tasks', 2, render('tasks'))
+    assert cache.get('stats', 2, render('v2 again')) == 'v2 again'
+    assert renders == ['v1', 'v2', 'tasks', 'v2 again']
@@ -0,0 +1,86 @@
+from datetime import date, datetime, timedelta
+
+import reminders
+
+from conftest import create_todo
+
+
+def days(n):
+    return (date.today() + timedelta(days=n)).isoformat()
+
+
+class Broker:
+    def __init__(self):
+        self.events = []
+
+    def publish(self, event, tenant=None):
+        self.events.append(event)
+
+    def has_subscribers(self, tenant=None):
+        return True
+
+
+def test_due_lists_overdue_first_and_skips_completed(client):
+    overdue = create_todo(client, 'Overdue', due_date=days(-2))
+    today = create_todo(client, 'Today', due_date=days(0))
+    soon = create_todo(client, 'Soon', due_date=days(5))
+    create_todo(client, 'Later', due_date=days(30))
+    create_todo(client, 'Undated')
+    done = create_todo(client, 'Done', due_date=days(1))
+    client.post('/api/todos/bulk', json={'operations': [{'op': 'update', 'id': done, 'status': 'completed'}]})
+
+    body = client.get('/api/todos/due?within=7').get_json()
+    assert [(t['id'], t['state'], t['days_left']) for t in body['todos']] == [
+        (overdue, 'overdue', -2), (today, 'due_soon', 0), (soon, 'upcoming', 5)]
+
+    body = client.get('/api/todos/due?within=7&overdue=0').get_json()
+    assert [t['id'] for t in body['todos']] == [today, soon]
+
+
+def test_due_pages_follow_the_cursor(client):
+    ids = [create_todo(client, f'Task {n}', due_date=days(n % 2)) for n in range(5)]
+    seen, cursor = [], ''
+    while True:
+        body = client.get(f'/api/todos/due?limit=2&cursor={cursor}').get_json()
+        seen += [t['id'] for t in body['todos']]
+        cursor = body['next_cursor']
+        if not cursor:
+            break
+    assert seen == [ids[0], ids[2], ids[4], ids[1], ids[3]]
+
+
+def test_due_rejects_bad_arguments(client):
+    for query in ('within=-1', 'within=1000', 'within=soon', 'cursor=nope'):
+        assert client.get(f'/api/todos/due?{query}').status_code == 400, query
+
+
+def test_scheduler_fires_each_reminder_once(client):
+    overdue = create_todo(client, 'Overdue', due_date=days(-1))
+    tomorrow = create_todo(client, 'Tomorrow', due_date=days(1))
+    create_todo(client, 'Next week', due_date=days(7))
+    broker = Broker()
+    scheduler = reminders.ReminderScheduler(broker)
+
+    now = datetime.now()
+    fired = scheduler.run_once(now)
+    assert [t['id'] for t in fired['overdue']] == [overdue]
+    assert [t['id'] for t in fired['due_soon']] == [tomorrow]
+    assert broker.events[0]['type'] == 'reminders'
+    assert broker.events[0]['total'] == 2
+
+    assert scheduler.run_once(now) == {'overdue': [], 'due_soon': []}
+    assert len(broker.events) == 1
+    assert scheduler.stats()['scheduled'] == 3
+
+
+def test_scheduler_picks_up_rescheduled_tasks(client):
+    task = create_todo(client, 'Moved', due_date=days(7))
+    scheduler = reminders.ReminderScheduler(Broker())
+    now = datetime.now()
+    assert scheduler.run_once(now) == {'overdue': [], 'due_soon': []}
+
+    client.post('/api/todos/bulk', json={'operations': [{'op': 'update', 'id': task, 'due_date': days(-1)}]})
+    scheduler.wake()
+    fired = scheduler.run_once(now)
+    assert [t['id'] for t in fired['overdue']] == [task]
+    assert scheduler.stats()['updates'] == 1
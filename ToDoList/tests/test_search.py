@@ -0,0 +1,82 @@
+import db
+import search
+
+from conftest import create_todo
+
+
+def test_any_word_queries_skip_stopwords():
+    assert search.fts_query('what about the report') == '"report"'
+    assert search.fts_query('the report', require_all=True) == '"the" AND "report"'
+    # Nothing but stopwords: keep them rather than match nothing
+    assert search.fts_query('to do') == '"to" OR "do"'
+
+
+def test_search_tasks_ignores_stopwords(client):
+    create_todo(client, 'Read the manual')
+    report = create_todo(client, 'Budget report')
+    with db.connection() as conn:
+        rows = search.search_tasks(conn, 'what is the report about')
+    assert [row['id'] for row in rows] == [report]
+
+
+def test_search_tasks_ranks_only_the_newest_matches(client, monkeypatch):
+    monkeypatch.setattr(search, 'MATCH_LIMIT', 2)
+    old = create_todo(client, 'report report report')
+    newer = [create_todo(client, f'report {n}') for n in range(3)]
+    with db.connection() as conn:
+        ids = [row['id'] for row in search.search_tasks(conn, 'report')]
+    assert old not in ids
+    assert sorted(ids) == newer[1:]
+
+
+def test_completed_matches_do_not_crowd_out_older_pending_tasks(client, monkeypatch):
+    monkeypatch.setattr(search, 'MATCH_LIMIT', 2)
+    pending = create_todo(client, 'Quarterly report')
+    done = [create_todo(client, f'Report {n}') for n in range(3)]
+    client.post('/api/todos/bulk', json={'operations': [{'op': 'update', 'id': i, 'status': 'completed'}
+                                                        for i in done]})
+    with db.connection() as conn:
+        found = search.find_task(conn, 'report', pending_only=True)
+    assert found['id'] == pending
+
+
+def test_find_task_falls_back_to_any_word(client):
+    create_todo(client, 'Call the dentist')
+    create_todo(client, 'Pay the invoice')
+    with db.connection() as conn:
+        found = search.find_task(conn, 'the dentist tomorrow', pending_only=True, min_score=0.3)
+        missing = search.find_task(conn, 'the dentist tomorrow', require_all=True)
+    assert found['title'] == 'Call the dentist'
+    assert missing is None
+
+
+def test_search_endpoint_highlights_prefix_matches(client):
+    create_todo(client, 'Quarterly <b>report</b>', description='numbers for the board')
+    body = client.get('/api/search?q=quart').get_json()
+    assert body['success'] is True
+    [task] = body['tasks']['results']
+    assert task['title_html'] == '<mark>Quarterly</mark> &lt;b&gt;report&lt;/b&gt;'
+
+
+def test_search_covers_chat_history_and_pages(client):
+    with db.connection() as conn:
+        for n in range(3):
+            conn.execute('INSERT INTO chat_messages (user_message, ai_response) VALUES (?, ?)',
+                         (f'how do I plan the launch {n}?', 'Start with a <checklist>.'))
+    first = client.get('/api/search?q=launch&scope=chat&limit=2').get_json()
+    assert 'tasks' not in first
+    assert len(first['chat']['results']) == 2
+    assert first['chat']['next_offset'] == 2
+    assert '<mark>launch</mark>' in first['chat']['results'][0]['user_message_html']
+    rest = client.get('/api/search?q=launch&scope=chat&limit=2&offset=2').get_json()
+    assert len(rest['chat']['results']) == 1
+    assert rest['chat']['next_offset'] is None
+
+
+def test_search_filters_tasks_by_status(client):
+    create_todo(client, 'Launch plan')
+    done = create_todo(client, 'Launch retro')
+    client.post('/api/todos/bulk', json={'operations': [{'op': 'update', 'id': done, 'status': 'completed'}]})
+    body = client.get('/api/search?q=launch&scope=tasks&status=completed').get_json()
+    assert [t['id'] for t in body['tasks']['results']] == [done]
+    assert client.get('/api/search?q=launch&scope=files').status_code == 400
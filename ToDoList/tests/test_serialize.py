@@ -0,0 +1,39 @@
+import json
+
+import pytest
+
+import serialize
+
+from conftest import create_todo
+
+
+@pytest.mark.parametrize('fields, key, items', [
+    ({'success': True, 'next_cursor': None}, 'todos', ['{"id":1}', '{"id":2}']),
+    ({'success': True, 'version': 3}, 'todos', []),
+    ({}, 'items', ['"é"']),
+])
+def test_envelope_splices_encoded_items(fields, key, items):
+    text = serialize.envelope(fields, key, items)
+    assert json.loads(text) == dict(fields, **{key: [json.loads(i) for i in items]})
+
+
+def test_sqlite_rows_match_python_encoding(client):
+    create_todo(client, 'Ünïcode "quoted" task', description='line\nbreak', due_date='2030-01-02')
+    body = client.get('/api/todos').get_data(as_text=True)
+    todo = json.loads(body)['todos'][0]
+    assert todo['title'] == 'Ünïcode "quoted" task'
+    assert todo['description'] == 'line\nbreak'
+    assert todo['due_date'] == '2030-01-02'
+    assert 'Ünïcode' in body
+
+
+@pytest.mark.parametrize('use_orjson', [True, False] if serialize.orjson else [False])
+def test_jsonify_output_matches_the_standard_library(appmod, monkeypatch, use_orjson):
+    monkeypatch.setattr(serialize, 'USE_ORJSON', use_orjson)
+    data = {'b': [1, 2.5, None], 'a': 'ü', 'nested': {'x': True}}
+    with appmod.app.test_request_context():
+        body = appmod.jsonify(data).get_data(as_text=True)
+    assert json.loads(body) == data
+    # Keys are sorted, like Flask's default provider
+    assert body.startswith('{"a":')
+    assert serialize.dumps(data) == json.dumps(data, separators=(',', ':'), ensure_ascii=False)
@@ -0,0 +1,51 @@
+import db
+import tasks
+
+from conftest import create_todo
+
+
+def counted_and_computed():
+    with db.connection() as conn:
+        return tasks.get_stats(conn), tasks.compute_stats(conn)
+
+
+def test_counters_follow_every_kind_of_change(client):
+    ids = [create_todo(client, f'Task {n}', priority=p) for n, p in enumerate(['high', 'high', 'low'])]
+    client.put(f'/api/todos/{ids[0]}', json={'title': 'Task 0', 'priority': 'medium', 'status': 'completed'})
+    client.delete(f'/api/todos/{ids[2]}')
+    client.post('/api/todos/bulk', json={'operations': [
+        {'op': 'create', 'title': 'Bulk', 'priority': 'low'},
+        {'op': 'update', 'id': ids[1], 'status': 'completed'},
+    ]})
+
+    counted, computed = counted_and_computed()
+    assert counted == computed
+    assert counted == {
+        'total_tasks': 3,
+        'completed_tasks': 2,
+        'pending_tasks': 1,
+        'completion_rate': 66.7,
+        'high_priority': 1,
+        'medium_priority': 1,
+        'low_priority': 1,
+    }
+
+
+def test_stats_endpoint_revalidates(client):
+    response = client.get('/api/stats')
+    assert response.get_json()['stats']['total_tasks'] == 0
+    etag = response.headers['ETag']
+    assert client.get('/api/stats', headers={'If-None-Match': etag}).status_code == 304
+    create_todo(client)
+    assert client.get('/api/stats', headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_drifted_counters_are_rebuilt(client):
+    create_todo(client, priority='high')
+    with db.connection() as conn:
+        assert not tasks.repair_counters(conn)
+        conn.execute("UPDATE todo_counters SET count = 7 WHERE name = 'priority:high'")
+        assert tasks.repair_counters(conn)
+    counted, computed = counted_and_computed()
+    assert counted == computed
+    assert counted['high_priority'] == 1
@@ -0,0 +1,45 @@
+import pytest
+
+
+@pytest.fixture
+def model_calls(appmod, monkeypatch):
+    calls = []
+    call = appmod.ai_client.call
+
+    def counted(*args, **kwargs):
+        calls.append(args)
+        return call(*args, **kwargs)
+    monkeypatch.setattr(appmod.ai_client, 'call', counted)
+    return calls
+
+
+def batch(client, inputs):
+    return client.post('/api/ai-suggestions/batch', json={'inputs': inputs})
+
+
+def test_batch_asks_the_model_once_and_caches_each_input(client, model_calls):
+    body = batch(client, ['plan a trip', 'Plan  a trip', 'learn piano']).get_json()
+    assert [r['source'] for r in body['results']] == ['model', 'model', 'model']
+    assert body['results'][0]['suggestions'] == body['results'][1]['suggestions']
+    assert len(model_calls) == 1
+
+    body = batch(client, ['learn piano', 'write a book']).get_json()
+    assert [r['source'] for r in body['results']] == ['cache', 'model']
+    assert len(model_calls) == 2
+    # The single-input route shares the cache
+    assert client.post('/api/ai-suggestions', json={'input': 'write a book'}).get_json()['success']
+    assert len(model_calls) == 2
+
+
+def test_batch_falls_back_when_the_model_is_down(appmod, client, monkeypatch):
+    def unavailable(*args, **kwargs):
+        raise appmod.model_client.CircuitOpen('open')
+    monkeypatch.setattr(appmod.ai_client, 'call', unavailable)
+    body = batch(client, ['plan a trip']).get_json()
+    assert body['results'][0]['source'] == 'fallback'
+    assert body['results'][0]['suggestions'] == appmod.suggestions.FALLBACK_SUGGESTIONS
+
+
+@pytest.mark.parametrize('inputs', [[], ['ok', ''], ['ok', 3], 'plan a trip', ['x'] * 1000, ['x' * 100000]])
+def test_batch_rejects_bad_inputs(client, inputs):
+    assert batch(client, inputs).status_code == 400
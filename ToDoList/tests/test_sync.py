@@ -0,0 +1,55 @@
+import tasks
+
+from conftest import create_todo
+
+
+def test_changes_since_report_upserts_and_deletes(client):
+    version = client.get('/api/todos').get_json()['version']
+    keep = create_todo(client, 'Keep')
+    gone = create_todo(client, 'Gone')
+    client.put(f'/api/todos/{keep}', json={'title': 'Keep', 'priority': 'medium', 'status': 'completed'})
+    client.delete(f'/api/todos/{gone}')
+
+    body = client.get(f'/api/todos?since={version}&fields=id,status').get_json()
+    assert body['changed'] == [{'id': keep, 'status': 'completed'}]
+    assert body['deleted'] == [gone]
+    assert body['has_more'] is False
+
+    again = client.get(f"/api/todos?since={body['version']}").get_json()
+    assert (again['changed'], again['deleted'], again['version']) == ([], [], body['version'])
+
+
+def test_changes_come_in_pages(client):
+    count = tasks.MAX_CHANGES + 1
+    for batch in (count - 1, 1):
+        client.post('/api/todos/bulk', json={'operations': [{'op': 'create', 'title': 'Task'}] * batch})
+    first = client.get('/api/todos?since=0&fields=id').get_json()
+    assert first['has_more'] is True
+    rest = client.get(f"/api/todos?since={first['version']}&fields=id").get_json()
+    assert len(first['changed']) + len(rest['changed']) == count
+    assert rest['has_more'] is False
+
+
+def test_unchanged_list_is_304(client):
+    create_todo(client, 'Cached')
+    response = client.get('/api/todos?limit=10')
+    etag = response.headers['ETag']
+    assert etag.startswith('W/')
+    assert response.headers['Cache-Control'] == 'no-cache'
+
+    cached = client.get('/api/todos?limit=10', headers={'If-None-Match': etag})
+    assert cached.status_code == 304
+    assert cached.get_data() == b''
+
+    # Another query has its own tag
+    other = client.get('/api/todos?limit=5', headers={'If-None-Match': etag})
+    assert other.status_code == 200
+
+    create_todo(client, 'Changes the version')
+    changed = client.get('/api/todos?limit=10', headers={'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert changed.headers['ETag'] != etag
+
+
+def test_invalid_since_is_400(client):
+    assert client.get('/api/todos?since=yesterday').status_code == 400
@@ -0,0 +1,72 @@
+import os
+
+import pytest
+
+import db
+
+
+@pytest.fixture
+def router(appmod, tmp_path, monkeypatch):
+    router = db.ShardRouter(str(tmp_path / 'tenants'), capacity=2)
+    monkeypatch.setattr(db, 'router', router)
+    yield router
+    router.close_all()
+
+
+def as_tenant(tenant_id):
+    return {'X-Tenant-ID': tenant_id}
+
+
+def titles(client, tenant_id):
+    body = client.get('/api/todos', headers=as_tenant(tenant_id)).get_json()
+    return [todo['title'] for todo in body['todos']]
+
+
+def test_tenants_only_see_their_own_tasks(client, router):
+    client.post('/api/todos', json={'title': 'Acme task'}, headers=as_tenant('acme'))
+    client.post('/api/todos', json={'title': 'Globex task'}, headers=as_tenant('globex'))
+    assert titles(client, 'acme') == ['Acme task']
+    assert titles(client, 'globex') == ['Globex task']
+    stats = client.get('/api/stats', headers=as_tenant('acme')).get_json()
+    assert stats['stats']['total_tasks'] == 1
+    # The shared database is untouched
+    with db.pool.connection() as conn:
+        assert conn.execute('SELECT COUNT(*) FROM todos').fetchone()[0] == 0
+
+
+def test_tenant_header_is_required_and_checked(client, router):
+    assert client.get('/api/todos').status_code == 400
+    assert client.get('/api/todos', headers=as_tenant('../etc')).status_code == 400
+    # Metrics are not tenant data
+    assert client.get('/metrics').status_code == 200
+
+
+def test_new_shards_are_copies_of_a_migrated_template(router):
+    with db.tenant('acme'):
+        with db.connection() as conn:
+            conn.execute("INSERT INTO todos (title) VALUES ('x')")
+    path = router.path_for('acme')
+    assert os.path.exists(path)
+    assert db.schema_version(path) == len(db.MIGRATIONS)
+    assert router.stats()['created'] == 1
+
+
+def test_least_recently_used_pools_are_closed(router):
+    for tenant_id in ('a', 'b', 'a', 'c'):
+        router.pool_for(tenant_id)
+    stats = router.stats()
+    assert stats['open'] == 2
+    assert stats['evictions'] == 1
+    assert stats['hits'] == 1
+    # 'b' was evicted; its data is still on disk and reopens
+    with db.tenant('b'):
+        with db.connection() as conn:
+            assert conn.execute('SELECT COUNT(*) FROM todos').fetchone()[0] == 0
+
+
+def test_list_etags_differ_between_tenants(client, router):
+    for tenant_id in ('acme', 'globex'):
+        client.post('/api/todos', json={'title': 'Same'}, headers=as_tenant(tenant_id))
+    acme = client.get('/api/todos', headers=as_tenant('acme')).headers['ETag']
+    globex = client.get('/api/todos', headers=as_tenant('globex')).headers['ETag']
+    assert acme != globex
@@ -0,0 +1,53 @@
+import json
+
+from conftest import create_todo, query
+
+
+def list_todos(client, **params):
+    response = client.get('/api/todos', query_string=params)
+    return response.status_code, json.loads(response.get_data())
+
+
+def test_keyset_pages_cover_every_task_once(client):
+    ids = [create_todo(client, f'Task {n}') for n in range(7)]
+    # Same created_at everywhere: the id breaks the tie
+    query('UPDATE todos SET created_at = ?', ('2030-01-01 00:00:00',))
+
+    seen, cursor = [], None
+    while True:
+        params = {'limit': 3}
+        if cursor:
+            params['cursor'] = cursor
+        status, body = list_todos(client, **params)
+        assert status == 200
+        seen += [todo['id'] for todo in body['todos']]
+        cursor = body['next_cursor']
+        if not cursor:
+            break
+    assert seen == sorted(ids, reverse=True)
+
+
+def test_filters_combine(client):
+    create_todo(client, 'Low soon', priority='low', due_date='2030-01-05')
+    create_todo(client, 'High soon', priority='high', due_date='2030-01-05')
+    create_todo(client, 'High later', priority='high', due_date='2030-03-01')
+    create_todo(client, 'High undated', priority='high')
+    _, body = list_todos(client, priority='high,medium', due_before='2030-02-01')
+    assert [todo['title'] for todo in body['todos']] == ['High soon']
+    _, body = list_todos(client, priority='high', due_after='2030-02-01')
+    assert [todo['title'] for todo in body['todos']] == ['High later']
+
+
+def test_fields_project_and_dedupe(client):
+    todo = create_todo(client, 'Only id')
+    response = client.get('/api/todos?fields=id,title,id')
+    # json.loads would hide a repeated key
+    assert f'[{{"id":{todo},"title":"Only id"}}]' in response.get_data(as_text=True)
+
+
+def test_invalid_list_arguments_are_400(client):
+    for params in ({'fields': 'id,secret'}, {'cursor': 'not-a-cursor'}, {'status': 'done'},
+                   {'due_before': '01/02/2030'}, {'limit': 'ten'}):
+        status, body = list_todos(client, **params)
+        assert status == 400, params
+        assert body['success'] is False
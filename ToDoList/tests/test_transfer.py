@@ -0,0 +1,66 @@
+import json
+
+import transfer
+from conftest import create_todo
+
+
+def export_lines(client, query=''):
+    response = client.get(f'/api/todos/export?format=jsonl{query}')
+    assert response.status_code == 200
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+
+def test_export_and_restore_round_trip(client):
+    create_todo(client, 'First', priority='high', due_date='2030-01-02')
+    create_todo(client, 'Second', description='notes')
+    exported = client.get('/api/todos/export?format=jsonl').get_data()
+
+    client.delete('/api/todos/1')
+    response = client.post('/api/todos/import?keep_ids=1', data=exported,
+                           content_type='application/x-ndjson')
+    assert response.get_json()['imported'] == 2
+    assert [t['title'] for t in export_lines(client)] == ['First', 'Second']
+
+
+def test_export_filters_and_csv_header(client):
+    create_todo(client, 'Low', priority='low')
+    create_todo(client, 'High', priority='high')
+    assert [t['title'] for t in export_lines(client, '&priority=high')] == ['High']
+    csv_body = client.get('/api/todos/export?format=csv').get_data(as_text=True)
+    assert csv_body.splitlines()[0] == ','.join(transfer.EXPORT_FIELDS)
+
+
+def test_import_reports_invalid_lines(client):
+    body = '\n'.join([
+        json.dumps({'title': 'ok'}),
+        'not json',
+        json.dumps({'title': 'bad date', 'due_date': 'garbage'}),
+    ])
+    summary = client.post('/api/todos/import', data=body, content_type='application/x-ndjson').get_json()
+    assert summary['imported'] == 1
+    assert summary['failed'] == 2
+    assert [e['line'] for e in summary['errors']] == [2, 3]
+
+
+def test_bad_field_types_only_reject_their_line(client):
+    body = '\n'.join([
+        json.dumps({'title': 'first'}),
+        json.dumps({'title': 'bad', 'description': {'x': 1}}),
+        json.dumps({'title': ['not', 'text']}),
+        json.dumps({'title': 'last'}),
+    ])
+    summary = client.post('/api/todos/import', data=body, content_type='application/x-ndjson').get_json()
+    assert (summary['imported'], summary['failed']) == (2, 2)
+    assert summary['errors'] == [{'line': 2, 'error': 'description must be a string'},
+                                 {'line': 3, 'error': 'title must be a string'}]
+    assert [t['title'] for t in export_lines(client)] == ['first', 'last']
+
+
+def test_unread_export_releases_its_slot(client):
+    for _ in range(transfer.TRANSFER_MAX_CONCURRENT + 2):
+        with client.head('/api/todos/export') as response:
+            assert response.status_code == 200
+    with client.get('/api/todos/export', buffered=False) as response:
+        assert response.status_code == 200
+    assert client.get('/api/todos/export').status_code == 200
+    assert client.post('/api/todos/import', data='', content_type='application/x-ndjson').status_code == 200
@@ -0,0 +1,248 @@
+"""
+Streaming export and import of tasks as JSON lines or CSV.
+
+Exports run one SELECT on a dedicated connection and read it with
+``fetchmany``, so the response is a consistent snapshot produced
+EXPORT_BATCH rows at a time. Imports parse the request body line by line and
+insert IMPORT_BATCH rows per transaction. Memory use depends on the batch
+sizes, not on the size of the table or the upload.
+"""
+import csv
+import io
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+import db
+import serialize
+import tasks
+
+EXPORT_BATCH = int(os.getenv('EXPORT_BATCH', '2000'))
+IMPORT_BATCH = int(os.getenv('IMPORT_BATCH', '2000'))
+TRANSFER_MAX_CONCURRENT = int(os.getenv('TRANSFER_MAX_CONCURRENT', '2'))
+TRANSFER_RETRY_AFTER = 5
+MAX_REPORTED_ERRORS = 20
+
+FORMATS = {
+    'jsonl': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+EXPORT_FIELDS = tasks.TODO_FIELDS
+
+INSERT_SQL = '''
+    INSERT INTO todos (title, description, priority, status, due_date, created_at, completed_at)
+    VALUES (:title, :description, :priority, :status, :due_date,
+            coalesce(:created_at, CURRENT_TIMESTAMP),
+            CASE WHEN :status = 'completed' THEN coalesce(:completed_at, CURRENT_TIMESTAMP) END)
+'''
+
+# Restores keep the exported ids; rows that already exist are updated
+UPSERT_SQL = '''
+    INSERT INTO todos (id, title, description, priority, status, due_date, created_at, completed_at)
+    VALUES (:id, :title, :description, :priority, :status, :due_date,
+            coalesce(:created_at, CURRENT_TIMESTAMP),
+            CASE WHEN :status = 'completed' THEN coalesce(:completed_at, CURRENT_TIMESTAMP) END)
+    ON CONFLICT(id) DO UPDATE SET
+        title = excluded.title,
+        description = excluded.description,
+        priority = excluded.priority,
+        status = excluded.status,
+        due_date = excluded.due_date,
+        created_at = excluded.created_at,
+        completed_at = excluded.completed_at,
+        updated_at = CURRENT_TIMESTAMP
+'''
+
+# Exports and imports each hold a connection (and a server thread) for as
+# long as the transfer runs, so only a few may run at once
+_slots = threading.BoundedSemaphore(TRANSFER_MAX_CONCURRENT)
+
+
+class TransferBusy(Exception):
+    def __init__(self, retry_after=TRANSFER_RETRY_AFTER):
+        super().__init__('Too many imports or exports in progress')
+        self.retry_after = retry_after
+
+
+def acquire_slot():
+    """Take a transfer slot or raise TransferBusy. Returns the function that
+    gives it back; only its first call releases, so it can be wired to
+    every way a transfer ends."""
+    if not _slots.acquire(blocking=False):
+        raise TransferBusy()
+    released = threading.Lock()
+
+    def release():
+        if released.acquire(blocking=False):
+            _slots.release()
+    return release
+
+
+def parse_format(value, content_type=None):
+    if value:
+        if value not in FORMATS:
+            raise ValueError(f"Invalid format: {value} (expected {' or '.join(FORMATS)})")
+        return value
+    return 'csv' if content_type and content_type.startswith('text/csv') else 'jsonl'
+
+
+# Export
+def encode_jsonl(rows):
+    """JSON lines of rows selected as one ``json_object()`` column"""
+    return '\n'.join(row[0] for row in rows) + '\n'
+
+
+def encode_csv(rows):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue()
+
+
+ENCODERS = {'jsonl': encode_jsonl, 'csv': encode_csv}
+# JSON lines are encoded by SQLite, one object per row
+COLUMNS = {
+    'jsonl': serialize.json_object_sql(EXPORT_FIELDS),
+    'csv': ', '.join(EXPORT_FIELDS),
+}
+
+
+def export_chunks(fmt, status=None, priority=None, batch=EXPORT_BATCH):
+    """Yield the export body, one chunk per ``batch`` rows, in id order"""
+    sql = f"SELECT {COLUMNS[fmt]} FROM todos"
+    conditions = []
+    params = []
+    if status:
+        conditions.append('status = ?')
+        params.append(status)
+    if priority:
+        conditions.append('priority = ?')
+        params.append(priority)
+    if conditions:
+        sql += ' WHERE ' + ' AND '.join(conditions)
+    sql += ' ORDER BY id'
+
+    encode = ENCODERS[fmt]
+    if fmt == 'csv':
+        yield encode_csv([EXPORT_FIELDS])
+    with db.dedicated_connection() as conn:
+        # Plain tuples: no per-row Row objects on the hot path
+        conn.row_factory = None
+        cursor = conn.execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(batch)
+            if not rows:
+                break
+            yield encode(rows)
+
+
+# Import
+def text_lines(stream):
+    """Decode a binary request body lazily, one line at a time"""
+    return io.TextIOWrapper(io.BufferedReader(stream, 1 << 16), encoding='utf-8-sig',
+                            errors='replace', newline='')
+
+
+def parse_jsonl(lines):
+    """Yield ``(line_number, record, error)`` for each non-empty line"""
+    for number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield number, json.loads(line), None
+        except ValueError as e:
+            yield number, None, f'Invalid JSON: {str(e)}'
+
+
+def parse_csv(lines):
+    """Yield ``(line_number, record, error)`` per CSV row; the first row is
+    the header. Empty cells count as missing values."""
+    reader = csv.DictReader(lines)
+    for record in reader:
+        yield reader.line_num, {k: v for k, v in record.items() if k and v != ''}, None
+
+
+PARSERS = {'jsonl': parse_jsonl, 'csv': parse_csv}
+
+
+def parse_timestamp(value, name):
+    if value in (None, ''):
+        return None
+    try:
+        return datetime.fromisoformat(str(value)).strftime('%Y-%m-%d %H:%M:%S')
+    except ValueError:
+        raise ValueError(f'Invalid {name}: {value}')
+
+
+def validate_record(record, keep_ids=False):
+    """Normalize one imported task into SQL parameters or raise ValueError"""
+    if not isinstance(record, dict):
+        raise ValueError('Record must be an object')
+    title = (tasks.optional_text(record, 'title') or '').strip()
+    if not title:
+        raise ValueError('title is required')
+    priority = record.get('priority') or 'medium'
+    if priority not in tasks.PRIORITIES:
+        raise ValueError(f'Invalid priority: {priority}')
+    status = record.get('status') or 'pending'
+    if status not in tasks.STATUSES:
+        raise ValueError(f'Invalid status: {status}')
+    due_date = tasks.parse_due_date(record.get('due_date') or None)
+
+    params = {
+        'title': title,
+        'description': tasks.optional_text(record, 'description') or '',
+        'priority': priority,
+        'status': status,
+        'due_date': due_date,
+        'created_at': parse_timestamp(record.get('created_at'), 'created_at'),
+        'completed_at': parse_timestamp(record.get('completed_at'), 'completed_at'),
+    }
+    if keep_ids:
+        try:
+            params['id'] = int(record['id'])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError('id must be an integer')
+    return params
+
+
+def import_lines(lines, fmt, keep_ids=False, batch=IMPORT_BATCH):
+    """Insert the tasks in ``lines`` (an iterable of text lines).
+
+    Valid rows are written ``batch`` at a time, each batch in its own
+    transaction; invalid rows are skipped and reported with their line
+    number. Returns a summary dict.
+    """
+    sql = UPSERT_SQL if keep_ids else INSERT_SQL
+    summary = {'imported': 0, 'failed': 0, 'errors': []}
+    pending = []
+
+    def fail(line, error, count=1):
+        summary['failed'] += count
+        if len(summary['errors']) < MAX_REPORTED_ERRORS:
+            summary['errors'].append({'line': line, 'error': error})
+
+    def flush():
+        try:
+            with db.connection() as conn:
+                conn.executemany(sql, [params for _, params in pending])
+            summary['imported'] += len(pending)
+        except sqlite3.Error as e:
+            fail(pending[0][0], f'Batch ending at line {pending[-1][0]} not imported: {str(e)}', len(pending))
+        pending.clear()
+
+    for number, record, error in PARSERS[fmt](lines):
+        if error is None:
+            try:
+                pending.append((number, validate_record(record, keep_ids)))
+            except ValueError as e:
+                error = str(e)
+        if error is not None:
+            fail(number, error)
+        elif len(pending) >= batch:
+            flush()
+    if pending:
+        flush()
+    return summary
@@ -0,0 +1,82 @@
+"""
+Background worker threads shared by the insights refresher, the chat
+compactor and the reminder scheduler.
+"""
+import threading
+
+import db
+
+
+class BackgroundWorker:
+    """Daemon thread that calls ``run_once()`` in the context of each tenant
+    that woke it, and every ``interval`` seconds for the shared database
+    (``interval`` 0: only when woken).
+
+    Subclasses name the thread and its error messages and implement
+    ``run_once()``; ``_timeout()``, ``_pending_tenants()`` and
+    ``_finished()`` change when passes run, for whom, and when the thread
+    stops. Counters go in ``_stats``.
+    """
+
+    thread_name = 'background-worker'
+    error_label = 'Background Worker Error'
+    # Run a pass as soon as the thread starts rather than on the first wake
+    run_on_start = False
+
+    def __init__(self, interval=0):
+        self.interval = interval
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._tenants = set()
+        self._stats = {'errors': 0}
+
+    def start(self):
+        """Start the thread once per process (no-op when already running)"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=self.thread_name, daemon=True)
+                self._thread.start()
+                if self.run_on_start:
+                    self._wake.set()
+
+    def wake(self):
+        """Ask for a pass over the caller's tenant now instead of at the
+        next interval"""
+        with self._lock:
+            self._tenants.add(db.current_tenant())
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self._timeout())
+            self._wake.clear()
+            for tenant in self._pending_tenants():
+                try:
+                    with db.tenant(tenant):
+                        self.run_once()
+                except Exception as e:
+                    self._stats['errors'] += 1
+                    print(f"{self.error_label}: {str(e)}")
+            if self._finished():
+                return
+
+    def _timeout(self):
+        return self.interval if self.interval > 0 else None
+
+    def _pending_tenants(self):
+        """Tenants woken since the last pass; the shared database otherwise"""
+        with self._lock:
+            tenants, self._tenants = self._tenants or {None}, set()
+        return tenants
+
+    def _finished(self):
+        return False
+
+    def run_once(self):
+        raise NotImplementedError
+
+    def stats(self):
+        stats = dict(self._stats)
+        stats['running'] = self._thread is not None and self._thread.is_alive()
+        return stats